@@ -0,0 +1,232 @@
+"""
+Admission control for expensive endpoints.
+
+Each endpoint class (auto-plan, search) has its own concurrency limit and a
+bounded FIFO of waiting requests, enforced on the event loop before the
+handler is given a threadpool thread, so a burst on one class cannot take
+every thread from trip CRUD. A request that finds the wait queue full, or
+waits longer than ADMISSION_MAX_WAIT_SECONDS, gets 503 with a Retry-After
+estimated from recent handler times.
+
+Before queueing, each caller spends a token from its own bucket for the
+class; an empty bucket means 429 with the time until the next token. Callers
+are keyed by user when their access token can be verified locally
+(SUPABASE_JWT_SECRET), otherwise by client address.
+
+Limits and buckets are per worker process.
+"""
+from app.core.config import settings
+from collections import OrderedDict, deque
+from fastapi import HTTPException, Request
+from jose import JWTError, jwt
+from typing import Dict
+import asyncio
+import math
+import time
+
+
+class Overloaded(Exception):
+    """The class is at its concurrency limit and its wait queue is full or too slow."""
+
+
+class ConcurrencyLimit:
+    """
+    Up to `limit` holders; further callers wait in arrival order, at most
+    `max_waiting` of them, each for at most `max_wait_seconds`. A released
+    slot is handed directly to the oldest waiter. Event-loop only.
+    """
+
+    def __init__(self, limit: int, max_waiting: int, max_wait_seconds: float):
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.max_wait_seconds = max_wait_seconds
+        self.active = 0
+        self._waiters: deque = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> None:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+        if len(self._waiters) >= self.max_waiting:
+            raise Overloaded("wait queue full")
+
+        slot = asyncio.get_running_loop().create_future()
+        self._waiters.append(slot)
+        try:
+            await asyncio.wait_for(slot, self.max_wait_seconds)
+        except BaseException as e:
+            if slot.done() and not slot.cancelled():
+                self.release()  # handed a slot just as we gave up
+            else:
+                slot.cancel()
+                try:
+                    self._waiters.remove(slot)
+                except ValueError:
+                    pass
+            if isinstance(e, asyncio.TimeoutError):
+                raise Overloaded("timed out waiting")
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            slot = self._waiters.popleft()
+            if not slot.done():
+                slot.set_result(None)  # the slot passes on; active is unchanged
+                return
+        self.active -= 1
+
+
+class TokenBuckets:
+    """Per-key token buckets; the least recently seen keys are forgotten beyond `max_keys`."""
+
+    def __init__(self, rate_per_second: float, burst: int, max_keys: int = 10000):
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: OrderedDict = OrderedDict()  # key -> (tokens, updated_at)
+
+    def take(self, key: str) -> float:
+        """Spend a token; returns 0, or the seconds until one is available."""
+        if self.rate_per_second <= 0:
+            return 0.0
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated_at) * self.rate_per_second)
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+        else:
+            wait = (1 - tokens) / self.rate_per_second
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class AdmissionClass:
+    def __init__(self, name: str, concurrency: int, rate_per_minute: float, burst: int):
+        self.name = name
+        self.limit = ConcurrencyLimit(
+            concurrency, settings.ADMISSION_QUEUE_SIZE, settings.ADMISSION_MAX_WAIT_SECONDS
+        )
+        self.buckets = TokenBuckets(rate_per_minute / 60, burst)
+        self.mean_seconds = 1.0  # moving average of how long a request holds its slot
+        self.admitted = 0
+        self.rejected = 0
+        self.rate_limited = 0
+
+    def take_token(self, client: str) -> None:
+        """Raise 429 if `client` has no token left for this class."""
+        wait = self.buckets.take(client)
+        if wait:
+            self.rate_limited += 1
+            raise HTTPException(
+                status_code=429,
+                detail=f"Too many {self.name} requests, slow down",
+                headers={"Retry-After": str(math.ceil(wait))}
+            )
+
+    async def enter(self, client: str) -> float:
+        self.take_token(client)
+        try:
+            await self.limit.acquire()
+        except Overloaded:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail=f"Too many {self.name} requests in progress, try again later",
+                headers={"Retry-After": str(self._retry_after())}
+            )
+        self.admitted += 1
+        return time.monotonic()
+
+    def leave(self, entered_at: float) -> None:
+        self.limit.release()
+        self.mean_seconds += 0.1 * (time.monotonic() - entered_at - self.mean_seconds)
+
+    def _retry_after(self) -> int:
+        """Seconds for the current queue to drain, roughly."""
+        backlog = (self.limit.waiting + 1) / max(self.limit.limit, 1)
+        return max(1, math.ceil(self.mean_seconds * backlog))
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit.limit,
+            "active": self.limit.active,
+            "waiting": self.limit.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "rate_limited": self.rate_limited
+        }
+
+
+AUTO_PLAN = "auto_plan"
+SEARCH = "search"
+
+_classes: Dict[str, AdmissionClass] = {
+    AUTO_PLAN: AdmissionClass(
+        AUTO_PLAN,
+        settings.ADMISSION_AUTO_PLAN_CONCURRENCY,
+        settings.ADMISSION_AUTO_PLAN_RATE_PER_MINUTE,
+        settings.ADMISSION_AUTO_PLAN_BURST
+    ),
+    SEARCH: AdmissionClass(
+        SEARCH,
+        settings.ADMISSION_SEARCH_CONCURRENCY,
+        settings.ADMISSION_SEARCH_RATE_PER_MINUTE,
+        settings.ADMISSION_SEARCH_BURST
+    ),
+}
+
+
+def _client_key(request: Request) -> str:
+    authorization = request.headers.get("authorization", "")
+    if settings.SUPABASE_JWT_SECRET and authorization[:7].lower() == "bearer ":
+        try:
+            claims = jwt.decode(
+                authorization[7:], settings.SUPABASE_JWT_SECRET,
+                algorithms=["HS256"], options={"verify_aud": False}
+            )
+            if claims.get("sub"):
+                return f"user:{claims['sub']}"
+        except JWTError:
+            pass
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def admit(class_name: str):
+    """
+    Dependency that holds a slot of `class_name` while the handler runs:
+    `dependencies=[Depends(admit(SEARCH), scope="function")]`.
+    """
+    admission_class = _classes[class_name]
+
+    async def dependency(request: Request):
+        entered_at = await admission_class.enter(_client_key(request))
+        try:
+            yield
+        finally:
+            admission_class.leave(entered_at)
+
+    return dependency
+
+
+def rate_limit(class_name: str):
+    """
+    Dependency that only spends a token of `class_name`, for endpoints that
+    start the work elsewhere (e.g. a background job) and return at once.
+    """
+    admission_class = _classes[class_name]
+
+    def dependency(request: Request):
+        admission_class.take_token(_client_key(request))
+
+    return dependency
+
+
+def admission_stats() -> dict:
+    return {name: c.stats() for name, c in _classes.items()}
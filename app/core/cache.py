@@ -0,0 +1,277 @@
+from collections import OrderedDict
+from app.core.config import settings
+from typing import Any, Dict, Optional
+import json
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class MemoryBackend:
+    """
+    In-process LRU cache with per-entry expiry. Values are stored as JSON like
+    the other backends, so every get returns a fresh copy with the same types.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISSING
+            if entry[0] < time.time():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+            value = entry[1]
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        value = json.dumps(value, default=str)
+        with self._lock:
+            self._data[key] = (time.time() + ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_prefix(self, prefix: str) -> None:
+        with self._lock:
+            for key in [k for k in self._data if k.startswith(prefix)]:
+                del self._data[key]
+
+    def size(self) -> Optional[int]:
+        return len(self._data)
+
+
+class SharedMemoryBackend:
+    """
+    Host-wide cache shared by all worker processes: a SQLite database on a
+    tmpfs (/dev/shm by default), read through mmap. Values are stored as JSON.
+    When over `max_entries`, the entries closest to expiry are evicted first.
+    """
+
+    name = "shared"
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread, reopened after a fork
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute("PRAGMA mmap_size=268435456")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_expires_at ON cache(expires_at)")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str) -> Any:
+        row = self._conn().execute(
+            "SELECT value FROM cache WHERE key = ? AND expires_at >= ?", (key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else _MISSING
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value, default=str), time.time() + ttl_seconds)
+        )
+        with self._writes_lock:
+            self._writes += 1
+            prune = self._writes % 100 == 0
+        if prune:
+            self._prune(conn)
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+        overflow = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM cache WHERE key IN "
+                "(SELECT key FROM cache ORDER BY expires_at LIMIT ?)", (overflow,)
+            )
+
+    def delete(self, key: str) -> None:
+        self._conn().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def delete_prefix(self, prefix: str) -> None:
+        # Range scan on the primary key instead of LIKE
+        self._conn().execute(
+            "DELETE FROM cache WHERE key >= ? AND key < ?", (prefix, prefix + "\U0010ffff")
+        )
+
+    def size(self) -> Optional[int]:
+        return self._conn().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+class RedisBackend:
+    """Cache on a Redis-protocol server (Redis, Valkey, KeyDB...). Values are stored as JSON."""
+
+    name = "redis"
+
+    def __init__(self, url: str, key_prefix: str = "globetrotter:"):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package")
+        # Short socket timeouts: a slow cache must not be slower than a miss
+        self._client = redis.Redis.from_url(url, socket_connect_timeout=0.5, socket_timeout=0.5)
+        self._prefix = key_prefix
+
+    def get(self, key: str) -> Any:
+        value = self._client.get(self._prefix + key)
+        return json.loads(value) if value is not None else _MISSING
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        self._client.set(self._prefix + key, json.dumps(value, default=str), px=max(int(ttl_seconds * 1000), 1))
+
+    def delete(self, key: str) -> None:
+        self._client.delete(self._prefix + key)
+
+    def delete_prefix(self, prefix: str) -> None:
+        # Glob characters in the prefix must match literally
+        pattern = re.sub(r"([*?\[\]\\])", r"\\\1", self._prefix + prefix) + "*"
+        keys = []
+        for key in self._client.scan_iter(match=pattern, count=500):
+            keys.append(key)
+            if len(keys) >= 500:
+                self._client.unlink(*keys)
+                keys = []
+        if keys:
+            self._client.unlink(*keys)
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+class Cache:
+    """
+    Namespaced view over a backend with a default TTL and hit-rate counters.
+    Backend errors are logged and treated as misses, so a cache outage never
+    fails a request.
+    """
+
+    def __init__(self, namespace: str, backend, ttl_seconds: float):
+        self.namespace = namespace
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self._prefix = f"{namespace}:"
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            value = self.backend.get(self._prefix + key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Cache get error (%s): %s", self.namespace, e)
+            value = _MISSING
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        try:
+            self.backend.set(self._prefix + key, value, ttl_seconds if ttl_seconds is not None else self.ttl_seconds)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Cache set error (%s): %s", self.namespace, e)
+
+    def delete(self, key: str) -> None:
+        try:
+            self.backend.delete(self._prefix + key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Cache delete error (%s): %s", self.namespace, e)
+
+    def delete_prefix(self, prefix: str) -> None:
+        try:
+            self.backend.delete_prefix(self._prefix + prefix)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Cache delete error (%s): %s", self.namespace, e)
+
+    def clear(self) -> None:
+        self.delete_prefix("")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+_caches: Dict[str, Cache] = {}
+_shared_backend = None
+_registry_lock = threading.Lock()
+
+
+def _get_shared_backend():
+    global _shared_backend
+    if _shared_backend is None:
+        if settings.CACHE_BACKEND == "redis":
+            _shared_backend = RedisBackend(settings.CACHE_REDIS_URL)
+        else:
+            path = settings.CACHE_SHARED_PATH or os.path.join(
+                "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(),
+                "globetrotter-cache.sqlite"
+            )
+            _shared_backend = SharedMemoryBackend(path, settings.CACHE_SHARED_MAX_ENTRIES)
+    return _shared_backend
+
+
+def get_cache(namespace: str, ttl_seconds: float, max_entries: int = 1024) -> Cache:
+    """
+    Return the cache for `namespace`, backed by settings.CACHE_BACKEND
+    ("memory", "shared" or "redis"). `max_entries` applies to the memory backend.
+    """
+    with _registry_lock:
+        cache = _caches.get(namespace)
+        if cache is None:
+            if settings.CACHE_BACKEND == "memory":
+                backend = MemoryBackend(max_entries)
+            else:
+                backend = _get_shared_backend()
+            cache = _caches[namespace] = Cache(namespace, backend, ttl_seconds)
+        return cache
+
+
+def cache_stats() -> dict:
+    return {namespace: cache.stats() for namespace, cache in _caches.items()}
@@ -1,6 +1,7 @@
 import pydantic_settings
 from pydantic_settings import BaseSettings
-from typing import List
+from datetime import time
+from typing import List, Literal, Optional
 import os
 
 
@@ -10,15 +11,29 @@ class Settings(BaseSettings):
     DEBUG: bool = True
     API_V1_PREFIX: str = "/api/v1"
     
+    # Server (production mode, see app/server.py)
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    WEB_CONCURRENCY: int = 0  # 0 = one worker per available CPU
+    SERVER_BACKLOG: int = 2048
+    KEEP_ALIVE_SECONDS: int = 5
+    GRACEFUL_TIMEOUT_SECONDS: int = 30
+    WORKER_TIMEOUT_SECONDS: int = 60
+    MAX_REQUESTS_PER_WORKER: int = 10000  # recycle workers to limit memory creep
+    MAX_REQUESTS_JITTER: int = 1000
+    FORWARDED_ALLOW_IPS: str = "127.0.0.1"
+    
     # Supabase
     SUPABASE_URL: str
     SUPABASE_KEY: str
     SUPABASE_SERVICE_KEY: str
+    SUPABASE_JWT_SECRET: Optional[str] = None  # lets admission control key callers by user without a round trip
     
     # Security
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    ADMIN_EMAILS: List[str] = []  # admins can also be marked with app_metadata.role = "admin"
     
     # CORS
     BACKEND_CORS_ORIGINS: List[str] = [
@@ -32,6 +47,113 @@ class Settings(BaseSettings):
     FSQ_API_VERSION: str = "2025-06-17"
     FSQ_BASE_URL: str = "https://places-api.foursquare.com"
     
+    # Upstream resilience (GeoNames, Foursquare, restcountries)
+    UPSTREAM_MIN_TIMEOUT_SECONDS: float = 1.0
+    UPSTREAM_MAX_TIMEOUT_SECONDS: float = 10.0
+    UPSTREAM_TIMEOUT_MULTIPLIER: float = 2.0  # timeout = p99 latency * multiplier
+    UPSTREAM_MIN_SAMPLES: int = 20  # latency samples needed before adapting
+    UPSTREAM_MAX_RETRIES: int = 2
+    UPSTREAM_BACKOFF_SECONDS: float = 0.2
+    UPSTREAM_HEDGE_ENABLED: bool = False
+    UPSTREAM_FAILURE_THRESHOLD: int = 5
+    UPSTREAM_RESET_TIMEOUT_SECONDS: float = 30.0
+    UPSTREAM_CACHE_SIZE: int = 2048
+    UPSTREAM_STALE_TTL_SECONDS: int = 86400  # how long a response may be served while the upstream is down
+    GEONAMES_CACHE_TTL_SECONDS: int = 86400
+    COUNTRIES_CACHE_TTL_SECONDS: int = 604800
+    FSQ_CACHE_TTL_SECONDS: int = 3600
+    FSQ_PAGE_SIZE: int = 50  # Foursquare is always asked for a full page, cached per city
+    
+    # Cache warming for popular and recently requested cities (see app/services/cache_warmer.py)
+    CACHE_WARM_INTERVAL_SECONDS: int = 600  # 0 disables
+    CACHE_WARM_TOP_DESTINATIONS: int = 20  # from the leaderboard, so at most LEADERBOARD_SIZE
+    CACHE_WARM_BUDGET: int = 100  # upstream calls per run
+    CACHE_WARM_RECENT_SIZE: int = 500  # distinct recent queries remembered between runs
+    
+    # Logging: records are written by a background thread
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: Literal["json", "text"] = "json"
+    LOG_QUEUE_SIZE: int = 10000  # records beyond this are dropped, never waited on
+    LOG_REPEAT_LIMIT: int = 10  # same warning/error per window; 0 disables sampling
+    LOG_REPEAT_WINDOW_SECONDS: int = 60
+    
+    # Tracing: OpenTelemetry spans for requests, Supabase calls and upstream APIs
+    TRACE_SAMPLE_RATE: float = 0.0  # share of requests traced; a sampled incoming traceparent is always followed
+    TRACE_EXPORTER: Literal["otlp", "file"] = "otlp"
+    TRACE_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"  # OTLP/HTTP (JSON) collector
+    TRACE_FILE_PATH: str = "traces.jsonl"
+    TRACE_SERVICE_NAME: str = "globetrotter-api"
+    TRACE_QUEUE_SIZE: int = 10000  # finished spans beyond this are dropped
+    TRACE_EXPORT_INTERVAL_SECONDS: float = 5
+    
+    # Cache backend: "memory" (per process), "shared" (all workers on a host) or "redis"
+    CACHE_BACKEND: Literal["memory", "shared", "redis"] = "memory"
+    CACHE_SHARED_PATH: Optional[str] = None  # defaults to /dev/shm/globetrotter-cache.sqlite
+    CACHE_SHARED_MAX_ENTRIES: int = 100000
+    CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    
+    # Admission control for auto-plan and search (per worker, see app/core/admission.py)
+    ADMISSION_AUTO_PLAN_CONCURRENCY: int = 4
+    ADMISSION_AUTO_PLAN_RATE_PER_MINUTE: float = 10  # per user; 0 disables the bucket
+    ADMISSION_AUTO_PLAN_BURST: int = 3
+    ADMISSION_SEARCH_CONCURRENCY: int = 16  # /search/cities and /search/activities together
+    ADMISSION_SEARCH_RATE_PER_MINUTE: float = 60
+    ADMISSION_SEARCH_BURST: int = 20
+    ADMISSION_QUEUE_SIZE: int = 32  # requests waiting per class before 503
+    ADMISSION_MAX_WAIT_SECONDS: float = 5.0
+    
+    # Auto-plan
+    AUTO_PLAN_CACHE_SIZE: int = 512
+    AUTO_PLAN_CACHE_TTL_SECONDS: int = 3600
+    
+    # Auto-plan background jobs
+    AUTO_PLAN_JOB_WORKERS: int = 4
+    AUTO_PLAN_JOB_MAX_PENDING: int = 100
+    AUTO_PLAN_JOB_TTL_SECONDS: int = 600  # how long finished results are kept
+    AUTO_PLAN_JOB_POLL_SECONDS: float = 0.25  # how often an SSE stream re-reads the job state
+    
+    # Export / Import
+    EXPORT_BATCH_SIZE: int = 50
+    IMPORT_BATCH_SIZE: int = 500
+    IMPORT_MAX_TRIPS: int = 1000
+    
+    # Scheduling (conflict checks and auto-packing of activities)
+    SCHEDULE_DAY_START: time = time(9, 0)
+    SCHEDULE_DAY_END: time = time(21, 0)
+    SCHEDULE_DEFAULT_DURATION_MINUTES: int = 60  # activities without a duration, and meals
+    SCHEDULE_GAP_MINUTES: int = 15  # travel buffer kept around packed activities
+    
+    # User profiles (login, refresh, /profile/me)
+    PROFILE_CACHE_SIZE: int = 10000
+    PROFILE_CACHE_TTL_SECONDS: int = 300
+    
+    # Trip distance matrices
+    DISTANCE_CACHE_SIZE: int = 1024
+    DISTANCE_CACHE_TTL_SECONDS: int = 3600
+    
+    # Map clustering for /search/clusters
+    CLUSTER_MAX_ZOOM: int = 16  # beyond this every point is returned on its own
+    CLUSTER_REFRESH_SECONDS: int = 60  # catalog changes applied incrementally
+    CLUSTER_REBUILD_SECONDS: int = 3600
+    CLUSTER_TRIP_CACHE_SIZE: int = 64  # public trips kept in memory
+    
+    # Platform metrics (see migrations/003_platform_metrics_aggregation.sql)
+    METRICS_REFRESH_INTERVAL_SECONDS: int = 300  # 0 disables the in-app refresh (e.g. when using pg_cron)
+    
+    # Popular destinations / activities leaderboard (see migrations/004_popularity_leaderboard.sql)
+    LEADERBOARD_SIZE: int = 50  # entries kept per region
+    LEADERBOARD_REFRESH_SECONDS: int = 60  # also how often queued score changes are folded in
+    
+    # Realtime trip events: "memory" (this process only) or "redis" (all workers)
+    EVENTS_BACKEND: Literal["memory", "redis"] = "memory"
+    EVENTS_REDIS_URL: str = "redis://localhost:6379/0"
+    EVENTS_QUEUE_SIZE: int = 100  # events a slow subscriber may lag before it is dropped
+    
+    # Delta sync (see migrations/006_sync_change_log.sql)
+    SYNC_PAGE_SIZE: int = 500
+    SYNC_TOMBSTONE_RETENTION_DAYS: int = 30  # older cursors get 410 and resync
+    SYNC_PRUNE_INTERVAL_SECONDS: int = 3600  # 0 disables the in-app prune
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
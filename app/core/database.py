@@ -1,11 +1,18 @@
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
 from app.core.config import settings
+from app.core.tracing import traced_http_client
 
 # Initialize Supabase client
-supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+supabase: Client = create_client(
+    settings.SUPABASE_URL, settings.SUPABASE_KEY,
+    options=ClientOptions(httpx_client=traced_http_client())
+)
 
 # Service role client for admin operations
-supabase_admin: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY)
+supabase_admin: Client = create_client(
+    settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY,
+    options=ClientOptions(httpx_client=traced_http_client())
+)
 
 
 def get_supabase() -> Client:
@@ -0,0 +1,188 @@
+"""
+Publish/subscribe for realtime trip events.
+
+Routes publish after a successful write; WebSocket handlers subscribe per
+topic ("trip:{id}"). An event is serialized and published once, then handed
+to each event loop with one callback that fills every subscriber queue on
+it, however many clients are listening. A subscriber that
+falls EVENTS_QUEUE_SIZE events behind is dropped and expected to reconnect
+and reload.
+
+EVENTS_BACKEND="memory" delivers within this process (single worker, tests);
+"redis" relays through Redis pub/sub so every worker's subscribers get it.
+"""
+from app.core.config import settings
+from datetime import datetime
+from typing import Dict, Optional, Set
+import asyncio
+import json
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    def __init__(self, broker: "EventBroker", topic: str, max_queue: int):
+        self.broker = broker
+        self.topic = topic
+        self.max_queue = max_queue
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.overflowed = False
+
+    def _put(self, payload: str):
+        if self.overflowed:
+            return
+        if self.queue.qsize() >= self.max_queue:
+            self.overflowed = True
+            payload = None  # wakes the reader so it can close the connection
+        self.queue.put_nowait(payload)
+
+    async def get(self) -> Optional[str]:
+        """The next event as JSON, or None once this subscriber has been dropped."""
+        payload = await self.queue.get()
+        return None if self.overflowed else payload
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class EventBroker:
+    """In-process broker; also the local delivery half of RedisEventBroker."""
+
+    name = "memory"
+
+    def __init__(self, max_queue: int):
+        self.max_queue = max_queue
+        self._topics: Dict[str, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, topic: str) -> Subscription:
+        """Must be called from the event loop that will read the subscription."""
+        subscription = Subscription(self, topic, self.max_queue)
+        with self._lock:
+            self._topics.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._topics.get(subscription.topic)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._topics[subscription.topic]
+
+    def publish(self, topic: str, event: dict):
+        self.published += 1
+        self._deliver(topic, json.dumps(event, default=str))
+
+    def _deliver(self, topic: str, payload: str):
+        with self._lock:
+            subscribers = list(self._topics.get(topic, ()))
+        if not subscribers:
+            return
+        by_loop: Dict[asyncio.AbstractEventLoop, list] = {}
+        for subscription in subscribers:
+            by_loop.setdefault(subscription.loop, []).append(subscription)
+        for loop, group in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(self._fan_out, group, payload)
+            except RuntimeError:
+                pass  # loop closed, its subscribers are going away
+
+    def _fan_out(self, group, payload: str):
+        for subscription in group:
+            was_overflowed = subscription.overflowed
+            subscription._put(payload)
+            if subscription.overflowed and not was_overflowed:
+                self.dropped += 1
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": self.name,
+                "topics": len(self._topics),
+                "subscribers": sum(len(s) for s in self._topics.values()),
+                "published": self.published,
+                "dropped_subscribers": self.dropped
+            }
+
+
+class RedisEventBroker(EventBroker):
+    """
+    Publishes to Redis; one listener thread per worker receives every event on
+    the channel prefix and delivers it to that worker's subscribers.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str, max_queue: int, prefix: str = "events:"):
+        super().__init__(max_queue)
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("EVENTS_BACKEND=redis requires the 'redis' package")
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url, socket_connect_timeout=0.5)
+        self._pubsub = None
+        self._thread: Optional[threading.Thread] = None
+
+    def publish(self, topic: str, event: dict):
+        self.published += 1
+        self._client.publish(self.prefix + topic, json.dumps(event, default=str))
+
+    def start(self):
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.psubscribe(**{self.prefix + "*": self._on_message})
+        self._thread = self._pubsub.run_in_thread(sleep_time=1.0, daemon=True, exception_handler=self._on_error)
+
+    def _on_error(self, error, pubsub, thread):
+        logger.warning("Event listener error: %s", error)
+
+    def _on_message(self, message: dict):
+        channel = message["channel"].decode() if isinstance(message["channel"], bytes) else message["channel"]
+        data = message["data"].decode() if isinstance(message["data"], bytes) else message["data"]
+        self._deliver(channel[len(self.prefix):], data)
+
+    def stop(self):
+        if self._thread:
+            self._thread.stop()
+            self._thread = None
+        if self._pubsub:
+            self._pubsub.close()
+            self._pubsub = None
+
+
+def _create_broker() -> EventBroker:
+    if settings.EVENTS_BACKEND == "redis":
+        return RedisEventBroker(settings.EVENTS_REDIS_URL, settings.EVENTS_QUEUE_SIZE)
+    return EventBroker(settings.EVENTS_QUEUE_SIZE)
+
+
+broker = _create_broker()
+
+
+def trip_topic(trip_id: str) -> str:
+    return f"trip:{trip_id}"
+
+
+def publish_trip_event(trip_id: str, event_type: str, data=None):
+    """Tell the trip's subscribers about a committed change. Never fails the caller."""
+    try:
+        broker.publish(trip_topic(trip_id), {
+            "type": event_type,
+            "trip_id": trip_id,
+            "data": data,
+            "at": datetime.utcnow().isoformat()
+        })
+    except Exception as e:
+        logger.warning("Publishing %s for trip %s failed: %s", event_type, trip_id, e)
@@ -0,0 +1,47 @@
+from fastapi import HTTPException, Query, status
+from functools import lru_cache
+from pydantic import BaseModel, TypeAdapter
+from typing import List, Optional, Type
+
+FIELDS_QUERY = Query(None, description="Comma-separated list of fields to return, e.g. `id,name,start_date`")
+
+
+def parse_fields(fields: Optional[str], model: Type[BaseModel], always: tuple = ("id",)) -> Optional[List[str]]:
+    """
+    Validate a `fields=` query parameter against a response schema.
+    Returns None when all fields are wanted.
+    """
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = sorted(set(requested) - set(model.model_fields))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}"
+        )
+    return list(dict.fromkeys([*always, *requested]))
+
+
+def select_columns(fields: Optional[List[str]]) -> str:
+    """PostgREST column projection for the selected fields."""
+    return ",".join(fields) if fields else "*"
+
+
+@lru_cache(maxsize=None)
+def _field_adapter(model: Type[BaseModel], field: str) -> TypeAdapter:
+    return TypeAdapter(model.model_fields[field].annotation)
+
+
+def build_response(model: Type[BaseModel], row: dict, fields: Optional[List[str]]) -> BaseModel:
+    """
+    Build the response model from a row. With a field selection only those
+    fields are validated and set, so routes declared with
+    `response_model_exclude_unset=True` omit the rest.
+    """
+    if fields is None:
+        return model(**row)
+    return model.model_construct(**{
+        field: _field_adapter(model, field).validate_python(row.get(field))
+        for field in fields
+    })
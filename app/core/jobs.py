@@ -0,0 +1,111 @@
+from concurrent.futures import ThreadPoolExecutor
+from app.core.cache import get_cache
+from typing import Any, Callable, Iterator, List, Optional
+import logging
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# How long an unfinished job's state is kept, refreshed on every change
+_UNFINISHED_TTL_SECONDS = 3600
+
+
+class JobQueueFull(Exception):
+    """Raised when the manager already has `max_pending` unfinished jobs."""
+
+
+class Job:
+    QUEUED, RUNNING, COMPLETED, FAILED = "queued", "running", "completed", "failed"
+
+    def __init__(self, meta: dict):
+        self.id = str(uuid.uuid4())
+        self.status = self.QUEUED
+        self.meta = meta
+        self.events: List[Any] = []  # Items the job has yielded so far
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (self.COMPLETED, self.FAILED)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "meta": self.meta,
+            "events": list(self.events),
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Job":
+        job = cls.__new__(cls)
+        job.__dict__.update(data)
+        job.events = list(data["events"])
+        return job
+
+
+class JobManager:
+    """
+    Runs generator functions on a bounded thread pool. Every item the generator
+    yields is appended to `job.events`.
+
+    Job state is written to the cache (namespace "jobs:{name}") on every
+    change and `get` reads it from there, so with CACHE_BACKEND "shared" or
+    "redis" any worker can report on a job another worker runs. With the
+    "memory" backend only the worker that accepted the job knows it
+    (`shared` is False). Finished jobs are kept for `ttl_seconds`.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_pending: int, ttl_seconds: float):
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-job")
+        self._store = get_cache(f"jobs:{name}", ttl_seconds=ttl_seconds, max_entries=max_pending * 10)
+        self._running = set()  # ids of this worker's unfinished jobs
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self) -> bool:
+        return self._store.backend.name != "memory"
+
+    def submit(self, fn: Callable[..., Iterator[Any]], *args, meta: Optional[dict] = None) -> Job:
+        job = Job(meta or {})
+        with self._lock:
+            if len(self._running) >= self.max_pending:
+                raise JobQueueFull(f"{len(self._running)} jobs already pending")
+            self._running.add(job.id)
+        self._save(job)
+        self._executor.submit(self._run, job, fn, args)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        data = self._store.get(job_id)
+        return Job.from_dict(data) if data is not None else None
+
+    def _save(self, job: Job) -> None:
+        self._store.set(job.id, job.to_dict(), self.ttl_seconds if job.finished else _UNFINISHED_TTL_SECONDS)
+
+    def _run(self, job: Job, fn: Callable[..., Iterator[Any]], args: tuple) -> None:
+        job.status = Job.RUNNING
+        self._save(job)
+        try:
+            for event in fn(*args):
+                job.events.append(event)
+                self._save(job)
+            job.status = Job.COMPLETED
+        except Exception as e:
+            logger.error("Job %s failed: %s", job.id, e)
+            job.error = str(e)
+            job.status = Job.FAILED
+        finally:
+            job.finished_at = time.time()
+            self._save(job)
+            with self._lock:
+                self._running.discard(job.id)
@@ -0,0 +1,242 @@
+"""
+Logging pipeline that stays off the request path.
+
+Records are put on a bounded queue by a QueueHandler on the root logger and
+formatted and written by a QueueListener thread, so a request only pays for
+creating the record. Messages use %-style arguments and are formatted in the
+listener, and only if the record is kept. If the queue is full, records are
+dropped and counted rather than blocking.
+
+Each record carries the request ID, method and route of the request that
+logged it (set by RequestContextMiddleware), and its trace ID when the
+request is traced. Repeats of the same warning or
+error, keyed by logger and message template, are limited to
+LOG_REPEAT_LIMIT per LOG_REPEAT_WINDOW_SECONDS. The next record let through
+says how many were suppressed.
+"""
+from app.core.config import settings
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+import uuid
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+# Set by TracingMiddleware for sampled requests
+trace_id_var: ContextVar[Optional[str]] = ContextVar("trace_id", default=None)
+# The ASGI scope of the current request; the router adds the matched route to it
+_scope_var: ContextVar[Optional[dict]] = ContextVar("scope", default=None)
+
+# Attributes every LogRecord has; anything else was passed with `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+_CONTEXT_ATTRS = ("request_id", "trace_id", "method", "route", "suppressed")
+
+
+class ContextFilter(logging.Filter):
+    """Copy the request context onto the record while still in the request's thread."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        record.trace_id = trace_id_var.get()
+        scope = _scope_var.get()
+        if scope is not None:
+            record.method = scope.get("method", "WS")
+            record.route = route_path(scope)
+        return True
+
+
+def route_path(scope: dict) -> Optional[str]:
+    """The route template ("/trips/{trip_id}") once routed, else the raw path."""
+    return getattr(scope.get("route"), "path", None) or scope.get("path")
+
+
+class RepeatFilter(logging.Filter):
+    """Let through at most `limit` records per template in each window, for WARNING and above."""
+
+    def __init__(self, limit: int, window_seconds: float):
+        super().__init__()
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self._seen: Dict[Tuple[str, int, str], list] = {}  # key -> [window start, count, suppressed]
+        self._lock = threading.Lock()
+        self.suppressed = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING or self.limit <= 0:
+            return True
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._seen.get(key)
+            if entry is None or now - entry[0] >= self.window_seconds:
+                if len(self._seen) > 10000:
+                    self._seen.clear()
+                if entry and entry[2]:
+                    record.suppressed = entry[2]
+                self._seen[key] = [now, 1, 0]
+                return True
+            entry[1] += 1
+            if entry[1] <= self.limit:
+                return True
+            entry[2] += 1
+            self.suppressed += 1
+            return False
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue without formatting and without waiting; count what does not fit."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting happens in the listener; the base class would do it here
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for attr in _CONTEXT_ATTRS:
+            value = getattr(record, attr, None)
+            if value is not None:
+                entry[attr] = value
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and key not in _CONTEXT_ATTRS and key not in entry:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """The previous human-readable format, with the request ID when there is one."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        if getattr(record, "request_id", None):
+            line = f"{line} [request_id={record.request_id}]"
+        if getattr(record, "suppressed", None):
+            line = f"{line} ({record.suppressed} similar suppressed)"
+        return line
+
+
+_handler: Optional[NonBlockingQueueHandler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+_repeat_filter: Optional[RepeatFilter] = None
+
+
+def _start_listener() -> None:
+    global _listener
+    output = logging.StreamHandler()
+    output.setFormatter(JsonFormatter() if settings.LOG_FORMAT == "json" else TextFormatter())
+    # A fresh queue: after fork, records the parent had queued are its to write
+    _handler.queue = queue.Queue(settings.LOG_QUEUE_SIZE)
+    _listener = logging.handlers.QueueListener(_handler.queue, output, respect_handler_level=False)
+    _listener.start()
+
+
+def _restart_after_fork() -> None:
+    # The listener thread does not survive fork (gunicorn preloads the app),
+    # and a lock held by another parent thread at fork time would never be released
+    if _handler is not None:
+        _repeat_filter._lock = threading.Lock()
+        _start_listener()
+
+
+def setup_logging() -> None:
+    """Route all logging through the queue. Safe to call more than once."""
+    global _handler, _repeat_filter
+    if _handler is not None:
+        return
+
+    _repeat_filter = RepeatFilter(settings.LOG_REPEAT_LIMIT, settings.LOG_REPEAT_WINDOW_SECONDS)
+    _handler = NonBlockingQueueHandler(queue.Queue(settings.LOG_QUEUE_SIZE))
+    _handler.addFilter(ContextFilter())
+    _handler.addFilter(_repeat_filter)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(_handler)
+    root.setLevel(settings.LOG_LEVEL)
+
+    _start_listener()
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def stop_logging() -> None:
+    """Flush what is queued; call on shutdown."""
+    if _listener is not None:
+        _listener.stop()
+
+
+def logging_stats() -> dict:
+    return {
+        "queued": _handler.queue.qsize() if _handler else 0,
+        "dropped": _handler.dropped if _handler else 0,
+        "suppressed": _repeat_filter.suppressed if _repeat_filter else 0,
+    }
+
+
+class RequestContextMiddleware:
+    """
+    Give each request an ID (the incoming X-Request-ID or a new one), expose
+    it to log records, echo it in the response, and log one line per request
+    with its route, status and latency.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.logger = logging.getLogger("app.requests")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope.get("headers") or [])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1")[:64] or uuid.uuid4().hex
+        tokens = (request_id_var.set(request_id), _scope_var.set(scope))
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = [*message["headers"], (b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            if scope["type"] == "http":
+                self.logger.info(
+                    "%s %s %s", scope.get("method"), route_path(scope), status_code,
+                    extra={"status": status_code, "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+                )
+            request_id_var.reset(tokens[0])
+            _scope_var.reset(tokens[1])
@@ -0,0 +1,241 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextvars import copy_context
+from app.core.cache import get_cache
+from app.core.config import settings
+from app.core.tracing import KIND_CLIENT, span
+from typing import Any, Optional
+from urllib.parse import urlsplit
+import json
+import logging
+import random
+import threading
+import time
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Shared pool for hedged requests; threads are created lazily
+_hedge_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="upstream-hedge")
+
+
+class UpstreamUnavailable(Exception):
+    """Raised when an upstream failed and no cached response can be served."""
+
+
+class UpstreamError(Exception):
+    """Raised when an upstream rejects the request (4xx) or its response is not valid JSON."""
+
+
+class _RetryableError(Exception):
+    pass
+
+
+class LatencyTracker:
+    """Rolling window of successful request latencies (seconds)."""
+
+    def __init__(self, size: int = 200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < settings.UPSTREAM_MIN_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(int(len(ordered) * pct), len(ordered) - 1)]
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failure_threshold` consecutive failures.
+    Open -> half-open after `reset_timeout`, letting a single trial call through.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning("Circuit opened after %s failures", self._failures)
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+
+class Upstream:
+    """
+    Resilient JSON GET client for one third-party API.
+
+    - timeouts adapt to the observed p99 latency, clamped to [min, max]
+    - connection errors, timeouts and 5xx are retried with full-jitter backoff
+    - optionally a hedged second request is sent when the first is slower than p95
+    - a circuit breaker fails fast while the upstream is unhealthy, serving the
+      last good response for the same request when there is one
+
+    Responses younger than `fresh_ttl_seconds` are served from the cache
+    without calling the upstream at all.
+    """
+
+    def __init__(self, name: str, hedge: bool = False, fresh_ttl_seconds: float = 0):
+        self.name = name
+        self.hedge = hedge
+        self.fresh_ttl_seconds = fresh_ttl_seconds
+        self.latency = LatencyTracker()
+        self.breaker = CircuitBreaker(
+            settings.UPSTREAM_FAILURE_THRESHOLD,
+            settings.UPSTREAM_RESET_TIMEOUT_SECONDS
+        )
+        self._session = requests.Session()
+        self._cache = get_cache(
+            f"upstream:{name}",
+            ttl_seconds=settings.UPSTREAM_STALE_TTL_SECONDS,
+            max_entries=settings.UPSTREAM_CACHE_SIZE
+        )
+
+    def timeout(self) -> float:
+        p99 = self.latency.percentile(0.99)
+        if p99 is None:
+            return settings.UPSTREAM_MAX_TIMEOUT_SECONDS
+        return min(
+            max(p99 * settings.UPSTREAM_TIMEOUT_MULTIPLIER, settings.UPSTREAM_MIN_TIMEOUT_SECONDS),
+            settings.UPSTREAM_MAX_TIMEOUT_SECONDS
+        )
+
+    def get_json(self, url: str, params: Optional[dict] = None, headers: Optional[dict] = None,
+                 max_age: Optional[float] = None, cache_key: Optional[str] = None) -> Any:
+        """
+        `max_age` overrides how old a cached response may be and still be served
+        without a call. `cache_key` replaces the key derived from url and params,
+        for requests that differ only in ways that do not change the response.
+        """
+        key = cache_key or self._key(url, params)
+        cached = self._cache.get(key)
+        if max_age is None:
+            max_age = self.fresh_ttl_seconds
+        if cached and time.time() - cached["fetched_at"] < max_age:
+            return cached["data"]
+
+        for attempt in range(settings.UPSTREAM_MAX_RETRIES + 1):
+            if not self.breaker.allow():
+                return self._fallback(cached, "circuit open")
+            try:
+                data = self._send(url, params, headers)
+            except _RetryableError as e:
+                self.breaker.record_failure()
+                logger.warning("%s request failed (attempt %s): %s", self.name, attempt + 1, e)
+                if attempt < settings.UPSTREAM_MAX_RETRIES:
+                    backoff = settings.UPSTREAM_BACKOFF_SECONDS * (2 ** attempt)
+                    time.sleep(random.uniform(0, backoff))
+                continue
+            except Exception:
+                # 4xx and malformed responses are not the upstream being unhealthy
+                self.breaker.record_success()
+                raise
+            self.breaker.record_success()
+            self._cache.set(key, {"data": data, "fetched_at": time.time()})
+            return data
+
+        return self._fallback(cached, "retries exhausted")
+
+    def warm(self, url: str, params: Optional[dict] = None, headers: Optional[dict] = None,
+             refresh_within: float = 0, cache_key: Optional[str] = None) -> bool:
+        """
+        Fetch ahead of demand unless the cached response stays fresh for
+        another `refresh_within` seconds. Returns whether the upstream was called.
+        """
+        cached = self._cache.get(cache_key or self._key(url, params))
+        if cached and time.time() - cached["fetched_at"] < self.fresh_ttl_seconds - refresh_within:
+            return False
+        self.get_json(url, params, headers, max_age=0, cache_key=cache_key)
+        return True
+
+    @staticmethod
+    def _key(url: str, params: Optional[dict]) -> str:
+        return json.dumps([url, params or {}], sort_keys=True)
+
+    def _send(self, url, params, headers) -> Any:
+        timeout = self.timeout()
+        hedge_after = self.latency.percentile(0.95) if self.hedge else None
+        if hedge_after is None or hedge_after >= timeout:
+            return self._request(url, params, headers, timeout)
+
+        # Run in a copy of this context so the attempts are traced under the caller's span
+        first = _hedge_executor.submit(copy_context().run, self._request, url, params, headers, timeout)
+        done, _ = wait([first], timeout=hedge_after)
+        if done:
+            return first.result()
+        second = _hedge_executor.submit(copy_context().run, self._request, url, params, headers, timeout)
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    return future.result()
+                except Exception as e:
+                    error = e
+        raise error
+
+    def _request(self, url, params, headers, timeout) -> Any:
+        # The query string is left out of the span: it carries API keys
+        parts = urlsplit(url)
+        with span(f"GET {parts.hostname}", KIND_CLIENT, **{
+            "upstream": self.name, "http.request.method": "GET",
+            "server.address": parts.hostname, "url.path": parts.path
+        }) as attempt:
+            started = time.monotonic()
+            try:
+                response = self._session.get(url, params=params, headers=headers, timeout=timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                raise _RetryableError(str(e))
+            if attempt is not None:
+                attempt.set("http.response.status_code", response.status_code)
+            if response.status_code >= 500 or response.status_code == 429:
+                raise _RetryableError(f"HTTP {response.status_code}")
+            if response.status_code >= 400:
+                raise UpstreamError(f"{self.name} rejected the request (HTTP {response.status_code})")
+            self.latency.record(time.monotonic() - started)
+            try:
+                return response.json()
+            except ValueError:
+                raise UpstreamError(f"{self.name} returned a response that is not JSON")
+
+    def _fallback(self, cached: Optional[dict], reason: str) -> Any:
+        if cached:
+            logger.warning("%s unavailable (%s), serving cached response", self.name, reason)
+            return cached["data"]
+        raise UpstreamUnavailable(f"{self.name} is unavailable ({reason})")
@@ -0,0 +1,90 @@
+from typing import Callable, Dict, List, Optional
+import asyncio
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """
+    Calls a blocking function every `interval_seconds` on a worker thread.
+    The first run is delayed by a random fraction of the interval so that
+    several workers started together do not all fire at once.
+    """
+
+    def __init__(self, name: str, interval_seconds: float, fn: Callable[[], None]):
+        self.name = name
+        self.interval_seconds = interval_seconds
+        self.fn = fn
+        self.runs = 0
+        self.failures = 0
+        self.last_run_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def _loop(self):
+        await asyncio.sleep(random.uniform(0, self.interval_seconds))
+        while True:
+            try:
+                await asyncio.to_thread(self.fn)
+                self.last_error = None
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                logger.error("Periodic task %s failed: %s", self.name, e)
+            self.runs += 1
+            self.last_run_at = time.time()
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(), name=f"periodic:{self.name}")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "interval_seconds": self.interval_seconds,
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_run_at": self.last_run_at,
+            "last_error": self.last_error,
+        }
+
+
+class Scheduler:
+    """Periodic tasks of this worker, started and stopped with the app lifespan."""
+
+    def __init__(self):
+        self._tasks: Dict[str, PeriodicTask] = {}
+
+    def add(self, name: str, interval_seconds: float, fn: Callable[[], None]) -> None:
+        """Register `fn`; an interval of 0 or less disables the task."""
+        if interval_seconds > 0:
+            self._tasks[name] = PeriodicTask(name, interval_seconds, fn)
+
+    def start(self) -> None:
+        for task in self._tasks.values():
+            task.start()
+
+    async def stop(self) -> None:
+        for task in self._tasks.values():
+            await task.stop()
+
+    def names(self) -> List[str]:
+        return list(self._tasks)
+
+    def stats(self) -> dict:
+        return {name: task.stats() for name, task in self._tasks.items()}
+
+
+scheduler = Scheduler()
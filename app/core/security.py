@@ -1,5 +1,6 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from app.core.config import settings
 from app.core.database import get_supabase
 from supabase import Client
 from typing import Optional
@@ -34,7 +35,7 @@ async def get_current_user(
         return user_response.user
         
     except Exception as e:
-        logger.error(f"Authentication error: {str(e)}")
+        logger.error("Authentication error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials",
@@ -59,3 +60,19 @@ async def get_current_user_optional(
         return user_response.user if user_response else None
     except:
         return None
+
+
+async def require_admin(current_user = Depends(get_current_user)):
+    """
+    Allow only admins: users whose Supabase app_metadata has role "admin"
+    (set with the service key, not editable by the user) or whose email is
+    listed in ADMIN_EMAILS.
+    """
+    app_metadata = getattr(current_user, "app_metadata", None) or {}
+    email = (getattr(current_user, "email", None) or "").lower()
+    if app_metadata.get("role") != "admin" and email not in {e.lower() for e in settings.ADMIN_EMAILS}:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return current_user
@@ -0,0 +1,374 @@
+"""
+Request tracing, exported as OpenTelemetry (OTLP/JSON) spans.
+
+TracingMiddleware opens a root span for a sampled request and keeps it in a
+context variable; every Supabase table operation (through
+TracingTransport, installed on the Supabase clients) and every upstream API
+attempt (app.core.resilience) inside the request becomes a child span. A
+handler that makes one query per stop shows up as one span per query.
+
+A request is sampled when the caller's W3C `traceparent` says so, otherwise
+with probability TRACE_SAMPLE_RATE. Unsampled requests create no spans and
+pay only for one context variable lookup per call.
+
+Finished spans are queued and sent in batches by a background thread, either
+to an OTLP/HTTP collector (TRACE_EXPORTER="otlp", e.g. the OpenTelemetry
+Collector or Jaeger on :4318) or appended to a file, one OTLP JSON request per
+line (TRACE_EXPORTER="file", readable by the collector's otlpjsonfile
+receiver). When the queue is full, spans are dropped and counted.
+"""
+from app.core.config import settings
+from app.core.logs import request_id_var, route_path, trace_id_var
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+import httpx
+import json
+import logging
+import queue
+import random
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# OTLP span kinds
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+
+_STATUS_ERROR = 2
+_BATCH_SIZE = 512
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class Span:
+    __slots__ = ("name", "kind", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], kind: int = KIND_INTERNAL,
+                 attributes: Optional[dict] = None):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+
+    def set(self, key: str, value) -> None:
+        if value is not None:
+            self.attributes[key] = value
+
+    def fail(self, message: str) -> None:
+        self.error = message
+
+    def finish(self) -> None:
+        self.end_ns = time.time_ns()
+        exporter.submit(self)
+
+    def to_otlp(self) -> dict:
+        entry = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otlp_attributes(self.attributes)
+        }
+        if self.parent_id:
+            entry["parentSpanId"] = self.parent_id
+        if self.error is not None:
+            entry["status"] = {"code": _STATUS_ERROR, "message": self.error}
+        return entry
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    """The innermost open span, or None when the request is not being traced."""
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, kind: int = KIND_INTERNAL, **attributes):
+    """
+    Child span of the current one; yields None (and records nothing) when
+    the current request is not traced.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(name, parent.trace_id, parent.span_id, kind, attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.fail(f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        _current_span.reset(token)
+        child.finish()
+
+
+def _otlp_attributes(attributes: dict) -> List[dict]:
+    result = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        else:
+            typed = {"stringValue": str(value)}
+        result.append({"key": key, "value": typed})
+    return result
+
+
+# =====================================================
+# EXPORT
+# =====================================================
+
+class SpanExporter:
+    """Bounded queue of finished spans, drained in batches by a background thread."""
+
+    def __init__(self, max_queue: int, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self._queue: queue.Queue = queue.Queue(max_queue)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.exported = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def submit(self, finished: Span) -> None:
+        try:
+            self._queue.put_nowait(finished)
+        except queue.Full:
+            self.dropped += 1
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Export what is queued; call on shutdown."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=10)
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            self._drain()
+        self._drain()
+
+    def _drain(self) -> None:
+        while True:
+            batch = []
+            try:
+                while len(batch) < _BATCH_SIZE:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            if not batch:
+                return
+            try:
+                self.write(_otlp_request(batch))
+                self.exported += len(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                logger.warning("Exporting %s spans failed: %s", len(batch), e)
+            if len(batch) < _BATCH_SIZE:
+                return
+
+    def write(self, payload: dict) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "exported": self.exported,
+            "dropped": self.dropped,
+            "failed": self.failed
+        }
+
+
+class OtlpHttpExporter(SpanExporter):
+    """POSTs OTLP/JSON to a collector's /v1/traces endpoint."""
+
+    def __init__(self, endpoint: str, max_queue: int, interval_seconds: float):
+        super().__init__(max_queue, interval_seconds)
+        self.endpoint = endpoint
+        # Plain client: the exporter's own requests are never traced
+        self._client = httpx.Client(timeout=10)
+
+    def write(self, payload: dict) -> None:
+        response = self._client.post(self.endpoint, json=payload)
+        response.raise_for_status()
+
+
+class FileExporter(SpanExporter):
+    """Appends one OTLP/JSON export request per line."""
+
+    def __init__(self, path: str, max_queue: int, interval_seconds: float):
+        super().__init__(max_queue, interval_seconds)
+        self.path = path
+
+    def write(self, payload: dict) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(payload, separators=(",", ":")) + "\n")
+
+
+def _otlp_request(batch: List[Span]) -> dict:
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": _otlp_attributes({"service.name": settings.TRACE_SERVICE_NAME})},
+            "scopeSpans": [{
+                "scope": {"name": __name__},
+                "spans": [s.to_otlp() for s in batch]
+            }]
+        }]
+    }
+
+
+def _create_exporter() -> SpanExporter:
+    if settings.TRACE_EXPORTER == "file":
+        return FileExporter(settings.TRACE_FILE_PATH, settings.TRACE_QUEUE_SIZE, settings.TRACE_EXPORT_INTERVAL_SECONDS)
+    return OtlpHttpExporter(settings.TRACE_OTLP_ENDPOINT, settings.TRACE_QUEUE_SIZE, settings.TRACE_EXPORT_INTERVAL_SECONDS)
+
+
+exporter = _create_exporter()
+
+
+def tracing_stats() -> dict:
+    return {"sample_rate": settings.TRACE_SAMPLE_RATE, "exporter": settings.TRACE_EXPORTER, **exporter.stats()}
+
+
+# =====================================================
+# INSTRUMENTATION
+# =====================================================
+
+def _sampled_root(headers: Dict[bytes, bytes], name: str) -> Optional[Span]:
+    """Continue the caller's trace if it sent one, else start a new one if sampled."""
+    match = _TRACEPARENT.match(headers.get(b"traceparent", b"").decode("latin-1").strip())
+    if match:
+        trace_id, parent_id, flags = match.groups()
+        if not int(flags, 16) & 1:
+            return None
+        return Span(name, trace_id, parent_id, KIND_SERVER)
+    if settings.TRACE_SAMPLE_RATE <= 0 or random.random() >= settings.TRACE_SAMPLE_RATE:
+        return None
+    return Span(name, f"{random.getrandbits(128):032x}", None, KIND_SERVER)
+
+
+class TracingMiddleware:
+    """Root span per sampled HTTP request, named after its route once routed."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        # WebSockets live for minutes; their spans would say nothing useful
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        root = _sampled_root(dict(scope.get("headers") or []), scope.get("method", "HTTP"))
+        if root is None:
+            return await self.app(scope, receive, send)
+
+        root.set("http.request.method", scope.get("method"))
+        root.set("url.path", scope.get("path"))
+        root.set("request_id", request_id_var.get())
+        tokens = (_current_span.set(root), trace_id_var.set(root.trace_id))
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                root.set("http.response.status_code", message["status"])
+                if message["status"] >= 500:
+                    root.fail(f"HTTP {message['status']}")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        except BaseException as e:
+            root.fail(f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            _current_span.reset(tokens[0])
+            trace_id_var.reset(tokens[1])
+            route = route_path(scope)
+            root.name = f"{scope.get('method')} {route}"
+            root.set("http.route", route)
+            root.finish()
+
+
+_DB_OPERATIONS = {"GET": "select", "HEAD": "select", "POST": "insert", "PATCH": "update", "DELETE": "delete"}
+
+
+class TracingTransport(httpx.BaseTransport):
+    """
+    httpx transport for the Supabase clients: one client span per PostgREST
+    table operation or RPC, and per auth API call.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport):
+        self._transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if _current_span.get() is None:
+            return self._transport.handle_request(request)
+
+        name, attributes = _describe_supabase_request(request)
+        with span(name, KIND_CLIENT, **attributes) as client_span:
+            response = self._transport.handle_request(request)
+            client_span.set("http.response.status_code", response.status_code)
+            if response.status_code >= 400:
+                client_span.fail(f"HTTP {response.status_code}")
+            return response
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+def _describe_supabase_request(request: httpx.Request):
+    path = request.url.path
+    attributes = {"server.address": request.url.host, "http.request.method": request.method}
+    if "/rest/v1/" in path:
+        target = path.split("/rest/v1/", 1)[1]
+        attributes["db.system"] = "postgresql"
+        if target.startswith("rpc/"):
+            function = target[len("rpc/"):]
+            attributes["db.operation"] = "rpc"
+            attributes["db.stored_procedure.name"] = function
+            return f"rpc {function}", attributes
+        operation = _DB_OPERATIONS.get(request.method, request.method.lower())
+        if operation == "insert" and "resolution=" in request.headers.get("prefer", ""):
+            operation = "upsert"
+        attributes["db.operation"] = operation
+        attributes["db.sql.table"] = target
+        return f"{operation} {target}", attributes
+    attributes["url.path"] = path
+    return f"{request.method} {path}", attributes
+
+
+def traced_http_client() -> httpx.Client:
+    """
+    The httpx client the Supabase clients are given. Same settings as the
+    PostgREST default (HTTP/2, redirects, 120 s timeout), plus tracing.
+    """
+    return httpx.Client(
+        transport=TracingTransport(httpx.HTTPTransport(http2=True)),
+        timeout=120,
+        follow_redirects=True
+    )
@@ -1,24 +1,50 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer
+from app.core.admission import admission_stats
+from app.core.cache import cache_stats
 from app.core.config import settings
-from app.routes import auth, trips, profile, budget, search, itinerary
+from app.core.events import broker
+from app.core.logs import RequestContextMiddleware, logging_stats, setup_logging, stop_logging
+from app.core.scheduler import scheduler
+from app.core.tracing import TracingMiddleware, exporter as span_exporter, tracing_stats
+from app.routes import admin, auth, trips, profile, budget, search, itinerary, sync
+from app.services import cache_warmer, change_log, clustering, leaderboard, platform_metrics
 import logging
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+setup_logging()
 
 logger = logging.getLogger(__name__)
 
+# Background tasks (each worker runs its own; the SQL side serializes them)
+scheduler.add("platform_metrics", settings.METRICS_REFRESH_INTERVAL_SECONDS, platform_metrics.refresh)
+scheduler.add("leaderboard", settings.LEADERBOARD_REFRESH_SECONDS, leaderboard.refresh)
+scheduler.add("catalog_clusters", settings.CLUSTER_REFRESH_SECONDS, clustering.catalog_clusters.sync)
+scheduler.add("change_log_prune", settings.SYNC_PRUNE_INTERVAL_SECONDS, change_log.prune)
+scheduler.add("cache_warmer", settings.CACHE_WARM_INTERVAL_SECONDS, cache_warmer.warm)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    scheduler.start()
+    broker.start()
+    span_exporter.start()
+    yield
+    broker.stop()
+    await scheduler.stop()
+    span_exporter.stop()
+    stop_logging()
+
+
 # Create FastAPI app with security scheme
 app = FastAPI(
     title=settings.APP_NAME,
     debug=settings.DEBUG,
     version="1.0.0",
-    description="GlobeTrotter API - Plan and share your trips"
+    description="GlobeTrotter API - Plan and share your trips",
+    lifespan=lifespan
 )
 
 # Add security scheme for Swagger UI
@@ -31,8 +57,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID"],
 )
 
+# Root span for sampled requests (inside the request ID middleware, so spans carry it)
+app.add_middleware(TracingMiddleware)
+
+# Request IDs for logs and responses (outermost, so it also times CORS)
+app.add_middleware(RequestContextMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix=f"{settings.API_V1_PREFIX}")
 app.include_router(trips.router, prefix=f"{settings.API_V1_PREFIX}")
@@ -40,6 +73,10 @@ app.include_router(profile.router, prefix=f"{settings.API_V1_PREFIX}")
 app.include_router(budget.router, prefix=f"{settings.API_V1_PREFIX}")
 app.include_router(search.router, prefix=f"{settings.API_V1_PREFIX}")
 app.include_router(itinerary.router, prefix=f"{settings.API_V1_PREFIX}")
+app.include_router(itinerary.auto_plan_router, prefix=f"{settings.API_V1_PREFIX}")
+app.include_router(itinerary.schedule_router, prefix=f"{settings.API_V1_PREFIX}")
+app.include_router(sync.router, prefix=f"{settings.API_V1_PREFIX}")
+app.include_router(admin.router, prefix=f"{settings.API_V1_PREFIX}")
 
 
 @app.get("/")
@@ -58,11 +95,28 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """In-process metrics for this worker"""
+    return {
+        "admission": admission_stats(),
+        "caches": cache_stats(),
+        "scheduled_tasks": scheduler.stats(),
+        "events": broker.stats(),
+        "logging": logging_stats(),
+        "tracing": tracing_stats()
+    }
+
+
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(
-        "app.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=settings.DEBUG
-    )
+    if settings.DEBUG:
+        import uvicorn
+        uvicorn.run(
+            "app.main:app",
+            host=settings.SERVER_HOST,
+            port=settings.SERVER_PORT,
+            reload=True
+        )
+    else:
+        from app.server import run
+        run()
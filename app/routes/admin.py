@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from app.core.security import require_admin
+from app.services import platform_metrics
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+@router.get("/metrics")
+async def get_platform_metrics(
+    days: int = Query(30, ge=1, le=365),
+    admin = Depends(require_admin)
+):
+    """
+    Daily platform metrics, newest first. Rows are precomputed by the
+    scheduled refresh, this only reads `days` rows.
+    """
+    try:
+        rows = platform_metrics.get_recent(days)
+        return {"metrics": rows, "latest": rows[0] if rows else None}
+    except Exception as e:
+        logger.error("Get platform metrics error: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.post("/metrics/refresh")
+async def refresh_platform_metrics(admin = Depends(require_admin)):
+    """
+    Fold pending changes into today's metrics now instead of waiting for the
+    next scheduled refresh.
+    """
+    try:
+        row = platform_metrics.refresh()
+        return {"latest": row}
+    except Exception as e:
+        logger.error("Refresh platform metrics error: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from app.core.database import get_supabase, get_supabase_admin
 from app.schemas.user import UserCreate, UserResponse, TokenResponse, UserUpdate
+from app.services import profiles
 from supabase import Client
 import logging
 import time
@@ -39,19 +40,18 @@ async def signup(
             "full_name": user_data.full_name,
         }
         
-        # Use upsert to create or update the profile
+        # Use upsert to create or update the profile; it returns the stored row
         profile_result = supabase_admin.table("users").upsert(user_profile_data).execute()
-        
-        # Fetch the created/updated profile
-        user_profile = supabase_admin.table("users").select("*").eq("id", auth_response.user.id).single().execute()
+        user_profile = profile_result.data[0]
+        profiles.store_profile(user_profile)
         
         return TokenResponse(
             access_token=auth_response.session.access_token,
-            user=UserResponse(**user_profile.data)
+            user=UserResponse(**user_profile)
         )
         
     except Exception as e:
-        logger.error(f"Signup error: {str(e)}")
+        logger.error("Signup error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
@@ -80,15 +80,15 @@ async def login(
             )
         
         # Fetch user profile
-        user_profile = supabase.table("users").select("*").eq("id", auth_response.user.id).single().execute()
+        user_profile = profiles.get_profile(supabase, auth_response.user.id)
         
         return TokenResponse(
             access_token=auth_response.session.access_token,
-            user=UserResponse(**user_profile.data)
+            user=UserResponse(**user_profile)
         )
         
     except Exception as e:
-        logger.error(f"Login error: {str(e)}")
+        logger.error("Login error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
@@ -104,7 +104,7 @@ async def logout(supabase: Client = Depends(get_supabase)):
         supabase.auth.sign_out()
         return {"message": "Successfully logged out"}
     except Exception as e:
-        logger.error(f"Logout error: {str(e)}")
+        logger.error("Logout error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Logout failed"
@@ -128,15 +128,15 @@ async def refresh_token(
                 detail="Invalid refresh token"
             )
         
-        user_profile = supabase.table("users").select("*").eq("id", auth_response.user.id).single().execute()
+        user_profile = profiles.get_profile(supabase, auth_response.user.id)
         
         return TokenResponse(
             access_token=auth_response.session.access_token,
-            user=UserResponse(**user_profile.data)
+            user=UserResponse(**user_profile)
         )
         
     except Exception as e:
-        logger.error(f"Token refresh error: {str(e)}")
+        logger.error("Token refresh error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid refresh token"
@@ -1,8 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from app.core.database import get_supabase, get_supabase_admin
+from app.core.fields import FIELDS_QUERY, build_response, parse_fields
 from app.core.security import get_current_user
 from app.schemas.user import UserResponse, UserUpdate
+from app.services import profiles
 from supabase import Client
+from typing import Optional
 import logging
 from datetime import datetime
 
@@ -11,33 +14,32 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/profile", tags=["User Profile"])
 
 
-@router.get("/me", response_model=UserResponse)
+@router.get("/me", response_model=UserResponse, response_model_exclude_unset=True)
 async def get_my_profile(
     current_user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_supabase)
+    supabase: Client = Depends(get_supabase),
+    fields: Optional[str] = FIELDS_QUERY
 ):
     """
     Get current user's profile.
     """
+    selected = parse_fields(fields, UserResponse)
     try:
-        result = supabase.table("users")\
-            .select("*")\
-            .eq("id", current_user.id)\
-            .single()\
-            .execute()
+        # The full row is cached; a field selection is applied to it
+        profile = profiles.get_profile(supabase, current_user.id)
         
-        if not result.data:
+        if not profile:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User profile not found"
             )
         
-        return UserResponse(**result.data)
+        return build_response(UserResponse, profile, selected)
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Get profile error: {str(e)}")
+        logger.error("Get profile error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
@@ -68,12 +70,13 @@ async def update_my_profile(
                 detail="User profile not found"
             )
         
+        profiles.store_profile(result.data[0])
         return UserResponse(**result.data[0])
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Update profile error: {str(e)}")
+        logger.error("Update profile error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
@@ -92,6 +95,7 @@ async def delete_my_account(
     try:
         # Delete user from auth (requires admin client)
         supabase_admin.auth.admin.delete_user(current_user.id)
+        profiles.invalidate_profile(current_user.id)
         
         # The database triggers will handle cascading deletes
         # of user profile and all related data
@@ -99,7 +103,7 @@ async def delete_my_account(
         return None
         
     except Exception as e:
-        logger.error(f"Delete account error: {str(e)}")
+        logger.error("Delete account error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Failed to delete account"
@@ -1,37 +1,37 @@
-from fastapi import APIRouter, Query
-import requests
-from app.core.config import settings
+from fastapi import APIRouter, Depends, HTTPException, Query
+from app.core.admission import SEARCH, admit
+from app.core.resilience import UpstreamError, UpstreamUnavailable
+from app.core.database import supabase
+from app.services import cache_warmer, clustering, countries, foursquare, geonames, leaderboard
 
 router = APIRouter(prefix="/search", tags=["Search"])
 
 
-@router.get("/cities")
+@router.get("/cities", dependencies=[Depends(admit(SEARCH), scope="function")])
 def search_cities(q: str, region: str | None = None):
     """Search for cities using GeoNames API with optional region filtering"""
-    response = requests.get(
-        "http://api.geonames.org/searchJSON",
-        params={
-            "q": q,
-            "maxRows": 10,
-            "username": "aadarshsenapati"
-        },
-        timeout=10
-    )
-
-    geo_data = response.json()
+    cache_warmer.recent_city_searches.record(q)
+    try:
+        cities = geonames.search(q, max_rows=10)
+
+        # Look each country up once, even when several cities share it
+        country_info = {}
+        for code in {city.get("countryCode") for city in cities}:
+            if code:
+                country_info[code] = countries.get_country(code)
+    except UpstreamUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except UpstreamError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
     results = []
 
-    for city in geo_data.get("geonames", []):
+    for city in cities:
         country_code = city.get("countryCode")
         if not country_code:
             continue
 
-        country_resp = requests.get(
-            f"https://restcountries.com/v3.1/alpha/{country_code}",
-            timeout=10
-        ).json()
-
-        country = country_resp[0]
+        country = country_info[country_code]
         city_region = country.get("region")
 
         if region and city_region and city_region.lower() != region.lower():
@@ -48,32 +48,73 @@ def search_cities(q: str, region: str | None = None):
 
     return results
 
-@router.get("/activities")
+@router.get("/popular")
+def popular(region: str | None = None, limit: int = Query(10, ge=1, le=50)):
+    """Most planned destinations and catalog activities, overall or for one region"""
+    try:
+        leaderboard.ensure_loaded()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Leaderboard unavailable: {str(e)}")
+
+    board = leaderboard.leaderboard
+    return {
+        "region": region,
+        "destinations": board.top(leaderboard.DESTINATION, region, limit),
+        "activities": board.top(leaderboard.ACTIVITY, region, limit),
+        "updated_at": board.loaded_at
+    }
+
+@router.get("/clusters")
+def clusters(
+    bbox: str = Query(..., description="west,south,east,north in degrees"),
+    zoom: int = Query(..., ge=0, le=24),
+    share_token: str | None = None
+):
+    """
+    Clustered map markers inside a bounding box. Returns catalog activities,
+    or the stops and activities of a public trip when share_token is given.
+    """
+    try:
+        west, south, east, north = (float(part) for part in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=422, detail="bbox must be west,south,east,north")
+    if not (-180 <= west <= 180 and -180 <= east <= 180 and -90 <= south <= north <= 90):
+        raise HTTPException(status_code=422, detail="bbox is out of range")
+
+    try:
+        if share_token:
+            trip = supabase.table("trips").select("id") \
+                .eq("share_token", share_token).eq("is_public", True).limit(1).execute()
+            if not trip.data:
+                raise HTTPException(status_code=404, detail="Shared trip not found")
+            index = clustering.public_trip_index(trip.data[0]["id"])
+        else:
+            index = clustering.catalog_clusters.get()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Clusters unavailable: {str(e)}")
+
+    features = index.query(west, south, east, north, zoom)
+    return {"zoom": zoom, "total": len(index), "features": features}
+
+@router.get("/activities", dependencies=[Depends(admit(SEARCH), scope="function")])
 def search_activities(
     city: str,
     category: str | None = None,
     max_cost: int | None = None
 ):
-    headers = {
-        "Authorization": f"Bearer YYJC2TYHXJTVSF5SPC3HOUGJMTLRHHDSEPHIGDTLVCFJREZZ",
-        "X-Places-Api-Version": "2025-06-17"
-    }
-
-    params = {
-        "near": city,
-        "categories": "16000",
-        "limit": 15
-    }
-
-    res = requests.get(
-        f"https://places-api.foursquare.com/places/search",
-        headers=headers,
-        params=params
-    ).json()
+    cache_warmer.recent_attraction_cities.record(city)
+    try:
+        places = foursquare.get_activities(city, limit=15)
+    except UpstreamUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except UpstreamError as e:
+        raise HTTPException(status_code=502, detail=str(e))
 
     activities = []
 
-    for place in res.get("results", []):
+    for place in places:
         cat = place["categories"][0]["name"]
         est_cost = estimate_cost(cat)
 
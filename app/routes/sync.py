@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from app.core.config import settings
+from app.core.security import get_current_user
+from app.services import change_log
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/sync", tags=["Sync"])
+
+
+@router.get("/changes")
+async def get_changes(
+    since: int = Query(0, ge=0, description="Cursor from the previous response; 0 for a full sync"),
+    limit: int = Query(settings.SYNC_PAGE_SIZE, ge=1, le=1000),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Trips, stops, activities, accommodations, transportation and meals created,
+    updated or deleted since the cursor. Upserts carry the current row in
+    `data`; deletes are tombstones with `op: "D"`. When `has_more` is true,
+    call again with the returned cursor.
+    """
+    try:
+        if since and since < change_log.pruned_through():
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail="Cursor has expired, sync again from scratch (since=0)"
+            )
+
+        changes = change_log.get_changes(current_user.id, since, limit)
+        return {
+            "changes": changes,
+            "cursor": changes[-1]["seq"] if changes else since,
+            "has_more": len(changes) == limit
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Sync changes error: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
@@ -1,11 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from app.core.database import get_supabase
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from app.core.config import settings
+from app.core.database import get_supabase, get_supabase_admin
+from app.core.events import broker, publish_trip_event, trip_topic
+from app.core.fields import FIELDS_QUERY, build_response, parse_fields, select_columns
 from app.core.security import get_current_user, get_current_user_optional
-from app.schemas.trip import TripCreate, TripUpdate, TripResponse, TripListResponse, ShareTripResponse
+from app.services import clustering, leaderboard
+from app.schemas.trip import (
+    TripCreate, TripUpdate, TripResponse, TripListResponse, ShareTripResponse, TripCloneRequest,
+    TripImportRequest, TripImportResult, TripImportResponse, TripSearchResponse
+)
+from postgrest import ReturnMethod
+from pydantic import ValidationError
 from supabase import Client
-from typing import List, Optional
+from typing import Iterator, List, Optional
+import asyncio
+import csv
+import io
+import json
 import logging
 import secrets
+import uuid
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -46,27 +61,29 @@ async def create_trip(
         return TripResponse(**result.data[0])
         
     except Exception as e:
-        logger.error(f"Create trip error: {str(e)}")
+        logger.error("Create trip error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
 
 
-@router.get("", response_model=TripListResponse)
+@router.get("", response_model=TripListResponse, response_model_exclude_unset=True)
 async def get_my_trips(
     current_user: dict = Depends(get_current_user),
     supabase: Client = Depends(get_supabase),
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    fields: Optional[str] = FIELDS_QUERY
 ):
     """
     Get all trips for the authenticated user.
     """
+    selected = parse_fields(fields, TripResponse)
     try:
         # Get trips with pagination
         result = supabase.table("trips")\
-            .select("*")\
+            .select(select_columns(selected))\
             .eq("user_id", current_user.id)\
             .order("created_at", desc=True)\
             .range(skip, skip + limit - 1)\
@@ -78,31 +95,337 @@ async def get_my_trips(
             .eq("user_id", current_user.id)\
             .execute()
         
-        trips = [TripResponse(**trip) for trip in result.data]
+        trips = [build_response(TripResponse, trip, selected) for trip in result.data]
         total = count_result.count if hasattr(count_result, 'count') else len(trips)
         
         return TripListResponse(trips=trips, total=total)
         
     except Exception as e:
-        logger.error(f"Get trips error: {str(e)}")
+        logger.error("Get trips error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
 
 
-@router.get("/{trip_id}", response_model=TripResponse)
+# Max number of ids per PostgREST `in` filter, keeps request URLs short
+_IN_FILTER_CHUNK = 100
+
+
+def _fetch_in(supabase: Client, table: str, column: str, ids: List[str], order: Optional[str] = None) -> List[dict]:
+    """Fetch all rows of `table` whose `column` is in `ids`, chunking the filter."""
+    rows = []
+    for i in range(0, len(ids), _IN_FILTER_CHUNK):
+        query = supabase.table(table).select("*").in_(column, ids[i:i + _IN_FILTER_CHUNK])
+        if order:
+            query = query.order(order)
+        rows.extend(query.execute().data)
+    return rows
+
+
+def _group_by(rows: List[dict], key: str) -> dict:
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row[key], []).append(row)
+    return grouped
+
+
+def _build_trip_documents(supabase: Client, trips: List[dict]) -> List[dict]:
+    """
+    Attach stops (with activities, accommodations and meals) and transportation
+    to a batch of trips. Uses one query per table for the whole batch.
+    """
+    trip_ids = [trip["id"] for trip in trips]
+    stops = _fetch_in(supabase, "stops", "trip_id", trip_ids, order="order")
+
+    # Stop children carry a denormalized trip_id, so they are fetched by trip too
+    activities = _group_by(_fetch_in(supabase, "activities", "trip_id", trip_ids, order="order"), "stop_id")
+    accommodations = _group_by(_fetch_in(supabase, "accommodations", "trip_id", trip_ids), "stop_id")
+    meals = _group_by(_fetch_in(supabase, "meals", "trip_id", trip_ids), "stop_id")
+    transportation = _group_by(_fetch_in(supabase, "transportation", "trip_id", trip_ids), "trip_id")
+
+    for stop in stops:
+        stop["activities"] = activities.get(stop["id"], [])
+        stop["accommodations"] = accommodations.get(stop["id"], [])
+        stop["meals"] = meals.get(stop["id"], [])
+
+    stops_by_trip = _group_by(stops, "trip_id")
+    for trip in trips:
+        trip["stops"] = stops_by_trip.get(trip["id"], [])
+        trip["transportation"] = transportation.get(trip["id"], [])
+    return trips
+
+
+def _iter_export_lines(supabase: Client, user_id: str) -> Iterator[str]:
+    """
+    Yield one NDJSON line per trip. Trips are paged by id (keyset pagination),
+    so only one batch is held in memory at a time.
+    """
+    batch_size = settings.EXPORT_BATCH_SIZE
+    last_id = None
+    try:
+        while True:
+            query = supabase.table("trips")\
+                .select("*")\
+                .eq("user_id", user_id)\
+                .order("id")\
+                .limit(batch_size)
+            if last_id:
+                query = query.gt("id", last_id)
+            trips = query.execute().data
+
+            if not trips:
+                return
+
+            for trip in _build_trip_documents(supabase, trips):
+                yield json.dumps(trip, default=str) + "\n"
+
+            if len(trips) < batch_size:
+                return
+            last_id = trips[-1]["id"]
+    except Exception as e:
+        # Headers are already sent, so the client sees a truncated stream
+        logger.error("Export trips error: %s", e)
+        raise
+
+
+@router.get("/export")
+async def export_my_trips(
+    current_user: dict = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
+):
+    """
+    Export all trips of the authenticated user as NDJSON, one complete trip
+    (stops, activities, accommodations, transportation, meals) per line.
+    """
+    return StreamingResponse(
+        _iter_export_lines(supabase, current_user.id),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="trips.ndjson"'}
+    )
+
+
+def _parse_import_csv(text: str) -> dict:
+    """
+    Turn a flat CSV (one row per activity) into the JSON import shape.
+    Rows are grouped into trips by `trip_ref` (or name and dates) and into
+    stops by `stop_name`, keeping the order of first appearance.
+    """
+    trips = {}
+    for row in csv.DictReader(io.StringIO(text)):
+        row = {k.strip(): (v.strip() or None) if isinstance(v, str) else v for k, v in row.items() if k}
+        trip_key = row.get("trip_ref") or (row.get("trip_name"), row.get("start_date"), row.get("end_date"))
+        trip = trips.get(trip_key)
+        if trip is None:
+            trip = trips[trip_key] = {
+                "ref": row.get("trip_ref"),
+                "name": row.get("trip_name"),
+                "start_date": row.get("start_date"),
+                "end_date": row.get("end_date"),
+                "description": row.get("trip_description"),
+                "photo_url": row.get("photo_url"),
+                "_stops": {}
+            }
+
+        if not row.get("stop_name"):
+            continue
+        stop = trip["_stops"].get(row["stop_name"])
+        if stop is None:
+            stop = trip["_stops"][row["stop_name"]] = {
+                "name": row["stop_name"],
+                "location": row.get("stop_location"),
+                "latitude": row.get("stop_latitude"),
+                "longitude": row.get("stop_longitude"),
+                "arrival_date": row.get("arrival_date"),
+                "departure_date": row.get("departure_date"),
+                "notes": row.get("stop_notes"),
+                "activities": []
+            }
+
+        if row.get("activity_name"):
+            stop["activities"].append({
+                "name": row["activity_name"],
+                "activity_type": row.get("activity_type") or "other",
+                "description": row.get("activity_description"),
+                "scheduled_date": row.get("scheduled_date"),
+                "scheduled_time": row.get("scheduled_time"),
+                "duration_minutes": row.get("duration_minutes"),
+                "cost": row.get("cost"),
+                "currency": row.get("currency") or "USD",
+                "location": row.get("activity_location"),
+                "latitude": row.get("activity_latitude"),
+                "longitude": row.get("activity_longitude")
+            })
+
+    for trip in trips.values():
+        trip["stops"] = list(trip.pop("_stops").values())
+    return {"trips": list(trips.values())}
+
+
+def _insert_in_batches(client: Client, table: str, rows: List[dict]) -> None:
+    batch_size = settings.IMPORT_BATCH_SIZE
+    for i in range(0, len(rows), batch_size):
+        client.table(table).insert(rows[i:i + batch_size], returning=ReturnMethod.minimal).execute()
+
+
+@router.post(
+    "/import",
+    response_model=TripImportResponse,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": TripImportRequest.model_json_schema()},
+                "text/csv": {"schema": {"type": "string"}}
+            }
+        }
+    }
+)
+async def import_trips(
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    supabase_admin: Client = Depends(get_supabase_admin)
+):
+    """
+    Bulk import trips with nested stops and activities from a JSON or CSV bundle.
+    The whole bundle is validated before anything is written, then each table
+    is inserted in batches. Returns the created IDs in input order.
+    """
+    body = await request.body()
+    try:
+        if "text/csv" in request.headers.get("content-type", ""):
+            data = _parse_import_csv(body.decode("utf-8-sig"))
+        else:
+            data = json.loads(body)
+        bundle = TripImportRequest.model_validate(data)
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=422,
+            detail=json.loads(e.json(include_url=False))
+        )
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid import file: {str(e)}"
+        )
+
+    if len(bundle.trips) > settings.IMPORT_MAX_TRIPS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many trips, at most {settings.IMPORT_MAX_TRIPS} per import"
+        )
+    invalid = [i for i, trip in enumerate(bundle.trips) if trip.end_date < trip.start_date]
+    if invalid:
+        raise HTTPException(
+            status_code=422,
+            detail=f"end_date is before start_date for trips at index {invalid}"
+        )
+
+    # IDs are generated here so the mapping does not depend on the order
+    # PostgREST returns inserted rows in.
+    now = datetime.utcnow().isoformat()
+    trip_rows, stop_rows, activity_rows, results = [], [], [], []
+    for trip in bundle.trips:
+        trip_id = str(uuid.uuid4())
+        trip_rows.append({
+            "id": trip_id,
+            "user_id": current_user.id,
+            **trip.model_dump(mode="json", exclude={"ref", "stops"}),
+            "created_at": now,
+            "updated_at": now
+        })
+        result = TripImportResult(ref=trip.ref, trip_id=trip_id, stop_ids=[], activity_ids=[])
+
+        for stop_index, stop in enumerate(trip.stops):
+            stop_id = str(uuid.uuid4())
+            stop_dict = stop.model_dump(mode="json", exclude={"activities"})
+            stop_dict["location"] = stop_dict["location"] or stop.name
+            if stop_dict["order"] is None:
+                stop_dict["order"] = stop_index
+            stop_rows.append({"id": stop_id, "trip_id": trip_id, **stop_dict, "created_at": now, "updated_at": now})
+            result.stop_ids.append(stop_id)
+
+            activity_ids = []
+            for activity_index, activity in enumerate(stop.activities):
+                activity_id = str(uuid.uuid4())
+                activity_dict = activity.model_dump(mode="json")
+                if "order" not in activity.model_fields_set:
+                    activity_dict["order"] = activity_index
+                activity_rows.append({
+                    "id": activity_id, "stop_id": stop_id, **activity_dict, "created_at": now, "updated_at": now
+                })
+                activity_ids.append(activity_id)
+            result.activity_ids.append(activity_ids)
+        results.append(result)
+
+    try:
+        # Use admin client to bypass RLS (user_id is set from the authenticated user)
+        _insert_in_batches(supabase_admin, "trips", trip_rows)
+        _insert_in_batches(supabase_admin, "stops", stop_rows)
+        _insert_in_batches(supabase_admin, "activities", activity_rows)
+    except Exception as e:
+        logger.error("Import trips error: %s", e)
+        # Roll back what was written; stops and activities cascade from trips
+        trip_ids = [row["id"] for row in trip_rows]
+        try:
+            for i in range(0, len(trip_ids), _IN_FILTER_CHUNK):
+                supabase_admin.table("trips").delete().in_("id", trip_ids[i:i + _IN_FILTER_CHUNK]).execute()
+        except Exception as cleanup_error:
+            logger.error("Import cleanup error: %s", cleanup_error)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    leaderboard.record_stops(stop_rows)
+    leaderboard.record_activities(activity_rows)
+    return TripImportResponse(imported=len(results), trips=results)
+
+
+@router.get("/search", response_model=TripSearchResponse)
+async def search_my_trips(
+    q: str = Query(..., min_length=2, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: dict = Depends(get_current_user),
+    supabase_admin: Client = Depends(get_supabase_admin)
+):
+    """
+    Full-text search over the authenticated user's trips, stops and
+    activities, best matches first, each with its trip.
+    See migrations/007_trip_search.sql.
+    """
+    try:
+        result = supabase_admin.rpc("search_user_trips", {
+            "p_user_id": current_user.id,
+            "p_query": q,
+            "p_limit": limit
+        }).execute()
+
+        return TripSearchResponse(query=q, results=result.data or [])
+
+    except Exception as e:
+        logger.error("Search trips error: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.get("/{trip_id}", response_model=TripResponse, response_model_exclude_unset=True)
 async def get_trip(
     trip_id: str,
     current_user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_supabase)
+    supabase: Client = Depends(get_supabase),
+    fields: Optional[str] = FIELDS_QUERY
 ):
     """
     Get a specific trip by ID. User must own the trip.
     """
+    selected = parse_fields(fields, TripResponse)
     try:
         result = supabase.table("trips")\
-            .select("*")\
+            .select(select_columns(selected))\
             .eq("id", trip_id)\
             .eq("user_id", current_user.id)\
             .single()\
@@ -114,18 +437,77 @@ async def get_trip(
                 detail="Trip not found"
             )
         
-        return TripResponse(**result.data)
+        return build_response(TripResponse, result.data, selected)
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Get trip error: {str(e)}")
+        logger.error("Get trip error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
 
 
+@router.websocket("/{trip_id}/events")
+async def trip_events(
+    websocket: WebSocket,
+    trip_id: str,
+    access_token: Optional[str] = None,
+    supabase: Client = Depends(get_supabase)
+):
+    """
+    Push the trip's changes as JSON events ({"type", "trip_id", "data", "at"})
+    instead of polling the itinerary endpoints. Browsers cannot set headers on
+    a WebSocket, so the token may be passed as ?access_token=. The owner can
+    subscribe to any of their trips, anyone signed in to a public one; access
+    is checked once, when subscribing.
+    """
+    authorization = websocket.headers.get("authorization", "")
+    token = access_token or (authorization[7:] if authorization.lower().startswith("bearer ") else None)
+    try:
+        user = supabase.auth.get_user(token).user if token else None
+        trip = supabase.table("trips").select("id, user_id, is_public").eq("id", trip_id).limit(1).execute() \
+            if user else None
+    except Exception as e:
+        logger.error("Trip events auth error: %s", e)
+        user, trip = None, None
+
+    if not user or not trip or not trip.data or \
+            (trip.data[0]["user_id"] != user.id and not trip.data[0]["is_public"]):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    # Subscribe before accepting so nothing published in between is missed
+    subscription = broker.subscribe(trip_topic(trip_id))
+    await websocket.accept()
+
+    async def forward():
+        while True:
+            payload = await subscription.get()
+            if payload is None:
+                # Fell too far behind: the client reconnects and reloads
+                await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+                return
+            await websocket.send_text(payload)
+
+    async def receive():
+        # Clients have nothing to send; this only notices when they leave
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+
+    tasks = [asyncio.create_task(forward()), asyncio.create_task(receive())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        subscription.close()
+
+
 @router.put("/{trip_id}", response_model=TripResponse)
 async def update_trip(
     trip_id: str,
@@ -167,12 +549,14 @@ async def update_trip(
             .eq("id", trip_id)\
             .execute()
         
+        clustering.trip_clusters.drop(trip_id)
+        publish_trip_event(trip_id, "trip.updated", result.data[0])
         return TripResponse(**result.data[0])
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Update trip error: {str(e)}")
+        logger.error("Update trip error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
@@ -202,12 +586,14 @@ async def delete_trip(
                 detail="Trip not found"
             )
         
+        clustering.trip_clusters.drop(trip_id)
+        publish_trip_event(trip_id, "trip.deleted")
         return None
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Delete trip error: {str(e)}")
+        logger.error("Delete trip error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
@@ -226,7 +612,7 @@ async def share_trip(
     try:
         # Verify ownership
         trip = supabase.table("trips")\
-            .select("*")\
+            .select("id, share_token")\
             .eq("id", trip_id)\
             .eq("user_id", current_user.id)\
             .single()\
@@ -247,6 +633,8 @@ async def share_trip(
                 "is_public": True,
                 "updated_at": datetime.utcnow().isoformat()
             }).eq("id", trip_id).execute()
+            clustering.trip_clusters.drop(trip_id)
+            publish_trip_event(trip_id, "trip.shared")
         
         # In production, use your actual domain
         share_url = f"http://localhost:3000/shared/{share_token}"
@@ -259,25 +647,27 @@ async def share_trip(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Share trip error: {str(e)}")
+        logger.error("Share trip error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
 
 
-@router.get("/shared/{share_token}", response_model=TripResponse)
+@router.get("/shared/{share_token}", response_model=TripResponse, response_model_exclude_unset=True)
 async def get_shared_trip(
     share_token: str,
     supabase: Client = Depends(get_supabase),
-    current_user: Optional[dict] = Depends(get_current_user_optional)
+    current_user: Optional[dict] = Depends(get_current_user_optional),
+    fields: Optional[str] = FIELDS_QUERY
 ):
     """
     Get a trip by its public share token. No authentication required.
     """
+    selected = parse_fields(fields, TripResponse)
     try:
         result = supabase.table("trips")\
-            .select("*")\
+            .select(select_columns(selected))\
             .eq("share_token", share_token)\
             .eq("is_public", True)\
             .single()\
@@ -289,12 +679,101 @@ async def get_shared_trip(
                 detail="Shared trip not found"
             )
         
-        return TripResponse(**result.data)
+        return build_response(TripResponse, result.data, selected)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Get shared trip error: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+def _clone_trip(supabase_admin: Client, source_trip_id: str, user_id: str, payload: Optional[TripCloneRequest]) -> TripResponse:
+    """
+    Copy a trip with its stops, activities, accommodations, meals and
+    transportation in one transaction (clone_trip() in migrations/005_clone_trip.sql).
+    """
+    payload = payload or TripCloneRequest()
+    result = supabase_admin.rpc("clone_trip", {
+        "p_source_trip_id": source_trip_id,
+        "p_user_id": user_id,
+        "p_name": payload.name,
+        "p_start_date": payload.start_date.isoformat() if payload.start_date else None
+    }).execute()
+    return TripResponse(**result.data[0])
+
+
+@router.post("/shared/{share_token}/clone", response_model=TripResponse, status_code=status.HTTP_201_CREATED)
+async def clone_shared_trip(
+    share_token: str,
+    payload: Optional[TripCloneRequest] = None,
+    current_user: dict = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase),
+    supabase_admin: Client = Depends(get_supabase_admin)
+):
+    """
+    Copy a shared trip into the current user's trips ("use this itinerary").
+    """
+    try:
+        trip = supabase.table("trips")\
+            .select("id")\
+            .eq("share_token", share_token)\
+            .eq("is_public", True)\
+            .single()\
+            .execute()
+        
+        if not trip.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Shared trip not found"
+            )
+        
+        return _clone_trip(supabase_admin, trip.data["id"], current_user.id, payload)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Clone shared trip error: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.post("/{trip_id}/duplicate", response_model=TripResponse, status_code=status.HTTP_201_CREATED)
+async def duplicate_trip(
+    trip_id: str,
+    payload: Optional[TripCloneRequest] = None,
+    current_user: dict = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase),
+    supabase_admin: Client = Depends(get_supabase_admin)
+):
+    """
+    Copy one of the current user's trips. User must own the trip.
+    """
+    try:
+        trip = supabase.table("trips")\
+            .select("id")\
+            .eq("id", trip_id)\
+            .eq("user_id", current_user.id)\
+            .single()\
+            .execute()
+        
+        if not trip.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Trip not found"
+            )
+        
+        return _clone_trip(supabase_admin, trip_id, current_user.id, payload)
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Get shared trip error: {str(e)}")
+        logger.error("Duplicate trip error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
@@ -323,12 +802,14 @@ async def unshare_trip(
                 detail="Trip not found"
             )
         
+        clustering.trip_clusters.drop(trip_id)
+        publish_trip_event(trip_id, "trip.unshared")
         return None
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unshare trip error: {str(e)}")
+        logger.error("Unshare trip error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
@@ -1,12 +1,13 @@
-from pydantic import BaseModel
-from typing import Optional
-from datetime import datetime, time
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime, date, time
 
 
 class ActivityBase(BaseModel):
     name: str
     description: Optional[str] = None
     activity_type: str
+    scheduled_date: Optional[date] = None
     scheduled_time: Optional[time] = None
     duration_minutes: Optional[int] = None
     cost: Optional[float] = None
@@ -26,6 +27,7 @@ class ActivityUpdate(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
     activity_type: Optional[str] = None
+    scheduled_date: Optional[date] = None
     scheduled_time: Optional[time] = None
     duration_minutes: Optional[int] = None
     cost: Optional[float] = None
@@ -36,6 +38,10 @@ class ActivityUpdate(BaseModel):
     order: Optional[int] = None
 
 
+class ActivityImport(ActivityBase):
+    pass
+
+
 class ActivityResponse(ActivityBase):
     id: str
     stop_id: str
@@ -72,3 +78,41 @@ class ScheduleActivityUpdate(BaseModel):
     category: Optional[str] = None
     estimated_cost: Optional[int] = None
     day: Optional[int] = None
+
+
+class ScheduledItineraryActivity(BaseModel):
+    fsq_place_id: str
+    name: str
+    category: Optional[str] = None
+    estimated_cost: Optional[int] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
+
+class ScheduledItineraryDay(BaseModel):
+    day: int
+    city: str
+    activities: List[ScheduledItineraryActivity] = []
+
+
+class ScheduleActivityBatchCreate(BaseModel):
+    trip_id: str
+    itinerary: List[ScheduledItineraryDay] = Field(..., max_length=60)  # Days as returned by auto-plan
+
+
+class ScheduleActivityBatchUpdate(BaseModel):
+    trip_id: str
+    ids: List[str] = Field(..., min_length=1, max_length=200)
+    changes: ScheduleActivityUpdate  # Applied to every listed activity
+
+
+class ScheduleActivityBatchDelete(BaseModel):
+    trip_id: str
+    ids: List[str] = Field(..., min_length=1, max_length=200)
+
+
+class SchedulePackRequest(BaseModel):
+    dry_run: bool = False  # Return the placements without saving them
+    day_start: Optional[time] = None  # Defaults to SCHEDULE_DAY_START
+    day_end: Optional[time] = None  # Defaults to SCHEDULE_DAY_END
+    gap_minutes: Optional[int] = Field(None, ge=0, le=240)  # Defaults to SCHEDULE_GAP_MINUTES
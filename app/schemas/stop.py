@@ -1,10 +1,12 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import date, datetime
+from app.schemas.activity import ActivityImport
 
 class Stop(BaseModel):
     id: str
     trip_id: str
+    destination_id: Optional[str] = None
     name: str
     location: str
     latitude: Optional[float] = None
@@ -15,3 +17,16 @@ class Stop(BaseModel):
     notes: Optional[str] = None
     created_at: datetime
     updated_at: datetime
+
+
+class StopImport(BaseModel):
+    name: str
+    location: Optional[str] = None
+    destination_id: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    arrival_date: Optional[date] = None
+    departure_date: Optional[date] = None
+    order: Optional[int] = None
+    notes: Optional[str] = None
+    activities: List[ActivityImport] = []
@@ -1,6 +1,7 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Literal, Optional, List
 from datetime import datetime, date
+from app.schemas.stop import StopImport
 
 
 class TripBase(BaseModel):
@@ -44,3 +45,53 @@ class TripListResponse(BaseModel):
 class ShareTripResponse(BaseModel):
     share_url: str
     share_token: str
+
+
+class TripCloneRequest(BaseModel):
+    name: Optional[str] = None  # Defaults to the source trip's name
+    start_date: Optional[date] = None  # Shift all dates so the copy starts on this day
+
+
+class TripImport(TripBase):
+    ref: Optional[str] = None  # Client-side identifier echoed back in the ID mapping
+    stops: List[StopImport] = []
+
+
+class TripImportRequest(BaseModel):
+    trips: List[TripImport]
+
+
+class TripImportResult(BaseModel):
+    ref: Optional[str] = None
+    trip_id: str
+    stop_ids: List[str]
+    activity_ids: List[List[str]]  # One list per stop, in input order
+
+
+class TripImportResponse(BaseModel):
+    imported: int
+    trips: List[TripImportResult]
+
+
+class TripSearchTrip(BaseModel):
+    id: str
+    name: str
+    start_date: date
+    end_date: date
+    photo_url: Optional[str] = None
+
+
+class TripSearchResult(BaseModel):
+    kind: Literal["trip", "stop", "activity"]
+    id: str
+    name: str
+    headline: Optional[str] = None  # Matching excerpt of the description or notes
+    rank: float
+    stop_id: Optional[str] = None  # Activities only
+    stop_name: Optional[str] = None
+    trip: TripSearchTrip
+
+
+class TripSearchResponse(BaseModel):
+    query: str
+    results: List[TripSearchResult]
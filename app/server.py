@@ -0,0 +1,74 @@
+"""
+Production server: gunicorn managing uvicorn workers (uvloop + httptools).
+
+    python -m app.server        (or python -m app.main with DEBUG=False)
+
+The app is imported once in the master before forking (preload), workers are
+recycled after MAX_REQUESTS_PER_WORKER requests, and SIGTERM drains in-flight
+requests for up to GRACEFUL_TIMEOUT_SECONDS. Gunicorn is POSIX only; use
+`python -m app.main` with DEBUG=True for local development.
+"""
+from gunicorn.app.base import BaseApplication
+from uvicorn_worker import UvicornWorker
+from app.core.config import settings
+import os
+
+
+class TunedUvicornWorker(UvicornWorker):
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools"}
+
+
+def available_cpus() -> int:
+    """CPUs this process may use, honouring affinity masks and cgroup v2 quotas."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(int(int(quota) / int(period)), 1))
+    except (OSError, ValueError):
+        pass
+
+    return cpus
+
+
+def worker_count() -> int:
+    return settings.WEB_CONCURRENCY or available_cpus()
+
+
+class ProductionServer(BaseApplication):
+    def load_config(self):
+        workers = worker_count()
+        # Lets the app see how many processes serve it (workers inherit the environment)
+        os.environ["SERVER_WORKERS"] = str(workers)
+        options = {
+            "bind": f"{settings.SERVER_HOST}:{settings.SERVER_PORT}",
+            "workers": workers,
+            "worker_class": "app.server.TunedUvicornWorker",
+            "preload_app": True,
+            "backlog": settings.SERVER_BACKLOG,
+            "keepalive": settings.KEEP_ALIVE_SECONDS,
+            "graceful_timeout": settings.GRACEFUL_TIMEOUT_SECONDS,
+            "timeout": settings.WORKER_TIMEOUT_SECONDS,
+            "max_requests": settings.MAX_REQUESTS_PER_WORKER,
+            "max_requests_jitter": settings.MAX_REQUESTS_JITTER,
+            "forwarded_allow_ips": settings.FORWARDED_ALLOW_IPS,
+        }
+        for key, value in options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from app.main import app
+        return app
+
+
+def run():
+    ProductionServer().run()
+
+
+if __name__ == "__main__":
+    run()
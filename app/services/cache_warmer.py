@@ -0,0 +1,110 @@
+"""
+Keeps upstream responses for popular cities warm.
+
+Every CACHE_WARM_INTERVAL_SECONDS the scheduler refreshes the GeoNames
+search, the country metadata of its results and the Foursquare attractions
+for the top CACHE_WARM_TOP_DESTINATIONS destinations (from the popularity
+leaderboard), then for the cities this worker was asked about since the last
+run, most requested first. Only responses that would go stale before the
+next run are fetched, and a run stops after CACHE_WARM_BUDGET upstream calls.
+"""
+from app.core.config import settings
+from app.core.resilience import UpstreamUnavailable
+from app.services import countries, foursquare, geonames, leaderboard
+from collections import OrderedDict
+from typing import List
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class RecentQueries:
+    """Request counts per query since the last `drain`, for at most `size` queries."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._counts: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, query: str) -> None:
+        query = " ".join(query.split())
+        if not query:
+            return
+        with self._lock:
+            self._counts[query] = self._counts.pop(query, 0) + 1
+            if len(self._counts) > self.size:
+                self._counts.popitem(last=False)
+
+    def drain(self) -> List[str]:
+        with self._lock:
+            counts, self._counts = self._counts, OrderedDict()
+        return sorted(counts, key=counts.get, reverse=True)
+
+
+# City searches (GeoNames) and attraction lookups (Foursquare) seen in requests
+recent_city_searches = RecentQueries(settings.CACHE_WARM_RECENT_SIZE)
+recent_attraction_cities = RecentQueries(settings.CACHE_WARM_RECENT_SIZE)
+
+
+class _Budget:
+    def __init__(self, calls: int):
+        self.remaining = calls
+        self.calls = 0
+
+    def spend(self, warm, *args) -> bool:
+        """Run one warm call if there is budget left; False once it is spent."""
+        if self.remaining <= 0:
+            return False
+        if warm(*args, refresh_within=_refresh_within()):
+            self.remaining -= 1
+            self.calls += 1
+        return True
+
+
+def _refresh_within() -> float:
+    # Anything that would expire before the run after next is refreshed now
+    return 2 * settings.CACHE_WARM_INTERVAL_SECONDS
+
+
+def _warm_city_search(budget: _Budget, q: str) -> bool:
+    if not budget.spend(geonames.warm_search, q):
+        return False
+    for code in {city.get("countryCode") for city in geonames.search(q, max_rows=10)}:
+        if code and not budget.spend(countries.warm_country, code):
+            return False
+    return True
+
+
+def _warm_attractions(budget: _Budget, city: str) -> bool:
+    return budget.spend(foursquare.warm_activities, city)
+
+
+def warm() -> None:
+    """Scheduler entry point."""
+    budget = _Budget(settings.CACHE_WARM_BUDGET)
+    leaderboard.ensure_loaded()
+    top = [d["name"] for d in leaderboard.leaderboard.top(
+        leaderboard.DESTINATION, None, settings.CACHE_WARM_TOP_DESTINATIONS
+    )]
+
+    # Popular cities first; an upstream that is down is skipped for the rest of the run
+    work = [(_warm_city_search, name) for name in top] + [(_warm_attractions, name) for name in top]
+    work += [(_warm_city_search, q) for q in recent_city_searches.drain()]
+    work += [(_warm_attractions, city) for city in recent_attraction_cities.drain()]
+
+    unavailable = set()
+    for step, query in work:
+        if step in unavailable:
+            continue
+        try:
+            if not step(budget, query):
+                break
+        except UpstreamUnavailable as e:
+            logger.warning("Cache warming skipping %s: %s", step.__name__, e)
+            unavailable.add(step)
+        except Exception as e:
+            logger.warning("Cache warming for %s failed: %s", query, e)
+
+    if budget.calls:
+        logger.info("Cache warming made %s upstream calls", budget.calls)
@@ -0,0 +1,25 @@
+from app.core.config import settings
+from app.core.database import supabase_admin
+from typing import List
+
+# change_log and its functions are service-role only,
+# see migrations/006_sync_change_log.sql
+
+
+def get_changes(user_id: str, since: int, limit: int) -> List[dict]:
+    """The user's changes with a cursor past `since`, oldest first."""
+    res = supabase_admin.rpc("sync_changes", {"p_user_id": user_id, "p_since": since, "p_limit": limit}).execute()
+    return res.data or []
+
+
+def pruned_through() -> int:
+    """Cursors below this have lost tombstones and must resync from scratch."""
+    res = supabase_admin.table("change_log_state").select("pruned_through").limit(1).execute()
+    return res.data[0]["pruned_through"] if res.data else 0
+
+
+def prune() -> int:
+    res = supabase_admin.rpc(
+        "prune_change_log", {"p_keep": f"{settings.SYNC_TOMBSTONE_RETENTION_DAYS} days"}
+    ).execute()
+    return res.data or 0
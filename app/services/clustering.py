@@ -0,0 +1,375 @@
+"""
+Map point clustering, in the spirit of supercluster.
+
+Points are projected to Web Mercator and stored as 32-bit integer coordinates.
+At zoom z the world is split into a 2^(z + CELL_BITS) grid; each occupied cell
+is a cluster holding its point count and coordinate sums. Cells nest (a cell
+at zoom z is four cells at z + 1), so the hierarchy is built once and adding
+or removing a point touches exactly one cell per zoom level. A bbox query only
+visits the cells in view.
+"""
+from app.core.config import settings
+from app.core.database import supabase
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+import math
+import numpy as np
+import threading
+import time
+
+COORD_BITS = 32
+CELL_BITS = 2  # 4 cells per 256px tile and axis: clusters are about 64px apart
+_SCALE = 1 << COORD_BITS
+
+
+def project(lat: float, lng: float) -> Tuple[int, int]:
+    sin = min(max(math.sin(math.radians(lat)), -0.9999), 0.9999)
+    x = (lng + 180.0) / 360.0
+    y = 0.5 - math.log((1 + sin) / (1 - sin)) / (4 * math.pi)
+    return (
+        min(max(int(x * _SCALE), 0), _SCALE - 1),
+        min(max(int(y * _SCALE), 0), _SCALE - 1)
+    )
+
+
+def unproject(x: float, y: float) -> Tuple[float, float]:
+    lng = x / _SCALE * 360.0 - 180.0
+    lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / _SCALE))))
+    return lat, lng
+
+
+class PointClusterIndex:
+    def __init__(self, min_zoom: int = 0, max_zoom: int = 16):
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self._points: Dict[str, Tuple[int, int, dict]] = {}
+        self._at: Dict[Tuple[int, int], Set[str]] = {}  # coordinate -> point ids
+        self._leaves: Dict[Tuple[int, int], Set[str]] = {}  # max_zoom cell -> point ids
+        # One dict per zoom: (cell x, cell y) -> (count, sum x, sum y)
+        self._levels: List[Dict[Tuple[int, int], Tuple[int, int, int]]] = [{} for _ in range(max_zoom + 1)]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._points)
+
+    def _shift(self, zoom: int) -> int:
+        return COORD_BITS - zoom - CELL_BITS
+
+    def _leaf(self, x: int, y: int) -> Tuple[int, int]:
+        shift = self._shift(self.max_zoom)
+        return x >> shift, y >> shift
+
+    def _cells_in(self, cells: dict, ranges) -> Iterator[Tuple[Tuple[int, int], object]]:
+        """Occupied cells within the ranges, by lookup or by scan, whichever is smaller."""
+        for (cx0, cx1), (cy0, cy1) in ranges:
+            if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) <= len(cells):
+                for cx in range(cx0, cx1 + 1):
+                    for cy in range(cy0, cy1 + 1):
+                        if (cx, cy) in cells:
+                            yield (cx, cy), cells[(cx, cy)]
+            else:
+                for key, value in cells.items():
+                    if cx0 <= key[0] <= cx1 and cy0 <= key[1] <= cy1:
+                        yield key, value
+
+    def _apply(self, x: int, y: int, sign: int):
+        for zoom in range(self.min_zoom, self.max_zoom + 1):
+            shift = self._shift(zoom)
+            level = self._levels[zoom]
+            key = (x >> shift, y >> shift)
+            count, sum_x, sum_y = level.get(key, (0, 0, 0))
+            if count + sign:
+                level[key] = (count + sign, sum_x + sign * x, sum_y + sign * y)
+            else:
+                del level[key]
+
+    def add(self, point_id: str, lat: float, lng: float, properties: Optional[dict] = None):
+        with self._lock:
+            self._remove(point_id)
+            x, y = project(lat, lng)
+            self._points[point_id] = (x, y, properties or {})
+            self._at.setdefault((x, y), set()).add(point_id)
+            self._leaves.setdefault(self._leaf(x, y), set()).add(point_id)
+            self._apply(x, y, 1)
+
+    def _remove(self, point_id: str):
+        point = self._points.pop(point_id, None)
+        if point is None:
+            return
+        x, y, _ = point
+        for ids, key in ((self._at, (x, y)), (self._leaves, self._leaf(x, y))):
+            ids[key].discard(point_id)
+            if not ids[key]:
+                del ids[key]
+        self._apply(x, y, -1)
+
+    def remove(self, point_id: str):
+        with self._lock:
+            self._remove(point_id)
+
+    def load(self, points: List[Tuple[str, float, float, dict]]) -> None:
+        """
+        Build from (id, lat, lng, properties) in one pass per level: cells are
+        found by sorting the points' cell keys and summing runs of equal keys.
+        Meant for an empty index; much faster than calling add() per point.
+        """
+        if not points:
+            return
+        ids = [p[0] for p in points]
+        sin = np.clip(np.sin(np.radians(np.asarray([p[1] for p in points], dtype=float))), -0.9999, 0.9999)
+        lng = np.asarray([p[2] for p in points], dtype=float)
+        xs = np.clip(((lng + 180.0) / 360.0 * _SCALE).astype(np.int64), 0, _SCALE - 1)
+        ys = np.clip(
+            ((0.5 - np.log((1 + sin) / (1 - sin)) / (4 * math.pi)) * _SCALE).astype(np.int64), 0, _SCALE - 1
+        )
+
+        with self._lock:
+            for point_id, x, y, point in zip(ids, xs.tolist(), ys.tolist(), points):
+                self._points[point_id] = (x, y, point[3] or {})
+                self._at.setdefault((x, y), set()).add(point_id)
+                self._leaves.setdefault(self._leaf(x, y), set()).add(point_id)
+
+            for zoom in range(self.min_zoom, self.max_zoom + 1):
+                shift = self._shift(zoom)
+                keys = ((xs >> shift) << COORD_BITS) | (ys >> shift)
+                order = np.argsort(keys, kind="stable")
+                keys = keys[order]
+                starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+                counts = np.diff(np.r_[starts, len(keys)])
+                sum_x = np.add.reduceat(xs[order], starts)
+                sum_y = np.add.reduceat(ys[order], starts)
+                cells = keys[starts]
+                self._levels[zoom] = dict(zip(
+                    zip((cells >> COORD_BITS).tolist(), (cells & ((1 << COORD_BITS) - 1)).tolist()),
+                    zip(counts.tolist(), sum_x.tolist(), sum_y.tolist())
+                ))
+
+    def _ranges(self, west: float, south: float, east: float, north: float, shift: int):
+        """Cell ranges covering the bbox, split in two when it crosses the antimeridian."""
+        x0, y1 = project(south, west)
+        x1, y0 = project(north, east)
+        ys = (y0 >> shift, y1 >> shift)
+        if west <= east:
+            return [((x0 >> shift, x1 >> shift), ys)]
+        last = (_SCALE - 1) >> shift
+        return [((x0 >> shift, last), ys), ((0, x1 >> shift), ys)]
+
+    def _point_feature(self, point_id: str) -> dict:
+        x, y, properties = self._points[point_id]
+        lat, lng = unproject(x, y)
+        return {"type": "point", "id": point_id, "latitude": lat, "longitude": lng, **properties}
+
+    def query(self, west: float, south: float, east: float, north: float, zoom: int) -> List[dict]:
+        """Clusters and single points inside the bbox at `zoom`."""
+        zoom = max(zoom, self.min_zoom)
+        with self._lock:
+            if zoom > self.max_zoom:
+                # Past the deepest level every point is shown on its own
+                return self._query_points(west, south, east, north)
+
+            ranges = self._ranges(west, south, east, north, self._shift(zoom))
+            features = []
+            for (cx, cy), (count, sum_x, sum_y) in self._cells_in(self._levels[zoom], ranges):
+                if count == 1:
+                    point_id = next(iter(self._at[(sum_x, sum_y)]))
+                    features.append(self._point_feature(point_id))
+                    continue
+                lat, lng = unproject(sum_x / count, sum_y / count)
+                features.append({
+                    "type": "cluster",
+                    "id": f"{zoom}/{cx}/{cy}",
+                    "count": count,
+                    "latitude": lat,
+                    "longitude": lng,
+                    "expansion_zoom": self._expansion_zoom(zoom, cx, cy)
+                })
+            return features
+
+    def _expansion_zoom(self, zoom: int, cx: int, cy: int) -> int:
+        """First zoom at which the cluster splits into several markers."""
+        count = self._levels[zoom][(cx, cy)][0]
+        while zoom < self.max_zoom:
+            zoom += 1
+            level = self._levels[zoom]
+            children = [
+                child for child in ((cx * 2, cy * 2), (cx * 2 + 1, cy * 2), (cx * 2, cy * 2 + 1), (cx * 2 + 1, cy * 2 + 1))
+                if child in level
+            ]
+            if len(children) > 1:
+                return zoom
+            cx, cy = children[0]
+        # Points too close to separate on the grid are only shown apart past max_zoom
+        return self.max_zoom + 1 if count > 1 else zoom
+
+    def _query_points(self, west, south, east, north) -> List[dict]:
+        def inside(lat, lng):
+            in_lng = west <= lng <= east if west <= east else (lng >= west or lng <= east)
+            return south <= lat <= north and in_lng
+
+        features = []
+        ranges = self._ranges(west, south, east, north, self._shift(self.max_zoom))
+        for _, ids in self._cells_in(self._leaves, ranges):
+            for point_id in ids:
+                feature = self._point_feature(point_id)
+                if inside(feature["latitude"], feature["longitude"]):
+                    features.append(feature)
+        return features
+
+
+def _catalog_point(row: dict) -> dict:
+    return {"kind": "activity", "name": row["name"], "category": row.get("category"), "rating": row.get("rating")}
+
+
+class CatalogClusters:
+    """
+    Clusters of activity_catalog. Built on first use in this worker, then the
+    scheduler applies rows changed since the last sync. A full rebuild every
+    CLUSTER_REBUILD_SECONDS drops catalog rows that were deleted.
+    """
+
+    COLUMNS = "id, name, category, rating, latitude, longitude, updated_at"
+
+    def __init__(self, max_zoom: int, rebuild_seconds: int, page_size: int = 1000):
+        self.max_zoom = max_zoom
+        self.rebuild_seconds = rebuild_seconds
+        self.page_size = page_size
+        self.index: Optional[PointClusterIndex] = None
+        self.built_at: Optional[float] = None
+        self.synced_to: Optional[str] = None  # newest updated_at applied
+        self._lock = threading.Lock()
+
+    def _fetch(self, since: Optional[str]) -> List[dict]:
+        rows = []
+        while True:
+            query = supabase.table("activity_catalog").select(self.COLUMNS)
+            if since:
+                # gte: rows sharing the last timestamp may have landed after the previous sync
+                query = query.gte("updated_at", since)
+            page = query.order("updated_at").order("id") \
+                .range(len(rows), len(rows) + self.page_size - 1).execute().data
+            rows.extend(page)
+            if len(page) < self.page_size:
+                return rows
+
+    def _apply(self, index: PointClusterIndex, rows: List[dict]):
+        for row in rows:
+            if row.get("latitude") is None or row.get("longitude") is None:
+                index.remove(row["id"])
+            else:
+                index.add(row["id"], float(row["latitude"]), float(row["longitude"]), _catalog_point(row))
+        self._advance(rows)
+
+    def _advance(self, rows: List[dict]):
+        for row in rows:
+            if row.get("updated_at") and (self.synced_to is None or row["updated_at"] > self.synced_to):
+                self.synced_to = row["updated_at"]
+
+    def _build(self) -> PointClusterIndex:
+        rows = self._fetch(None)
+        index = PointClusterIndex(max_zoom=self.max_zoom)
+        index.load([
+            (row["id"], float(row["latitude"]), float(row["longitude"]), _catalog_point(row))
+            for row in rows if row.get("latitude") is not None and row.get("longitude") is not None
+        ])
+        self.synced_to = None
+        self._advance(rows)
+        return index
+
+    def rebuild(self) -> None:
+        with self._lock:
+            # Swap in whole so queries never see a half-built index
+            self.index, self.built_at = self._build(), time.time()
+
+    def sync(self) -> None:
+        """Scheduler entry point: apply recent changes, or rebuild when due."""
+        if self.index is None:
+            return  # nothing to keep fresh until someone asks for clusters
+        if time.time() - self.built_at >= self.rebuild_seconds:
+            self.rebuild()
+            return
+        with self._lock:
+            self._apply(self.index, self._fetch(self.synced_to))
+
+    def get(self) -> PointClusterIndex:
+        if self.index is None:
+            with self._lock:
+                if self.index is None:
+                    self.index, self.built_at = self._build(), time.time()
+        return self.index
+
+
+class TripClusters:
+    """
+    Per-trip indexes of stops and activities for public trips, kept for the
+    most recently viewed trips. Stops and activities added through this worker
+    are applied in place, and a trip updated, shared, unshared, repacked or
+    deleted through it is dropped. Other workers pick changes up on the next
+    rebuild.
+    """
+
+    def __init__(self, max_zoom: int, size: int, rebuild_seconds: int):
+        self.max_zoom = max_zoom
+        self.size = size
+        self.rebuild_seconds = rebuild_seconds
+        self._indexes: "OrderedDict[str, Tuple[PointClusterIndex, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, trip_id: str, load) -> PointClusterIndex:
+        """The trip's index; `load()` returns (stops, activities) when it must be built."""
+        with self._lock:
+            entry = self._indexes.get(trip_id)
+            if entry and time.time() - entry[1] < self.rebuild_seconds:
+                self._indexes.move_to_end(trip_id)
+                return entry[0]
+
+        stops, activities = load()
+        index = PointClusterIndex(max_zoom=self.max_zoom)
+        index.load(_trip_points("stop", stops) + _trip_points("activity", activities))
+        with self._lock:
+            self._indexes[trip_id] = (index, time.time())
+            self._indexes.move_to_end(trip_id)
+            while len(self._indexes) > self.size:
+                self._indexes.popitem(last=False)
+        return index
+
+    def add(self, trip_id: str, kind: str, rows: List[dict]) -> None:
+        with self._lock:
+            entry = self._indexes.get(trip_id)
+        if entry:
+            for point in _trip_points(kind, rows):
+                entry[0].add(*point)
+
+    def drop(self, trip_id: str) -> None:
+        with self._lock:
+            self._indexes.pop(trip_id, None)
+
+
+def _select_trip_rows(table: str, columns: str, trip_id: str, page_size: int = 1000) -> List[dict]:
+    rows = []
+    while True:
+        page = supabase.table(table).select(columns).eq("trip_id", trip_id) \
+            .order("id").range(len(rows), len(rows) + page_size - 1).execute().data
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+
+
+def public_trip_index(trip_id: str) -> PointClusterIndex:
+    """Index of a public trip, read with the anon client so RLS still applies."""
+    return trip_clusters.get(trip_id, lambda: (
+        _select_trip_rows("stops", "id, name, latitude, longitude, arrival_date", trip_id),
+        _select_trip_rows("activities", "id, name, latitude, longitude, scheduled_date", trip_id)
+    ))
+
+
+def _trip_points(kind: str, rows: List[dict]) -> List[Tuple[str, float, float, dict]]:
+    return [
+        (
+            row["id"], float(row["latitude"]), float(row["longitude"]),
+            {"kind": kind, "name": row.get("name"), "scheduled_date": row.get("scheduled_date") or row.get("arrival_date")}
+        )
+        for row in rows if row.get("latitude") is not None and row.get("longitude") is not None
+    ]
+
+catalog_clusters = CatalogClusters(settings.CLUSTER_MAX_ZOOM, settings.CLUSTER_REBUILD_SECONDS)
+trip_clusters = TripClusters(settings.CLUSTER_MAX_ZOOM, settings.CLUSTER_TRIP_CACHE_SIZE, settings.CLUSTER_REBUILD_SECONDS)
@@ -1,6 +1,24 @@
-import requests
+from app.core.config import settings
+from app.core.resilience import Upstream
+
+upstream = Upstream(
+    "restcountries",
+    hedge=settings.UPSTREAM_HEDGE_ENABLED,
+    fresh_ttl_seconds=settings.COUNTRIES_CACHE_TTL_SECONDS
+)
+
+
+def _country_url(code: str) -> str:
+    return f"https://restcountries.com/v3.1/alpha/{code}"
+
+
+def get_country(code: str):
+    return upstream.get_json(_country_url(code))[0]
+
+
+def warm_country(code: str, refresh_within: float = 0) -> bool:
+    return upstream.warm(_country_url(code), refresh_within=refresh_within)
+
 
 def get_country_name(code: str):
-    url = f"https://restcountries.com/v3.1/alpha/{code}"
-    res = requests.get(url).json()
-    return res[0]["name"]["common"]
+    return get_country(code)["name"]["common"]
@@ -1,21 +1,39 @@
-import requests
-from app.core.config import FSQ_SERVICE_KEY, FSQ_API_VERSION, FSQ_BASE_URL
-
-def get_activities(city: str):
-    headers = {
-        "Authorization": f"Bearer {FSQ_SERVICE_KEY}",
-        "X-Places-Api-Version": FSQ_API_VERSION,
-        "Accept": "application/json"
-    }
-    params = {
-        "near": city,
-        "categories": "16000",
-        "limit": 10
+from app.core.config import settings
+from app.core.resilience import Upstream
+
+upstream = Upstream(
+    "foursquare",
+    hedge=settings.UPSTREAM_HEDGE_ENABLED,
+    fresh_ttl_seconds=settings.FSQ_CACHE_TTL_SECONDS
+)
+
+
+def _search_request(city: str) -> dict:
+    # Always request a full page so every caller shares one cached response per
+    # city. Case and spacing variants share it too, but Foursquare gets the city as typed.
+    url = f"{settings.FSQ_BASE_URL}/places/search"
+    near = " ".join(city.split()).casefold()
+    return {
+        "url": url,
+        "headers": {
+            "Authorization": f"Bearer {settings.FSQ_SERVICE_KEY}",
+            "X-Places-Api-Version": settings.FSQ_API_VERSION,
+            "Accept": "application/json"
+        },
+        "params": {
+            "near": city,
+            "categories": "16000",
+            "limit": settings.FSQ_PAGE_SIZE
+        },
+        "cache_key": f"{url}?near={near}&limit={settings.FSQ_PAGE_SIZE}"
     }
-    res = requests.get(
-        f"{FSQ_BASE_URL}/places/search",
-        headers=headers,
-        params=params
-    ).json()
 
-    return res["results"]
+
+def get_activities(city: str, limit: int = 10):
+    res = upstream.get_json(**_search_request(city))
+
+    return res.get("results", [])[:limit]
+
+
+def warm_activities(city: str, refresh_within: float = 0) -> bool:
+    return upstream.warm(**_search_request(city), refresh_within=refresh_within)
@@ -0,0 +1,94 @@
+from typing import Dict, List, Optional
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Rough door-to-door speeds; the detour factor turns great-circle distance
+# into a typical ground distance
+TRAVEL_MODES = {
+    "walk": {"speed_kmh": 4.8, "detour": 1.3},
+    "bike": {"speed_kmh": 15.0, "detour": 1.3},
+    "transit": {"speed_kmh": 25.0, "detour": 1.3},
+    "drive": {"speed_kmh": 50.0, "detour": 1.25},
+    "train": {"speed_kmh": 90.0, "detour": 1.15},
+    "flight": {"speed_kmh": 750.0, "detour": 1.05, "overhead_minutes": 150},
+}
+
+
+def haversine_matrix(latitudes, longitudes) -> np.ndarray:
+    """Great-circle distances in km between every pair of points, as an N x N matrix."""
+    lat = np.radians(np.asarray(latitudes, dtype=float))
+    lng = np.radians(np.asarray(longitudes, dtype=float))
+    dlat = lat[:, None] - lat[None, :]
+    dlng = lng[:, None] - lng[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def travel_minutes(distance_km: np.ndarray) -> Dict[str, np.ndarray]:
+    """Estimated travel time per mode for an array of great-circle distances."""
+    estimates = {}
+    for mode, profile in TRAVEL_MODES.items():
+        minutes = distance_km * profile["detour"] / profile["speed_kmh"] * 60
+        estimates[mode] = minutes + np.where(distance_km > 0, profile.get("overhead_minutes", 0), 0)
+    return estimates
+
+
+def route_summary(points: List[dict], include_matrix: bool = True) -> dict:
+    """
+    Distances for points visited in the given order. Each point needs `id`,
+    `latitude` and `longitude`; points without coordinates are skipped and
+    listed. Returns the pairwise matrix, each leg between consecutive points,
+    and totals with travel-time estimates per mode.
+    """
+    located, skipped = [], []
+    for point in points:
+        if point.get("latitude") is None or point.get("longitude") is None:
+            skipped.append(point["id"])
+        else:
+            located.append(point)
+
+    if located:
+        matrix = haversine_matrix([p["latitude"] for p in located], [p["longitude"] for p in located])
+        leg_km = np.diagonal(matrix, offset=1)
+    else:
+        matrix = np.zeros((0, 0))
+        leg_km = np.zeros(0)
+
+    leg_minutes = travel_minutes(leg_km)
+    legs = [
+        {
+            "from": located[n]["id"],
+            "to": located[n + 1]["id"],
+            "distance_km": round(float(leg_km[n]), 3),
+            "minutes": {mode: round(float(minutes[n]), 1) for mode, minutes in leg_minutes.items()}
+        }
+        for n in range(len(leg_km))
+    ]
+
+    total_km = float(leg_km.sum())
+    summary = {
+        "points": [p["id"] for p in located],
+        "skipped": skipped,
+        "legs": legs,
+        "total_distance_km": round(total_km, 3),
+        "total_minutes": {mode: round(float(m.sum()), 1) for mode, m in leg_minutes.items()},
+    }
+    if include_matrix:
+        summary["matrix_km"] = np.round(matrix, 3).tolist()
+    return summary
+
+
+def mode_for_transport(transport_type: Optional[str]) -> Optional[str]:
+    """Map a transportation.type ('flight', 'train', 'bus', 'car', ...) to a travel mode."""
+    return {
+        "flight": "flight",
+        "train": "train",
+        "bus": "transit",
+        "ferry": "transit",
+        "metro": "transit",
+        "car": "drive",
+        "taxi": "drive",
+        "bike": "bike",
+        "walk": "walk",
+    }.get((transport_type or "").lower())
@@ -1,19 +1,38 @@
-import requests
-from app.core.config import GEONAMES_USERNAME
+from app.core.config import settings
+from app.core.resilience import Upstream
 
-def validate_city(city: str):
-    url = "http://api.geonames.org/searchJSON"
-    params = {
-        "q": city,
-        "maxRows": 1,
-        "username": GEONAMES_USERNAME
+GEONAMES_URL = "http://api.geonames.org/searchJSON"
+
+upstream = Upstream(
+    "geonames",
+    hedge=settings.UPSTREAM_HEDGE_ENABLED,
+    fresh_ttl_seconds=settings.GEONAMES_CACHE_TTL_SECONDS
+)
+
+
+def _search_params(q: str, max_rows: int) -> dict:
+    return {
+        "q": q,
+        "maxRows": max_rows,
+        "username": settings.GEONAMES_USERNAME
     }
-    res = requests.get(url, params=params).json()
 
-    if not res["geonames"]:
+
+def search(q: str, max_rows: int = 10):
+    return upstream.get_json(GEONAMES_URL, params=_search_params(q, max_rows)).get("geonames", [])
+
+
+def warm_search(q: str, max_rows: int = 10, refresh_within: float = 0) -> bool:
+    return upstream.warm(GEONAMES_URL, params=_search_params(q, max_rows), refresh_within=refresh_within)
+
+
+def validate_city(city: str):
+    results = search(city, max_rows=1)
+
+    if not results:
         return None
 
-    g = res["geonames"][0]
+    g = results[0]
     return {
         "city": g["name"],
         "country_code": g["countryCode"]
@@ -0,0 +1,84 @@
+from app.core.config import settings
+from app.core.database import supabase, supabase_admin
+from typing import Dict, Iterable, List, Optional, Tuple
+import threading
+import time
+
+DESTINATION, ACTIVITY = "destination", "activity"
+
+
+class Leaderboard:
+    """
+    In-memory top-K of destinations and catalog activities, overall and per
+    region. Loaded from popularity_leaderboard() (catalog tables only, see
+    migrations/004_popularity_leaderboard.sql) and reloaded periodically.
+    Stops and activities added or removed through this worker adjust the
+    scores in between; items outside the loaded top-K appear on the next reload.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.loaded_at: Optional[float] = None
+        self._entries: Dict[str, Dict[str, dict]] = {DESTINATION: {}, ACTIVITY: {}}
+        self._rankings: Dict[Tuple[str, Optional[str]], List[dict]] = {}  # sorted lazily after changes
+        self._lock = threading.Lock()
+
+    def load(self, rows: Iterable[dict]) -> None:
+        entries = {DESTINATION: {}, ACTIVITY: {}}
+        for row in rows:
+            entries[row["kind"]][row["id"]] = row
+        with self._lock:
+            self._entries = entries
+            self._rankings = {}
+            self.loaded_at = time.time()
+
+    def record(self, kind: str, item_id: Optional[str], delta: int) -> None:
+        if not item_id:
+            return
+        with self._lock:
+            entry = self._entries[kind].get(item_id)
+            if entry is None:
+                return
+            self._entries[kind][item_id] = {**entry, "score": max(entry["score"] + delta, 0)}
+            self._rankings = {}
+
+    def top(self, kind: str, region: Optional[str] = None, limit: int = 10) -> List[dict]:
+        key = (kind, region.casefold() if region else None)
+        with self._lock:
+            ranking = self._rankings.get(key)
+            if ranking is None:
+                entries = self._entries[kind].values()
+                if region:
+                    entries = [e for e in entries if (e.get("region") or "").casefold() == key[1]]
+                ranking = sorted(entries, key=lambda e: (-e["score"], e["id"]))[:self.size]
+                self._rankings[key] = ranking
+            return ranking[:limit]
+
+
+leaderboard = Leaderboard(settings.LEADERBOARD_SIZE)
+_load_lock = threading.Lock()
+
+
+def refresh() -> None:
+    # Apply the stop / activity changes queued since the last run first
+    supabase_admin.rpc("fold_popularity").execute()
+    res = supabase.rpc("popularity_leaderboard", {"p_limit": leaderboard.size}).execute()
+    leaderboard.load(res.data or [])
+
+
+def ensure_loaded() -> None:
+    """Load on first use in this worker; later reloads come from the scheduler."""
+    if leaderboard.loaded_at is None:
+        with _load_lock:
+            if leaderboard.loaded_at is None:
+                refresh()
+
+
+def record_stops(stops: Iterable[dict], delta: int = 1) -> None:
+    for stop in stops:
+        leaderboard.record(DESTINATION, stop.get("destination_id"), delta)
+
+
+def record_activities(activities: Iterable[dict], delta: int = 1) -> None:
+    for activity in activities:
+        leaderboard.record(ACTIVITY, activity.get("catalog_activity_id"), delta)
@@ -0,0 +1,24 @@
+from app.core.database import supabase_admin
+from typing import List, Optional
+
+# platform_metrics and refresh_platform_metrics() are service-role only,
+# see migrations/003_platform_metrics_aggregation.sql
+
+
+def refresh() -> Optional[dict]:
+    """
+    Fold changes since the last run into today's platform_metrics row.
+    Returns the row, or None if the table is empty.
+    """
+    res = supabase_admin.rpc("refresh_platform_metrics").execute()
+    return res.data[0] if res.data else None
+
+
+def get_recent(days: int) -> List[dict]:
+    """The precomputed daily rows, newest first."""
+    res = supabase_admin.table("platform_metrics") \
+        .select("*") \
+        .order("metric_date", desc=True) \
+        .limit(days) \
+        .execute()
+    return res.data
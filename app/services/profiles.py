@@ -0,0 +1,34 @@
+from app.core.cache import get_cache
+from app.core.config import settings
+from supabase import Client
+from typing import Optional
+
+# Full `users` rows keyed by user ID, shared by login, refresh and /profile/me.
+# Profile writes through the API update or drop the entry; with the memory
+# backend another worker may serve the old row until the TTL runs out.
+_cache = get_cache(
+    "profiles",
+    ttl_seconds=settings.PROFILE_CACHE_TTL_SECONDS,
+    max_entries=settings.PROFILE_CACHE_SIZE
+)
+
+
+def get_profile(supabase: Client, user_id: str) -> Optional[dict]:
+    """The user's profile row, or None if there is none. Treat it as read-only."""
+    profile = _cache.get(user_id)
+    if profile is None:
+        result = supabase.table("users").select("*").eq("id", user_id).limit(1).execute()
+        if not result.data:
+            return None
+        profile = result.data[0]
+        _cache.set(user_id, profile)
+    return profile
+
+
+def store_profile(profile: dict) -> None:
+    """Write-through after an insert or update that returned the row."""
+    _cache.set(profile["id"], profile)
+
+
+def invalidate_profile(user_id: str) -> None:
+    _cache.delete(user_id)
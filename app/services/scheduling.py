@@ -0,0 +1,156 @@
+"""
+Time-interval scheduling for a trip's activities and meals.
+
+Items are placed on a day as [start, end) intervals in minutes since midnight.
+A day is indexed by sorting its intervals by start and keeping a running
+maximum of their ends, so conflict checks are O(log n) after an O(n log n)
+build, and a whole trip is swept for overlaps in O(n log n).
+"""
+from bisect import bisect_left
+from datetime import date, time, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+
+class Interval(NamedTuple):
+    start: int
+    end: int
+    item: dict
+
+
+def to_minutes(value) -> int:
+    """Minutes since midnight of a time or an "HH:MM[:SS]" string."""
+    if isinstance(value, str):
+        value = time.fromisoformat(value)
+    return value.hour * 60 + value.minute
+
+
+def to_time(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}:00"
+
+
+def to_interval(row: dict, default_duration: int) -> Optional[Interval]:
+    """The row's interval, or None when it has no scheduled time."""
+    if not row.get("scheduled_date") or not row.get("scheduled_time"):
+        return None
+    start = to_minutes(row["scheduled_time"])
+    return Interval(start, start + (row.get("duration_minutes") or default_duration), row)
+
+
+def group_by_day(rows: Iterable[dict], default_duration: int) -> Dict[str, List[Interval]]:
+    days = {}
+    for row in rows:
+        interval = to_interval(row, default_duration)
+        if interval:
+            days.setdefault(str(row["scheduled_date"]), []).append(interval)
+    return days
+
+
+class DayIndex:
+    """Intervals of one day, sorted by start, with prefix maxima of their ends."""
+
+    def __init__(self, intervals: Iterable[Interval]):
+        self.intervals = sorted(intervals, key=lambda i: (i.start, i.end))
+        self.starts = [i.start for i in self.intervals]
+        self._max_end: List[int] = []
+        self._max_at: List[int] = []
+        for n, interval in enumerate(self.intervals):
+            if not self._max_end or interval.end > self._max_end[-1]:
+                self._max_end.append(interval.end)
+                self._max_at.append(n)
+            else:
+                self._max_end.append(self._max_end[-1])
+                self._max_at.append(self._max_at[-1])
+
+    def overlapping(self, start: int, end: int) -> Optional[dict]:
+        """An item overlapping [start, end), if any."""
+        # Only intervals starting before `end` can overlap; of those, the one
+        # reaching furthest does if anything does
+        n = bisect_left(self.starts, end)
+        if n and self._max_end[n - 1] > start:
+            return self.intervals[self._max_at[n - 1]].item
+        return None
+
+
+def find_conflicts(intervals: Iterable[Interval]) -> List[Tuple[dict, dict]]:
+    """
+    Overlapping pairs within one day. Every item that overlaps an earlier one
+    is reported once, paired with the earlier item that reaches furthest.
+    """
+    conflicts = []
+    furthest: Optional[Interval] = None
+    for interval in sorted(intervals, key=lambda i: (i.start, i.end)):
+        if furthest and interval.start < furthest.end:
+            conflicts.append((furthest.item, interval.item))
+        if not furthest or interval.end > furthest.end:
+            furthest = interval
+    return conflicts
+
+
+def free_slots(busy: Iterable[Interval], day_start: int, day_end: int, gap: int) -> List[List[int]]:
+    """Free [start, end) ranges between day_start and day_end, keeping `gap` minutes around busy items."""
+    slots = []
+    cursor = day_start
+    for interval in sorted(busy, key=lambda i: i.start):
+        if interval.start - gap > cursor:
+            slots.append([cursor, min(interval.start - gap, day_end)])
+        cursor = max(cursor, interval.end + gap)
+        if cursor >= day_end:
+            break
+    if cursor < day_end:
+        slots.append([cursor, day_end])
+    return [slot for slot in slots if slot[1] > slot[0]]
+
+
+def date_range(first: date, last: date) -> List[str]:
+    return [(first + timedelta(days=n)).isoformat() for n in range((last - first).days + 1)]
+
+
+def pack(
+    items: List[Tuple[dict, int, List[str]]],
+    busy_by_day: Dict[str, List[Interval]],
+    day_start: int,
+    day_end: int,
+    gap: int
+) -> Tuple[List[dict], List[dict]]:
+    """
+    Place items, given as (row, duration, allowed days), into free time.
+    Items sharing the same allowed days keep their relative order: each is
+    placed at the earliest free time after the previous one (next-fit), so a
+    run over n items and s free slots is O(n + s) after sorting.
+    Returns (placements, unplaced rows).
+    """
+    slots_by_day: Dict[str, List[List[int]]] = {}
+    cursors: Dict[Tuple[str, ...], Tuple[int, int]] = {}  # allowed days -> (day position, slot position)
+    placements, unplaced = [], []
+
+    for row, duration, days in items:
+        key = tuple(days)
+        day_pos, slot_pos = cursors.get(key, (0, 0))
+        placed = False
+        while day_pos < len(days) and not placed:
+            day = days[day_pos]
+            if day not in slots_by_day:
+                slots_by_day[day] = free_slots(busy_by_day.get(day, []), day_start, day_end, gap)
+            slots = slots_by_day[day]
+            while slot_pos < len(slots):
+                slot = slots[slot_pos]
+                if slot[1] - slot[0] >= duration:
+                    placements.append({
+                        "id": row["id"],
+                        "scheduled_date": day,
+                        "scheduled_time": to_time(slot[0]),
+                        "duration_minutes": duration
+                    })
+                    slot[0] += duration + gap  # shared with other groups using this day
+                    placed = True
+                    break
+                slot_pos += 1
+            if not placed:
+                day_pos, slot_pos = day_pos + 1, 0
+        if placed:
+            cursors[key] = (day_pos, slot_pos)
+        else:
+            # Too long for any remaining slot; later items keep the old cursor
+            unplaced.append(row)
+
+    return placements, unplaced
@@ -0,0 +1,262 @@
+-- Migration 001: indexes for hot query paths and cheaper RLS policies
+-- Run after supabase_setup.sql, in the Supabase SQL Editor.
+-- Verify with migrations/checks/001_explain_hot_paths.sql
+
+-- =====================================================
+-- COMPOSITE AND PARTIAL INDEXES
+-- =====================================================
+
+-- get_my_trips: WHERE user_id = ? ORDER BY created_at DESC
+CREATE INDEX IF NOT EXISTS idx_trips_user_created
+    ON public.trips(user_id, created_at DESC);
+DROP INDEX IF EXISTS public.idx_trips_user_id;
+
+-- get_shared_trip: WHERE share_token = ? AND is_public
+-- (the UNIQUE constraint already indexes share_token, idx_trips_share_token duplicated it)
+CREATE INDEX IF NOT EXISTS idx_trips_public_share_token
+    ON public.trips(share_token) WHERE is_public = TRUE;
+DROP INDEX IF EXISTS public.idx_trips_share_token;
+
+-- get_trip_stops / add_stop max order: WHERE trip_id = ? ORDER BY "order"
+CREATE INDEX IF NOT EXISTS idx_stops_trip_order
+    ON public.stops(trip_id, "order");
+DROP INDEX IF EXISTS public.idx_stops_trip_id;
+
+-- get_stop_activities / add_activity max order: WHERE stop_id = ? ORDER BY "order"
+CREATE INDEX IF NOT EXISTS idx_activities_stop_order
+    ON public.activities(stop_id, "order");
+DROP INDEX IF EXISTS public.idx_activities_stop_id;
+
+-- get_scheduled_activities: WHERE trip_id = ? ORDER BY day
+-- (scheduled_activities is created outside supabase_setup.sql)
+DO $$
+BEGIN
+    IF to_regclass('public.scheduled_activities') IS NOT NULL THEN
+        CREATE INDEX IF NOT EXISTS idx_scheduled_activities_trip_day
+            ON public.scheduled_activities(trip_id, day);
+    END IF;
+END $$;
+
+-- =====================================================
+-- RLS HELPERS
+-- =====================================================
+-- Owner policies compare against the caller's trip/stop IDs. Wrapped in
+-- (SELECT ...), the set is computed once per statement and probed as a hash,
+-- instead of running an EXISTS join back to trips for every row.
+-- SECURITY DEFINER skips the nested RLS checks on trips and stops.
+
+CREATE OR REPLACE FUNCTION public.user_trip_ids()
+RETURNS SETOF UUID
+LANGUAGE sql STABLE SECURITY DEFINER
+SET search_path = public
+AS $$
+    SELECT id FROM public.trips WHERE user_id = auth.uid();
+$$;
+
+CREATE OR REPLACE FUNCTION public.user_stop_ids()
+RETURNS SETOF UUID
+LANGUAGE sql STABLE SECURITY DEFINER
+SET search_path = public
+AS $$
+    SELECT stops.id
+    FROM public.stops
+    JOIN public.trips ON trips.id = stops.trip_id
+    WHERE trips.user_id = auth.uid();
+$$;
+
+-- Public-read policies stay per row (public trips can be many), but become a
+-- single primary key lookup without nested RLS evaluation.
+CREATE OR REPLACE FUNCTION public.is_public_trip(p_trip_id UUID)
+RETURNS BOOLEAN
+LANGUAGE sql STABLE SECURITY DEFINER
+SET search_path = public
+AS $$
+    SELECT EXISTS (SELECT 1 FROM public.trips WHERE id = p_trip_id AND is_public = TRUE);
+$$;
+
+CREATE OR REPLACE FUNCTION public.is_public_stop(p_stop_id UUID)
+RETURNS BOOLEAN
+LANGUAGE sql STABLE SECURITY DEFINER
+SET search_path = public
+AS $$
+    SELECT EXISTS (
+        SELECT 1 FROM public.stops
+        JOIN public.trips ON trips.id = stops.trip_id
+        WHERE stops.id = p_stop_id AND trips.is_public = TRUE
+    );
+$$;
+
+GRANT EXECUTE ON FUNCTION public.user_trip_ids() TO authenticated;
+GRANT EXECUTE ON FUNCTION public.user_stop_ids() TO authenticated;
+GRANT EXECUTE ON FUNCTION public.is_public_trip(UUID) TO anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.is_public_stop(UUID) TO anon, authenticated;
+
+-- =====================================================
+-- USERS / TRIPS POLICIES
+-- =====================================================
+-- (SELECT auth.uid()) is evaluated once per statement instead of once per row
+
+DROP POLICY IF EXISTS "Users can view own profile" ON public.users;
+DROP POLICY IF EXISTS "Users can update own profile" ON public.users;
+DROP POLICY IF EXISTS "Users can insert own profile" ON public.users;
+
+CREATE POLICY "Users can view own profile"
+    ON public.users FOR SELECT
+    USING ((SELECT auth.uid()) = id);
+
+CREATE POLICY "Users can update own profile"
+    ON public.users FOR UPDATE
+    USING ((SELECT auth.uid()) = id);
+
+CREATE POLICY "Users can insert own profile"
+    ON public.users FOR INSERT
+    WITH CHECK ((SELECT auth.uid()) = id);
+
+DROP POLICY IF EXISTS "Users can view own trips" ON public.trips;
+DROP POLICY IF EXISTS "Users can create own trips" ON public.trips;
+DROP POLICY IF EXISTS "Users can update own trips" ON public.trips;
+DROP POLICY IF EXISTS "Users can delete own trips" ON public.trips;
+
+CREATE POLICY "Users can view own trips"
+    ON public.trips FOR SELECT
+    USING ((SELECT auth.uid()) = user_id);
+
+CREATE POLICY "Users can create own trips"
+    ON public.trips FOR INSERT
+    WITH CHECK ((SELECT auth.uid()) = user_id);
+
+CREATE POLICY "Users can update own trips"
+    ON public.trips FOR UPDATE
+    USING ((SELECT auth.uid()) = user_id);
+
+CREATE POLICY "Users can delete own trips"
+    ON public.trips FOR DELETE
+    USING ((SELECT auth.uid()) = user_id);
+
+-- =====================================================
+-- STOPS POLICIES
+-- =====================================================
+DROP POLICY IF EXISTS "Users can view own trip stops" ON public.stops;
+DROP POLICY IF EXISTS "Anyone can view public trip stops" ON public.stops;
+DROP POLICY IF EXISTS "Users can insert own trip stops" ON public.stops;
+DROP POLICY IF EXISTS "Users can update own trip stops" ON public.stops;
+DROP POLICY IF EXISTS "Users can delete own trip stops" ON public.stops;
+
+CREATE POLICY "Users can view own trip stops"
+    ON public.stops FOR SELECT
+    USING (trip_id IN (SELECT public.user_trip_ids()));
+
+CREATE POLICY "Anyone can view public trip stops"
+    ON public.stops FOR SELECT
+    USING (public.is_public_trip(trip_id));
+
+CREATE POLICY "Users can insert own trip stops"
+    ON public.stops FOR INSERT
+    WITH CHECK (trip_id IN (SELECT public.user_trip_ids()));
+
+CREATE POLICY "Users can update own trip stops"
+    ON public.stops FOR UPDATE
+    USING (trip_id IN (SELECT public.user_trip_ids()));
+
+CREATE POLICY "Users can delete own trip stops"
+    ON public.stops FOR DELETE
+    USING (trip_id IN (SELECT public.user_trip_ids()));
+
+-- =====================================================
+-- ACTIVITIES POLICIES
+-- =====================================================
+DROP POLICY IF EXISTS "Users can view own trip activities" ON public.activities;
+DROP POLICY IF EXISTS "Anyone can view public trip activities" ON public.activities;
+DROP POLICY IF EXISTS "Users can insert own trip activities" ON public.activities;
+DROP POLICY IF EXISTS "Users can update own trip activities" ON public.activities;
+DROP POLICY IF EXISTS "Users can delete own trip activities" ON public.activities;
+
+CREATE POLICY "Users can view own trip activities"
+    ON public.activities FOR SELECT
+    USING (stop_id IN (SELECT public.user_stop_ids()));
+
+CREATE POLICY "Anyone can view public trip activities"
+    ON public.activities FOR SELECT
+    USING (public.is_public_stop(stop_id));
+
+CREATE POLICY "Users can insert own trip activities"
+    ON public.activities FOR INSERT
+    WITH CHECK (stop_id IN (SELECT public.user_stop_ids()));
+
+CREATE POLICY "Users can update own trip activities"
+    ON public.activities FOR UPDATE
+    USING (stop_id IN (SELECT public.user_stop_ids()));
+
+CREATE POLICY "Users can delete own trip activities"
+    ON public.activities FOR DELETE
+    USING (stop_id IN (SELECT public.user_stop_ids()));
+
+-- =====================================================
+-- ACCOMMODATIONS / MEALS POLICIES
+-- =====================================================
+DROP POLICY IF EXISTS "Users can view accommodations for own trips" ON public.accommodations;
+DROP POLICY IF EXISTS "Anyone can view accommodations for public trips" ON public.accommodations;
+DROP POLICY IF EXISTS "Users can manage accommodations for own trips" ON public.accommodations;
+
+CREATE POLICY "Users can view accommodations for own trips"
+    ON public.accommodations FOR SELECT
+    USING (stop_id IN (SELECT public.user_stop_ids()));
+
+CREATE POLICY "Anyone can view accommodations for public trips"
+    ON public.accommodations FOR SELECT
+    USING (public.is_public_stop(stop_id));
+
+CREATE POLICY "Users can manage accommodations for own trips"
+    ON public.accommodations FOR ALL
+    USING (stop_id IN (SELECT public.user_stop_ids()));
+
+DROP POLICY IF EXISTS "Users can view meals for own trips" ON public.meals;
+DROP POLICY IF EXISTS "Anyone can view meals for public trips" ON public.meals;
+DROP POLICY IF EXISTS "Users can manage meals for own trips" ON public.meals;
+
+CREATE POLICY "Users can view meals for own trips"
+    ON public.meals FOR SELECT
+    USING (stop_id IN (SELECT public.user_stop_ids()));
+
+CREATE POLICY "Anyone can view meals for public trips"
+    ON public.meals FOR SELECT
+    USING (public.is_public_stop(stop_id));
+
+CREATE POLICY "Users can manage meals for own trips"
+    ON public.meals FOR ALL
+    USING (stop_id IN (SELECT public.user_stop_ids()));
+
+-- =====================================================
+-- TRANSPORTATION / TRIP BUDGETS POLICIES
+-- =====================================================
+DROP POLICY IF EXISTS "Users can view transportation for own trips" ON public.transportation;
+DROP POLICY IF EXISTS "Anyone can view transportation for public trips" ON public.transportation;
+DROP POLICY IF EXISTS "Users can manage transportation for own trips" ON public.transportation;
+
+CREATE POLICY "Users can view transportation for own trips"
+    ON public.transportation FOR SELECT
+    USING (trip_id IN (SELECT public.user_trip_ids()));
+
+CREATE POLICY "Anyone can view transportation for public trips"
+    ON public.transportation FOR SELECT
+    USING (public.is_public_trip(trip_id));
+
+CREATE POLICY "Users can manage transportation for own trips"
+    ON public.transportation FOR ALL
+    USING (trip_id IN (SELECT public.user_trip_ids()));
+
+DROP POLICY IF EXISTS "Users can view budget for own trips" ON public.trip_budgets;
+DROP POLICY IF EXISTS "Anyone can view budget for public trips" ON public.trip_budgets;
+DROP POLICY IF EXISTS "Users can manage budget for own trips" ON public.trip_budgets;
+
+CREATE POLICY "Users can view budget for own trips"
+    ON public.trip_budgets FOR SELECT
+    USING (trip_id IN (SELECT public.user_trip_ids()));
+
+CREATE POLICY "Anyone can view budget for public trips"
+    ON public.trip_budgets FOR SELECT
+    USING (public.is_public_trip(trip_id));
+
+CREATE POLICY "Users can manage budget for own trips"
+    ON public.trip_budgets FOR ALL
+    USING (trip_id IN (SELECT public.user_trip_ids()));
@@ -0,0 +1,248 @@
+-- Migration 002: denormalized ownership columns on trip child tables
+-- Run after 001_hot_path_indexes_and_rls.sql, in the Supabase SQL Editor.
+-- Verify with migrations/checks/002_explain_ownership.sql
+--
+-- stops get user_id; activities, accommodations and meals get trip_id and
+-- user_id. Triggers always derive them from the parent row (client-supplied
+-- values are overwritten), so ownership checks and RLS policies become a
+-- single equality on the row itself instead of a join back to trips.
+
+-- =====================================================
+-- COLUMNS
+-- =====================================================
+ALTER TABLE public.stops
+    ADD COLUMN IF NOT EXISTS user_id UUID REFERENCES public.users(id) ON DELETE CASCADE;
+
+ALTER TABLE public.activities
+    ADD COLUMN IF NOT EXISTS trip_id UUID REFERENCES public.trips(id) ON DELETE CASCADE,
+    ADD COLUMN IF NOT EXISTS user_id UUID REFERENCES public.users(id) ON DELETE CASCADE;
+
+ALTER TABLE public.accommodations
+    ADD COLUMN IF NOT EXISTS trip_id UUID REFERENCES public.trips(id) ON DELETE CASCADE,
+    ADD COLUMN IF NOT EXISTS user_id UUID REFERENCES public.users(id) ON DELETE CASCADE;
+
+ALTER TABLE public.meals
+    ADD COLUMN IF NOT EXISTS trip_id UUID REFERENCES public.trips(id) ON DELETE CASCADE,
+    ADD COLUMN IF NOT EXISTS user_id UUID REFERENCES public.users(id) ON DELETE CASCADE;
+
+-- =====================================================
+-- BACKFILL
+-- =====================================================
+-- Runs before the ownership triggers exist; updated_at triggers are paused so
+-- the backfill does not look like a user edit.
+ALTER TABLE public.stops DISABLE TRIGGER update_stops_updated_at;
+ALTER TABLE public.activities DISABLE TRIGGER update_activities_updated_at;
+ALTER TABLE public.accommodations DISABLE TRIGGER update_accommodations_updated_at;
+ALTER TABLE public.meals DISABLE TRIGGER update_meals_updated_at;
+
+UPDATE public.stops
+SET user_id = trips.user_id
+FROM public.trips
+WHERE trips.id = stops.trip_id
+  AND stops.user_id IS DISTINCT FROM trips.user_id;
+
+UPDATE public.activities
+SET trip_id = stops.trip_id, user_id = stops.user_id
+FROM public.stops
+WHERE stops.id = activities.stop_id
+  AND (activities.trip_id IS DISTINCT FROM stops.trip_id OR activities.user_id IS DISTINCT FROM stops.user_id);
+
+UPDATE public.accommodations
+SET trip_id = stops.trip_id, user_id = stops.user_id
+FROM public.stops
+WHERE stops.id = accommodations.stop_id
+  AND (accommodations.trip_id IS DISTINCT FROM stops.trip_id OR accommodations.user_id IS DISTINCT FROM stops.user_id);
+
+UPDATE public.meals
+SET trip_id = stops.trip_id, user_id = stops.user_id
+FROM public.stops
+WHERE stops.id = meals.stop_id
+  AND (meals.trip_id IS DISTINCT FROM stops.trip_id OR meals.user_id IS DISTINCT FROM stops.user_id);
+
+ALTER TABLE public.stops ENABLE TRIGGER update_stops_updated_at;
+ALTER TABLE public.activities ENABLE TRIGGER update_activities_updated_at;
+ALTER TABLE public.accommodations ENABLE TRIGGER update_accommodations_updated_at;
+ALTER TABLE public.meals ENABLE TRIGGER update_meals_updated_at;
+
+ALTER TABLE public.stops ALTER COLUMN user_id SET NOT NULL;
+ALTER TABLE public.activities ALTER COLUMN trip_id SET NOT NULL, ALTER COLUMN user_id SET NOT NULL;
+ALTER TABLE public.accommodations ALTER COLUMN trip_id SET NOT NULL, ALTER COLUMN user_id SET NOT NULL;
+ALTER TABLE public.meals ALTER COLUMN trip_id SET NOT NULL, ALTER COLUMN user_id SET NOT NULL;
+
+-- =====================================================
+-- INDEXES
+-- =====================================================
+CREATE INDEX IF NOT EXISTS idx_stops_user_id ON public.stops(user_id);
+CREATE INDEX IF NOT EXISTS idx_activities_user_id ON public.activities(user_id);
+CREATE INDEX IF NOT EXISTS idx_activities_trip_id ON public.activities(trip_id);
+CREATE INDEX IF NOT EXISTS idx_accommodations_user_id ON public.accommodations(user_id);
+CREATE INDEX IF NOT EXISTS idx_accommodations_trip_id ON public.accommodations(trip_id);
+CREATE INDEX IF NOT EXISTS idx_meals_user_id ON public.meals(user_id);
+CREATE INDEX IF NOT EXISTS idx_meals_trip_id ON public.meals(trip_id);
+
+-- =====================================================
+-- TRIGGERS
+-- =====================================================
+
+-- Derive stops.user_id from the trip
+CREATE OR REPLACE FUNCTION public.set_stop_owner()
+RETURNS TRIGGER AS $$
+BEGIN
+    SELECT user_id INTO NEW.user_id FROM public.trips WHERE id = NEW.trip_id;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE TRIGGER set_stops_owner
+    BEFORE INSERT OR UPDATE OF trip_id, user_id ON public.stops
+    FOR EACH ROW
+    EXECUTE FUNCTION public.set_stop_owner();
+
+-- Derive trip_id / user_id of stop children from the stop
+CREATE OR REPLACE FUNCTION public.set_stop_child_owner()
+RETURNS TRIGGER AS $$
+BEGIN
+    SELECT trip_id, user_id INTO NEW.trip_id, NEW.user_id FROM public.stops WHERE id = NEW.stop_id;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE TRIGGER set_activities_owner
+    BEFORE INSERT OR UPDATE OF stop_id, trip_id, user_id ON public.activities
+    FOR EACH ROW
+    EXECUTE FUNCTION public.set_stop_child_owner();
+
+CREATE TRIGGER set_accommodations_owner
+    BEFORE INSERT OR UPDATE OF stop_id, trip_id, user_id ON public.accommodations
+    FOR EACH ROW
+    EXECUTE FUNCTION public.set_stop_child_owner();
+
+CREATE TRIGGER set_meals_owner
+    BEFORE INSERT OR UPDATE OF stop_id, trip_id, user_id ON public.meals
+    FOR EACH ROW
+    EXECUTE FUNCTION public.set_stop_child_owner();
+
+-- Propagate a trip changing owner, or a stop moving to another trip
+CREATE OR REPLACE FUNCTION public.propagate_trip_owner()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE public.stops SET user_id = NEW.user_id WHERE trip_id = NEW.id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE TRIGGER propagate_trips_owner
+    AFTER UPDATE OF user_id ON public.trips
+    FOR EACH ROW
+    WHEN (OLD.user_id IS DISTINCT FROM NEW.user_id)
+    EXECUTE FUNCTION public.propagate_trip_owner();
+
+CREATE OR REPLACE FUNCTION public.propagate_stop_owner()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE public.activities SET trip_id = NEW.trip_id, user_id = NEW.user_id WHERE stop_id = NEW.id;
+    UPDATE public.accommodations SET trip_id = NEW.trip_id, user_id = NEW.user_id WHERE stop_id = NEW.id;
+    UPDATE public.meals SET trip_id = NEW.trip_id, user_id = NEW.user_id WHERE stop_id = NEW.id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE TRIGGER propagate_stops_owner
+    AFTER UPDATE OF trip_id, user_id ON public.stops
+    FOR EACH ROW
+    WHEN (OLD.trip_id IS DISTINCT FROM NEW.trip_id OR OLD.user_id IS DISTINCT FROM NEW.user_id)
+    EXECUTE FUNCTION public.propagate_stop_owner();
+
+-- =====================================================
+-- POLICIES
+-- =====================================================
+-- Owner checks compare the row's own user_id (BEFORE triggers run ahead of
+-- WITH CHECK, so inserts are checked against the derived owner). Public reads
+-- use the trip's primary key directly instead of going through stops.
+
+DROP POLICY IF EXISTS "Users can view own trip stops" ON public.stops;
+DROP POLICY IF EXISTS "Users can insert own trip stops" ON public.stops;
+DROP POLICY IF EXISTS "Users can update own trip stops" ON public.stops;
+DROP POLICY IF EXISTS "Users can delete own trip stops" ON public.stops;
+
+CREATE POLICY "Users can view own trip stops"
+    ON public.stops FOR SELECT
+    USING (user_id = (SELECT auth.uid()));
+
+CREATE POLICY "Users can insert own trip stops"
+    ON public.stops FOR INSERT
+    WITH CHECK (user_id = (SELECT auth.uid()));
+
+CREATE POLICY "Users can update own trip stops"
+    ON public.stops FOR UPDATE
+    USING (user_id = (SELECT auth.uid()))
+    WITH CHECK (user_id = (SELECT auth.uid()));
+
+CREATE POLICY "Users can delete own trip stops"
+    ON public.stops FOR DELETE
+    USING (user_id = (SELECT auth.uid()));
+
+DROP POLICY IF EXISTS "Users can view own trip activities" ON public.activities;
+DROP POLICY IF EXISTS "Anyone can view public trip activities" ON public.activities;
+DROP POLICY IF EXISTS "Users can insert own trip activities" ON public.activities;
+DROP POLICY IF EXISTS "Users can update own trip activities" ON public.activities;
+DROP POLICY IF EXISTS "Users can delete own trip activities" ON public.activities;
+
+CREATE POLICY "Users can view own trip activities"
+    ON public.activities FOR SELECT
+    USING (user_id = (SELECT auth.uid()));
+
+CREATE POLICY "Anyone can view public trip activities"
+    ON public.activities FOR SELECT
+    USING (public.is_public_trip(trip_id));
+
+CREATE POLICY "Users can insert own trip activities"
+    ON public.activities FOR INSERT
+    WITH CHECK (user_id = (SELECT auth.uid()));
+
+CREATE POLICY "Users can update own trip activities"
+    ON public.activities FOR UPDATE
+    USING (user_id = (SELECT auth.uid()))
+    WITH CHECK (user_id = (SELECT auth.uid()));
+
+CREATE POLICY "Users can delete own trip activities"
+    ON public.activities FOR DELETE
+    USING (user_id = (SELECT auth.uid()));
+
+DROP POLICY IF EXISTS "Users can view accommodations for own trips" ON public.accommodations;
+DROP POLICY IF EXISTS "Anyone can view accommodations for public trips" ON public.accommodations;
+DROP POLICY IF EXISTS "Users can manage accommodations for own trips" ON public.accommodations;
+
+CREATE POLICY "Users can view accommodations for own trips"
+    ON public.accommodations FOR SELECT
+    USING (user_id = (SELECT auth.uid()));
+
+CREATE POLICY "Anyone can view accommodations for public trips"
+    ON public.accommodations FOR SELECT
+    USING (public.is_public_trip(trip_id));
+
+CREATE POLICY "Users can manage accommodations for own trips"
+    ON public.accommodations FOR ALL
+    USING (user_id = (SELECT auth.uid()))
+    WITH CHECK (user_id = (SELECT auth.uid()));
+
+DROP POLICY IF EXISTS "Users can view meals for own trips" ON public.meals;
+DROP POLICY IF EXISTS "Anyone can view meals for public trips" ON public.meals;
+DROP POLICY IF EXISTS "Users can manage meals for own trips" ON public.meals;
+
+CREATE POLICY "Users can view meals for own trips"
+    ON public.meals FOR SELECT
+    USING (user_id = (SELECT auth.uid()));
+
+CREATE POLICY "Anyone can view meals for public trips"
+    ON public.meals FOR SELECT
+    USING (public.is_public_trip(trip_id));
+
+CREATE POLICY "Users can manage meals for own trips"
+    ON public.meals FOR ALL
+    USING (user_id = (SELECT auth.uid()))
+    WITH CHECK (user_id = (SELECT auth.uid()));
+
+-- No policy references the stop-level helpers any more
+DROP FUNCTION IF EXISTS public.user_stop_ids();
+DROP FUNCTION IF EXISTS public.is_public_stop(UUID);
@@ -0,0 +1,290 @@
+-- Migration 003: incremental platform_metrics aggregation
+-- Run after 002_denormalized_ownership.sql, in the Supabase SQL Editor
+-- (as one script: the seed below relies on running in a single transaction).
+--
+-- Triggers on users, trips, stops and activities append signed deltas to
+-- platform_metrics_deltas (+1 on insert, -old +new on update, -1 on delete).
+-- refresh_platform_metrics() folds the deltas past its watermark into running
+-- totals and upserts today's platform_metrics row, so it only touches rows
+-- changed since the previous run. The app calls it on a schedule
+-- (METRICS_REFRESH_INTERVAL_SECONDS); pg_cron works too, see the end of file.
+
+-- =====================================================
+-- TABLES
+-- =====================================================
+
+-- Pending changes; the id is the watermark
+CREATE TABLE IF NOT EXISTS public.platform_metrics_deltas (
+    id BIGSERIAL PRIMARY KEY,
+    metric TEXT NOT NULL,
+    key TEXT NOT NULL DEFAULT '',
+    delta NUMERIC NOT NULL
+);
+
+-- Running totals: one row per metric, or per metric and key
+-- ('new_users' / 'new_trips' by date, 'destination' and 'activity_type' by value)
+CREATE TABLE IF NOT EXISTS public.platform_metric_totals (
+    metric TEXT NOT NULL,
+    key TEXT NOT NULL DEFAULT '',
+    value NUMERIC NOT NULL DEFAULT 0,
+    PRIMARY KEY (metric, key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_platform_metric_totals_ranking
+    ON public.platform_metric_totals(metric, value DESC);
+
+-- Service role only (no policies)
+ALTER TABLE public.platform_metrics_deltas ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.platform_metric_totals ENABLE ROW LEVEL SECURITY;
+
+-- Stops count towards a destination by catalog id, or by name when unlinked
+CREATE OR REPLACE FUNCTION public.stop_destination_key(p_destination_id UUID, p_name TEXT)
+RETURNS TEXT
+LANGUAGE sql IMMUTABLE
+AS $$
+    SELECT COALESCE(p_destination_id::text, 'name:' || lower(trim(p_name)));
+$$;
+
+-- =====================================================
+-- SEED
+-- =====================================================
+-- One full scan at migration time; every later refresh is incremental.
+-- Writes to the tracked tables wait on the SHARE locks until the migration
+-- commits, so no change is both in the seed and in a delta.
+LOCK TABLE public.users, public.trips, public.stops, public.activities IN SHARE MODE;
+
+INSERT INTO public.platform_metric_totals (metric, key, value)
+SELECT 'users', '', COUNT(*) FROM public.users
+UNION ALL
+SELECT 'new_users', created_at::date::text, COUNT(*) FROM public.users GROUP BY created_at::date
+UNION ALL
+SELECT 'trips', '', COUNT(*) FROM public.trips
+UNION ALL
+SELECT 'new_trips', created_at::date::text, COUNT(*) FROM public.trips GROUP BY created_at::date
+UNION ALL
+SELECT 'public_trips', '', COUNT(*) FILTER (WHERE is_public) FROM public.trips
+UNION ALL
+SELECT 'trip_days', '', COALESCE(SUM(end_date - start_date + 1), 0) FROM public.trips
+UNION ALL
+SELECT 'stops', '', COUNT(*) FROM public.stops
+UNION ALL
+SELECT 'destination', public.stop_destination_key(destination_id, name), COUNT(*)
+FROM public.stops GROUP BY 1, 2
+UNION ALL
+SELECT 'activities', '', COUNT(*) FROM public.activities
+UNION ALL
+SELECT 'activity_type', COALESCE(activity_type, 'other'), COUNT(*)
+FROM public.activities GROUP BY 1, 2
+ON CONFLICT (metric, key) DO NOTHING;
+
+-- =====================================================
+-- DELTA TRIGGERS
+-- =====================================================
+
+CREATE OR REPLACE FUNCTION public.track_user_metrics()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO public.platform_metrics_deltas (metric, key, delta) VALUES
+            ('users', '', 1),
+            ('new_users', NEW.created_at::date::text, 1);
+    ELSE
+        INSERT INTO public.platform_metrics_deltas (metric, key, delta) VALUES
+            ('users', '', -1),
+            ('new_users', OLD.created_at::date::text, -1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE TRIGGER track_users_metrics
+    AFTER INSERT OR DELETE ON public.users
+    FOR EACH ROW
+    EXECUTE FUNCTION public.track_user_metrics();
+
+CREATE OR REPLACE FUNCTION public.track_trip_metrics()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO public.platform_metrics_deltas (metric, key, delta) VALUES
+            ('trips', '', -1),
+            ('new_trips', OLD.created_at::date::text, -1),
+            ('public_trips', '', CASE WHEN OLD.is_public THEN -1 ELSE 0 END),
+            ('trip_days', '', -(OLD.end_date - OLD.start_date + 1));
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO public.platform_metrics_deltas (metric, key, delta) VALUES
+            ('trips', '', 1),
+            ('new_trips', NEW.created_at::date::text, 1),
+            ('public_trips', '', CASE WHEN NEW.is_public THEN 1 ELSE 0 END),
+            ('trip_days', '', NEW.end_date - NEW.start_date + 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE TRIGGER track_trips_metrics
+    AFTER INSERT OR DELETE ON public.trips
+    FOR EACH ROW
+    EXECUTE FUNCTION public.track_trip_metrics();
+
+CREATE TRIGGER track_trips_metrics_update
+    AFTER UPDATE OF is_public, start_date, end_date ON public.trips
+    FOR EACH ROW
+    WHEN (OLD.is_public IS DISTINCT FROM NEW.is_public
+          OR OLD.start_date IS DISTINCT FROM NEW.start_date
+          OR OLD.end_date IS DISTINCT FROM NEW.end_date)
+    EXECUTE FUNCTION public.track_trip_metrics();
+
+CREATE OR REPLACE FUNCTION public.track_stop_metrics()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO public.platform_metrics_deltas (metric, key, delta) VALUES
+            ('stops', '', -1),
+            ('destination', public.stop_destination_key(OLD.destination_id, OLD.name), -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO public.platform_metrics_deltas (metric, key, delta) VALUES
+            ('stops', '', 1),
+            ('destination', public.stop_destination_key(NEW.destination_id, NEW.name), 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE TRIGGER track_stops_metrics
+    AFTER INSERT OR DELETE ON public.stops
+    FOR EACH ROW
+    EXECUTE FUNCTION public.track_stop_metrics();
+
+CREATE TRIGGER track_stops_metrics_update
+    AFTER UPDATE OF destination_id, name ON public.stops
+    FOR EACH ROW
+    WHEN (OLD.destination_id IS DISTINCT FROM NEW.destination_id OR OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE FUNCTION public.track_stop_metrics();
+
+CREATE OR REPLACE FUNCTION public.track_activity_metrics()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO public.platform_metrics_deltas (metric, key, delta) VALUES
+            ('activities', '', -1),
+            ('activity_type', COALESCE(OLD.activity_type, 'other'), -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO public.platform_metrics_deltas (metric, key, delta) VALUES
+            ('activities', '', 1),
+            ('activity_type', COALESCE(NEW.activity_type, 'other'), 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE TRIGGER track_activities_metrics
+    AFTER INSERT OR DELETE ON public.activities
+    FOR EACH ROW
+    EXECUTE FUNCTION public.track_activity_metrics();
+
+CREATE TRIGGER track_activities_metrics_update
+    AFTER UPDATE OF activity_type ON public.activities
+    FOR EACH ROW
+    WHEN (OLD.activity_type IS DISTINCT FROM NEW.activity_type)
+    EXECUTE FUNCTION public.track_activity_metrics();
+
+-- =====================================================
+-- REFRESH
+-- =====================================================
+
+CREATE OR REPLACE FUNCTION public.refresh_platform_metrics()
+RETURNS SETOF public.platform_metrics AS $$
+DECLARE
+    v_watermark BIGINT;
+    v_trips NUMERIC;
+BEGIN
+    -- One refresh at a time; concurrent callers just read the current row
+    IF pg_try_advisory_xact_lock(hashtext('refresh_platform_metrics')) THEN
+        SELECT MAX(id) INTO v_watermark FROM public.platform_metrics_deltas;
+
+        IF v_watermark IS NOT NULL THEN
+            -- Fold exactly the rows that are deleted: a delta with a lower id
+            -- committed after a separate read would otherwise be lost
+            WITH moved AS (
+                DELETE FROM public.platform_metrics_deltas
+                WHERE id <= v_watermark
+                RETURNING metric, key, delta
+            )
+            INSERT INTO public.platform_metric_totals (metric, key, value)
+            SELECT metric, key, SUM(delta)
+            FROM moved
+            GROUP BY metric, key
+            ON CONFLICT (metric, key) DO UPDATE
+                SET value = platform_metric_totals.value + EXCLUDED.value;
+
+            DELETE FROM public.platform_metric_totals WHERE value = 0 AND key <> '';
+        END IF;
+
+        SELECT value INTO v_trips FROM public.platform_metric_totals WHERE metric = 'trips' AND key = '';
+
+        INSERT INTO public.platform_metrics (
+            metric_date, total_users, new_users_today, total_trips, new_trips_today,
+            total_public_trips, total_activities, popular_destinations, popular_activities,
+            average_trip_duration, average_stops_per_trip
+        )
+        SELECT
+            CURRENT_DATE,
+            COALESCE(MAX(value) FILTER (WHERE metric = 'users'), 0),
+            COALESCE(MAX(value) FILTER (WHERE metric = 'new_users' AND key = CURRENT_DATE::text), 0),
+            COALESCE(MAX(value) FILTER (WHERE metric = 'trips'), 0),
+            COALESCE(MAX(value) FILTER (WHERE metric = 'new_trips' AND key = CURRENT_DATE::text), 0),
+            COALESCE(MAX(value) FILTER (WHERE metric = 'public_trips'), 0),
+            COALESCE(MAX(value) FILTER (WHERE metric = 'activities'), 0),
+            (
+                SELECT COALESCE(jsonb_agg(jsonb_build_object(
+                    'destination_id', CASE WHEN key LIKE 'name:%' THEN NULL ELSE key END,
+                    'name', CASE WHEN key LIKE 'name:%' THEN substr(key, 6) END,
+                    'count', value
+                ) ORDER BY value DESC), '[]'::jsonb)
+                FROM (
+                    SELECT key, value FROM public.platform_metric_totals
+                    WHERE metric = 'destination' ORDER BY value DESC LIMIT 10
+                ) top
+            ),
+            (
+                SELECT COALESCE(jsonb_agg(jsonb_build_object(
+                    'activity_type', key, 'count', value
+                ) ORDER BY value DESC), '[]'::jsonb)
+                FROM (
+                    SELECT key, value FROM public.platform_metric_totals
+                    WHERE metric = 'activity_type' ORDER BY value DESC LIMIT 10
+                ) top
+            ),
+            ROUND(MAX(value) FILTER (WHERE metric = 'trip_days') / NULLIF(v_trips, 0), 2),
+            ROUND(MAX(value) FILTER (WHERE metric = 'stops') / NULLIF(v_trips, 0), 2)
+        FROM public.platform_metric_totals
+        WHERE key = '' OR key = CURRENT_DATE::text
+        ON CONFLICT (metric_date) DO UPDATE SET
+            total_users = EXCLUDED.total_users,
+            new_users_today = EXCLUDED.new_users_today,
+            total_trips = EXCLUDED.total_trips,
+            new_trips_today = EXCLUDED.new_trips_today,
+            total_public_trips = EXCLUDED.total_public_trips,
+            total_activities = EXCLUDED.total_activities,
+            popular_destinations = EXCLUDED.popular_destinations,
+            popular_activities = EXCLUDED.popular_activities,
+            average_trip_duration = EXCLUDED.average_trip_duration,
+            average_stops_per_trip = EXCLUDED.average_stops_per_trip;
+    END IF;
+
+    RETURN QUERY SELECT * FROM public.platform_metrics WHERE metric_date = CURRENT_DATE;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+REVOKE EXECUTE ON FUNCTION public.refresh_platform_metrics() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.refresh_platform_metrics() TO service_role;
+
+SELECT public.refresh_platform_metrics();
+
+-- Optional: schedule in the database instead of the app
+-- (Database > Extensions > pg_cron, then)
+-- SELECT cron.schedule('refresh-platform-metrics', '*/5 * * * *', 'SELECT public.refresh_platform_metrics()');
@@ -0,0 +1,248 @@
+-- Migration 004: keep destinations / activity_catalog popularity_score current
+-- Run after 003_platform_metrics_aggregation.sql, in the Supabase SQL Editor
+-- (as one script: the backfill below relies on running in a single transaction).
+--
+-- popularity_score counts the stops linked to a destination and the activities
+-- linked to a catalog activity. Triggers append +1 / -1 to popularity_deltas
+-- as rows are added, removed or relinked, so adding a stop never waits on a
+-- popular destination's row lock. fold_popularity() applies the pending deltas
+-- in one UPDATE per table; the API calls it before each leaderboard reload
+-- (LEADERBOARD_REFRESH_SECONDS). A popularity-only change leaves updated_at
+-- alone, so incremental catalog readers (map clusters) do not refetch rows
+-- whose content did not change.
+--
+-- popularity_leaderboard() returns the top-K per region from the catalog
+-- tables only; the API keeps it in memory (app/services/leaderboard.py), so
+-- /search/popular never aggregates stops.
+
+-- =====================================================
+-- TABLES
+-- =====================================================
+
+-- Pending score changes; kind is 'destination' or 'activity', the id is the watermark
+CREATE TABLE IF NOT EXISTS public.popularity_deltas (
+    id BIGSERIAL PRIMARY KEY,
+    kind TEXT NOT NULL,
+    item_id UUID NOT NULL,
+    delta INTEGER NOT NULL
+);
+
+-- Service role only (no policies)
+ALTER TABLE public.popularity_deltas ENABLE ROW LEVEL SECURITY;
+
+-- =====================================================
+-- TRIGGERS
+-- =====================================================
+
+CREATE OR REPLACE FUNCTION public.track_destination_popularity()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.destination_id IS NOT NULL THEN
+        INSERT INTO public.popularity_deltas (kind, item_id, delta)
+        VALUES ('destination', OLD.destination_id, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.destination_id IS NOT NULL THEN
+        INSERT INTO public.popularity_deltas (kind, item_id, delta)
+        VALUES ('destination', NEW.destination_id, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE TRIGGER track_stops_destination_popularity
+    AFTER INSERT OR DELETE ON public.stops
+    FOR EACH ROW
+    EXECUTE FUNCTION public.track_destination_popularity();
+
+CREATE TRIGGER track_stops_destination_popularity_update
+    AFTER UPDATE OF destination_id ON public.stops
+    FOR EACH ROW
+    WHEN (OLD.destination_id IS DISTINCT FROM NEW.destination_id)
+    EXECUTE FUNCTION public.track_destination_popularity();
+
+CREATE OR REPLACE FUNCTION public.track_catalog_activity_popularity()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.catalog_activity_id IS NOT NULL THEN
+        INSERT INTO public.popularity_deltas (kind, item_id, delta)
+        VALUES ('activity', OLD.catalog_activity_id, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.catalog_activity_id IS NOT NULL THEN
+        INSERT INTO public.popularity_deltas (kind, item_id, delta)
+        VALUES ('activity', NEW.catalog_activity_id, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE TRIGGER track_activities_catalog_popularity
+    AFTER INSERT OR DELETE ON public.activities
+    FOR EACH ROW
+    EXECUTE FUNCTION public.track_catalog_activity_popularity();
+
+CREATE TRIGGER track_activities_catalog_popularity_update
+    AFTER UPDATE OF catalog_activity_id ON public.activities
+    FOR EACH ROW
+    WHEN (OLD.catalog_activity_id IS DISTINCT FROM NEW.catalog_activity_id)
+    EXECUTE FUNCTION public.track_catalog_activity_popularity();
+
+-- =====================================================
+-- UPDATED_AT
+-- =====================================================
+-- Same as update_updated_at_column(), but a change to popularity_score alone
+-- is not an edit of the destination or catalog activity
+
+CREATE OR REPLACE FUNCTION public.update_catalog_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF to_jsonb(NEW) - 'popularity_score' - 'updated_at'
+        IS DISTINCT FROM to_jsonb(OLD) - 'popularity_score' - 'updated_at' THEN
+        NEW.updated_at = NOW();
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS update_destinations_updated_at ON public.destinations;
+CREATE TRIGGER update_destinations_updated_at
+    BEFORE UPDATE ON public.destinations
+    FOR EACH ROW
+    EXECUTE FUNCTION public.update_catalog_updated_at();
+
+DROP TRIGGER IF EXISTS update_activity_catalog_updated_at ON public.activity_catalog;
+CREATE TRIGGER update_activity_catalog_updated_at
+    BEFORE UPDATE ON public.activity_catalog
+    FOR EACH ROW
+    EXECUTE FUNCTION public.update_catalog_updated_at();
+
+-- =====================================================
+-- BACKFILL (one full count at migration time)
+-- =====================================================
+-- Writes to stops and activities wait on the SHARE locks until the migration
+-- commits, so no change is both in the count and in a delta.
+LOCK TABLE public.stops, public.activities IN SHARE MODE;
+
+UPDATE public.destinations d
+SET popularity_score = COALESCE(c.count, 0)
+FROM (
+    SELECT destinations.id, COUNT(stops.id) AS count
+    FROM public.destinations
+    LEFT JOIN public.stops ON stops.destination_id = destinations.id
+    GROUP BY destinations.id
+) c
+WHERE c.id = d.id AND d.popularity_score IS DISTINCT FROM c.count;
+
+UPDATE public.activity_catalog a
+SET popularity_score = COALESCE(c.count, 0)
+FROM (
+    SELECT activity_catalog.id, COUNT(activities.id) AS count
+    FROM public.activity_catalog
+    LEFT JOIN public.activities ON activities.catalog_activity_id = activity_catalog.id
+    GROUP BY activity_catalog.id
+) c
+WHERE c.id = a.id AND a.popularity_score IS DISTINCT FROM c.count;
+
+-- =====================================================
+-- INDEXES
+-- =====================================================
+CREATE INDEX IF NOT EXISTS idx_destinations_region_popularity
+    ON public.destinations(region, popularity_score DESC);
+CREATE INDEX IF NOT EXISTS idx_activity_catalog_popularity
+    ON public.activity_catalog(popularity_score DESC);
+CREATE INDEX IF NOT EXISTS idx_stops_destination_id
+    ON public.stops(destination_id) WHERE destination_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_activities_catalog_activity_id
+    ON public.activities(catalog_activity_id) WHERE catalog_activity_id IS NOT NULL;
+
+-- =====================================================
+-- FOLD
+-- =====================================================
+
+CREATE OR REPLACE FUNCTION public.fold_popularity()
+RETURNS void AS $$
+BEGIN
+    -- One fold at a time; concurrent callers skip, the next run picks up their deltas
+    IF NOT pg_try_advisory_xact_lock(hashtext('fold_popularity')) THEN
+        RETURN;
+    END IF;
+
+    -- Fold exactly the rows that are deleted, one UPDATE per changed item
+    WITH moved AS (
+        DELETE FROM public.popularity_deltas
+        RETURNING kind, item_id, delta
+    ),
+    totals AS (
+        SELECT kind, item_id, SUM(delta) AS delta
+        FROM moved
+        GROUP BY kind, item_id
+        HAVING SUM(delta) <> 0
+    ),
+    destinations_updated AS (
+        UPDATE public.destinations d
+        SET popularity_score = GREATEST(d.popularity_score + t.delta, 0)
+        FROM totals t
+        WHERE t.kind = 'destination' AND d.id = t.item_id
+    )
+    UPDATE public.activity_catalog a
+    SET popularity_score = GREATEST(a.popularity_score + t.delta, 0)
+    FROM totals t
+    WHERE t.kind = 'activity' AND a.id = t.item_id;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+REVOKE EXECUTE ON FUNCTION public.fold_popularity() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.fold_popularity() TO service_role;
+
+-- Optional: fold in the database as well
+-- (Database > Extensions > pg_cron, then)
+-- SELECT cron.schedule('fold-popularity', '* * * * *', 'SELECT public.fold_popularity()');
+
+-- =====================================================
+-- LEADERBOARD
+-- =====================================================
+-- Top p_limit destinations and catalog activities per region, plus overall
+-- (region NULL). Reads the catalog tables only.
+CREATE OR REPLACE FUNCTION public.popularity_leaderboard(p_limit INTEGER DEFAULT 50)
+RETURNS TABLE (
+    kind TEXT,
+    id UUID,
+    name TEXT,
+    country TEXT,
+    region TEXT,
+    category TEXT,
+    destination_id UUID,
+    score INTEGER
+)
+LANGUAGE sql STABLE
+SET search_path = public
+AS $$
+    WITH destination_scores AS (
+        SELECT id, name, country, region, popularity_score
+        FROM public.destinations
+        WHERE popularity_score > 0
+    ),
+    activity_scores AS (
+        SELECT a.id, a.name, d.country, d.region, a.category, a.destination_id, a.popularity_score
+        FROM public.activity_catalog a
+        LEFT JOIN public.destinations d ON d.id = a.destination_id
+        WHERE a.popularity_score > 0
+    ),
+    ranked AS (
+        SELECT 'destination' AS kind, id, name, country, region, NULL::text AS category,
+               id AS destination_id, popularity_score,
+               ROW_NUMBER() OVER (PARTITION BY region ORDER BY popularity_score DESC, id) AS region_rank,
+               ROW_NUMBER() OVER (ORDER BY popularity_score DESC, id) AS overall_rank
+        FROM destination_scores
+        UNION ALL
+        SELECT 'activity', id, name, country, region, category,
+               destination_id, popularity_score,
+               ROW_NUMBER() OVER (PARTITION BY region ORDER BY popularity_score DESC, id),
+               ROW_NUMBER() OVER (ORDER BY popularity_score DESC, id)
+        FROM activity_scores
+    )
+    SELECT kind, id, name, country, region, category, destination_id, popularity_score
+    FROM ranked
+    WHERE region_rank <= p_limit OR overall_rank <= p_limit;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.popularity_leaderboard(INTEGER) TO anon, authenticated;
@@ -0,0 +1,109 @@
+-- Migration 005: copy a trip with all its children in one transaction
+-- Run after 004_popularity_leaderboard.sql, in the Supabase SQL Editor.
+--
+-- clone_trip() copies the trip, stops, activities, accommodations, meals and
+-- transportation for p_user_id. New IDs are derived with uuid_generate_v5 from
+-- the new trip id and the old row id, so references between copied rows
+-- (stop_id, from_stop_id, to_stop_id) are remapped without a lookup table.
+-- With p_start_date every date and timestamp is shifted by the same number
+-- of days. The API checks access first and calls it with the service key.
+
+CREATE OR REPLACE FUNCTION public.clone_trip(
+    p_source_trip_id UUID,
+    p_user_id UUID,
+    p_name TEXT DEFAULT NULL,
+    p_start_date DATE DEFAULT NULL
+)
+RETURNS SETOF public.trips
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, extensions
+AS $$
+DECLARE
+    v_source public.trips%ROWTYPE;
+    v_trip_id UUID := uuid_generate_v4();
+    v_shift INTEGER;
+BEGIN
+    SELECT * INTO v_source FROM public.trips WHERE id = p_source_trip_id;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Trip % not found', p_source_trip_id USING ERRCODE = 'no_data_found';
+    END IF;
+
+    v_shift := COALESCE(p_start_date - v_source.start_date, 0);
+
+    INSERT INTO public.trips (id, user_id, name, start_date, end_date, photo_url, description, is_public, share_token)
+    VALUES (
+        v_trip_id, p_user_id, COALESCE(p_name, v_source.name),
+        v_source.start_date + v_shift, v_source.end_date + v_shift,
+        v_source.photo_url, v_source.description, FALSE, NULL
+    );
+
+    INSERT INTO public.stops (
+        id, trip_id, destination_id, name, location, latitude, longitude,
+        arrival_date, departure_date, "order", notes
+    )
+    SELECT
+        uuid_generate_v5(v_trip_id, s.id::text), v_trip_id, s.destination_id, s.name, s.location,
+        s.latitude, s.longitude, s.arrival_date + v_shift, s.departure_date + v_shift, s."order", s.notes
+    FROM public.stops s
+    WHERE s.trip_id = p_source_trip_id;
+
+    INSERT INTO public.activities (
+        id, stop_id, catalog_activity_id, name, description, activity_type, scheduled_date,
+        scheduled_time, duration_minutes, cost, currency, location, latitude, longitude,
+        foursquare_id, "order"
+    )
+    SELECT
+        uuid_generate_v5(v_trip_id, a.id::text), uuid_generate_v5(v_trip_id, a.stop_id::text),
+        a.catalog_activity_id, a.name, a.description, a.activity_type, a.scheduled_date + v_shift,
+        a.scheduled_time, a.duration_minutes, a.cost, a.currency, a.location, a.latitude, a.longitude,
+        a.foursquare_id, a."order"
+    FROM public.activities a
+    WHERE a.trip_id = p_source_trip_id;
+
+    INSERT INTO public.accommodations (
+        id, stop_id, name, type, address, check_in_date, check_out_date, cost_per_night,
+        total_cost, currency, rating, photo_url, booking_url, latitude, longitude, notes
+    )
+    SELECT
+        uuid_generate_v5(v_trip_id, h.id::text), uuid_generate_v5(v_trip_id, h.stop_id::text),
+        h.name, h.type, h.address, h.check_in_date + v_shift, h.check_out_date + v_shift,
+        h.cost_per_night, h.total_cost, h.currency, h.rating, h.photo_url, h.booking_url,
+        h.latitude, h.longitude, h.notes
+    FROM public.accommodations h
+    WHERE h.trip_id = p_source_trip_id;
+
+    INSERT INTO public.meals (
+        id, stop_id, name, meal_type, restaurant_name, cuisine_type, scheduled_date,
+        scheduled_time, cost, currency, location, latitude, longitude, rating, notes
+    )
+    SELECT
+        uuid_generate_v5(v_trip_id, m.id::text), uuid_generate_v5(v_trip_id, m.stop_id::text),
+        m.name, m.meal_type, m.restaurant_name, m.cuisine_type, m.scheduled_date + v_shift,
+        m.scheduled_time, m.cost, m.currency, m.location, m.latitude, m.longitude, m.rating, m.notes
+    FROM public.meals m
+    WHERE m.trip_id = p_source_trip_id;
+
+    INSERT INTO public.transportation (
+        id, trip_id, from_stop_id, to_stop_id, type, provider, departure_location,
+        arrival_location, departure_time, arrival_time, cost, currency, notes
+    )
+    SELECT
+        uuid_generate_v5(v_trip_id, t.id::text), v_trip_id,
+        CASE WHEN t.from_stop_id IS NOT NULL THEN uuid_generate_v5(v_trip_id, t.from_stop_id::text) END,
+        CASE WHEN t.to_stop_id IS NOT NULL THEN uuid_generate_v5(v_trip_id, t.to_stop_id::text) END,
+        t.type, t.provider, t.departure_location, t.arrival_location,
+        t.departure_time + make_interval(days => v_shift), t.arrival_time + make_interval(days => v_shift),
+        t.cost, t.currency, t.notes
+    FROM public.transportation t
+    WHERE t.trip_id = p_source_trip_id;
+
+    RETURN QUERY SELECT * FROM public.trips WHERE id = v_trip_id;
+END;
+$$;
+
+-- Booking details (confirmation numbers, booking references, seats) are not
+-- copied; they belong to the original traveller.
+
+REVOKE EXECUTE ON FUNCTION public.clone_trip(UUID, UUID, TEXT, DATE) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.clone_trip(UUID, UUID, TEXT, DATE) TO service_role;
@@ -0,0 +1,227 @@
+-- Migration 006: change log for delta sync (GET /api/v1/sync/changes)
+-- Run after 005_clone_trip.sql, in the Supabase SQL Editor
+-- (as one script: the backfill relies on running in a single transaction).
+--
+-- change_log keeps one row per trips / stops / activities / accommodations /
+-- transportation / meals row: its owner, whether it was last upserted ('U')
+-- or deleted ('D'), and a sequence number that is the client's cursor. A sync
+-- reads the caller's entries past the cursor through idx_change_log_user_seq,
+-- so it costs what changed, not what the account holds.
+--
+-- Sequence numbers are assigned when the writing transaction commits, under a
+-- per-user advisory lock, so for any one user they are handed out in commit
+-- order: a reader never sees seq N+1 while seq N is still uncommitted, and a
+-- cursor never skips a late commit. Tombstones older than the retention
+-- period are pruned by prune_change_log(); cursors from before the prune get
+-- 410 from the API and the client resyncs from scratch.
+
+-- =====================================================
+-- TABLES
+-- =====================================================
+
+CREATE SEQUENCE IF NOT EXISTS public.change_log_seq;
+
+CREATE TABLE IF NOT EXISTS public.change_log (
+    table_name TEXT NOT NULL,
+    row_id UUID NOT NULL,
+    user_id UUID NOT NULL,
+    op CHAR(1) NOT NULL CHECK (op IN ('U', 'D')),
+    seq BIGINT, -- NULL until the writing transaction commits
+    changed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (table_name, row_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_change_log_user_seq ON public.change_log(user_id, seq);
+CREATE INDEX IF NOT EXISTS idx_change_log_tombstones ON public.change_log(changed_at) WHERE op = 'D';
+
+-- Highest seq removed by pruning; older cursors can no longer be served
+CREATE TABLE IF NOT EXISTS public.change_log_state (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    pruned_through BIGINT NOT NULL DEFAULT 0
+);
+INSERT INTO public.change_log_state (id) VALUES (TRUE) ON CONFLICT (id) DO NOTHING;
+
+-- Service role only (no policies)
+ALTER TABLE public.change_log ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.change_log_state ENABLE ROW LEVEL SECURITY;
+
+-- =====================================================
+-- BACKFILL
+-- =====================================================
+-- Existing rows become 'U' entries. Writes wait on the SHARE locks until the
+-- migration commits, so none is missed between the backfill and the triggers.
+
+LOCK TABLE public.trips, public.stops, public.activities, public.accommodations,
+    public.transportation, public.meals IN SHARE MODE;
+
+INSERT INTO public.change_log (table_name, row_id, user_id, op, seq)
+SELECT 'trips', id, user_id, 'U', nextval('public.change_log_seq') FROM public.trips
+UNION ALL
+SELECT 'stops', id, user_id, 'U', nextval('public.change_log_seq') FROM public.stops
+UNION ALL
+SELECT 'activities', id, user_id, 'U', nextval('public.change_log_seq') FROM public.activities
+UNION ALL
+SELECT 'accommodations', id, user_id, 'U', nextval('public.change_log_seq') FROM public.accommodations
+UNION ALL
+SELECT 'meals', id, user_id, 'U', nextval('public.change_log_seq') FROM public.meals
+UNION ALL
+SELECT 'transportation', tr.id, t.user_id, 'U', nextval('public.change_log_seq')
+FROM public.transportation tr
+JOIN public.trips t ON t.id = tr.trip_id
+ON CONFLICT (table_name, row_id) DO NOTHING;
+
+-- =====================================================
+-- TRIGGERS
+-- =====================================================
+
+-- Upsert the row's entry with a NULL seq; sequence_change() numbers it at commit
+CREATE OR REPLACE FUNCTION public.record_change()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_row_id UUID;
+    v_user_id UUID;
+    v_trip_id UUID;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        v_row_id := OLD.id;
+    ELSE
+        v_row_id := NEW.id;
+    END IF;
+
+    IF TG_TABLE_NAME = 'transportation' THEN
+        -- No owner column: go through the trip, or the trip's entry when the
+        -- trip itself is being deleted (cascade)
+        v_trip_id := CASE WHEN TG_OP = 'DELETE' THEN OLD.trip_id ELSE NEW.trip_id END;
+        SELECT user_id INTO v_user_id FROM public.trips WHERE id = v_trip_id;
+        IF v_user_id IS NULL THEN
+            SELECT user_id INTO v_user_id FROM public.change_log
+            WHERE table_name = 'trips' AND row_id = v_trip_id;
+        END IF;
+        IF v_user_id IS NULL THEN
+            RETURN NULL;
+        END IF;
+    ELSIF TG_OP = 'DELETE' THEN
+        v_user_id := OLD.user_id;
+    ELSE
+        v_user_id := NEW.user_id;
+    END IF;
+
+    INSERT INTO public.change_log (table_name, row_id, user_id, op, seq, changed_at)
+    VALUES (TG_TABLE_NAME, v_row_id, v_user_id, CASE WHEN TG_OP = 'DELETE' THEN 'D' ELSE 'U' END, NULL, NOW())
+    ON CONFLICT (table_name, row_id) DO UPDATE
+        SET user_id = EXCLUDED.user_id,
+            op = EXCLUDED.op,
+            seq = NULL,
+            changed_at = EXCLUDED.changed_at;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE TRIGGER record_trips_change
+    AFTER INSERT OR UPDATE OR DELETE ON public.trips
+    FOR EACH ROW EXECUTE FUNCTION public.record_change();
+
+CREATE TRIGGER record_stops_change
+    AFTER INSERT OR UPDATE OR DELETE ON public.stops
+    FOR EACH ROW EXECUTE FUNCTION public.record_change();
+
+CREATE TRIGGER record_activities_change
+    AFTER INSERT OR UPDATE OR DELETE ON public.activities
+    FOR EACH ROW EXECUTE FUNCTION public.record_change();
+
+CREATE TRIGGER record_accommodations_change
+    AFTER INSERT OR UPDATE OR DELETE ON public.accommodations
+    FOR EACH ROW EXECUTE FUNCTION public.record_change();
+
+CREATE TRIGGER record_transportation_change
+    AFTER INSERT OR UPDATE OR DELETE ON public.transportation
+    FOR EACH ROW EXECUTE FUNCTION public.record_change();
+
+CREATE TRIGGER record_meals_change
+    AFTER INSERT OR UPDATE OR DELETE ON public.meals
+    FOR EACH ROW EXECUTE FUNCTION public.record_change();
+
+-- Runs at commit. The advisory lock is held until the transaction ends, so a
+-- second transaction for the same user takes its numbers only after this one
+-- is visible.
+CREATE OR REPLACE FUNCTION public.sequence_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtextextended('change_log:' || NEW.user_id::text, 0));
+    UPDATE public.change_log
+    SET seq = nextval('public.change_log_seq')
+    WHERE table_name = NEW.table_name AND row_id = NEW.row_id AND seq IS NULL;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE CONSTRAINT TRIGGER sequence_change_log
+    AFTER INSERT OR UPDATE ON public.change_log
+    DEFERRABLE INITIALLY DEFERRED
+    FOR EACH ROW
+    WHEN (NEW.seq IS NULL)
+    EXECUTE FUNCTION public.sequence_change();
+
+-- =====================================================
+-- READ / PRUNE
+-- =====================================================
+
+-- The caller's changes past p_since in cursor order, with the current row
+-- for upserts. The API checks the user and calls it with the service key.
+CREATE OR REPLACE FUNCTION public.sync_changes(p_user_id UUID, p_since BIGINT, p_limit INTEGER)
+RETURNS TABLE (seq BIGINT, table_name TEXT, row_id UUID, op TEXT, data JSONB)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    SELECT
+        c.seq, c.table_name, c.row_id, c.op::text,
+        CASE WHEN c.op = 'U' THEN
+            CASE c.table_name
+                WHEN 'trips' THEN (SELECT to_jsonb(r) FROM public.trips r WHERE r.id = c.row_id)
+                WHEN 'stops' THEN (SELECT to_jsonb(r) FROM public.stops r WHERE r.id = c.row_id)
+                WHEN 'activities' THEN (SELECT to_jsonb(r) FROM public.activities r WHERE r.id = c.row_id)
+                WHEN 'accommodations' THEN (SELECT to_jsonb(r) FROM public.accommodations r WHERE r.id = c.row_id)
+                WHEN 'transportation' THEN (SELECT to_jsonb(r) FROM public.transportation r WHERE r.id = c.row_id)
+                WHEN 'meals' THEN (SELECT to_jsonb(r) FROM public.meals r WHERE r.id = c.row_id)
+            END
+        END
+    FROM public.change_log c
+    WHERE c.user_id = p_user_id AND c.seq > p_since
+    ORDER BY c.seq
+    LIMIT p_limit;
+$$;
+
+-- Drop tombstones older than p_keep; returns how many were removed
+CREATE OR REPLACE FUNCTION public.prune_change_log(p_keep INTERVAL)
+RETURNS BIGINT
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_removed BIGINT;
+    v_max_seq BIGINT;
+BEGIN
+    WITH gone AS (
+        DELETE FROM public.change_log
+        WHERE op = 'D' AND changed_at < NOW() - p_keep AND seq IS NOT NULL
+        RETURNING seq
+    )
+    SELECT COUNT(*), MAX(seq) INTO v_removed, v_max_seq FROM gone;
+
+    IF v_max_seq IS NOT NULL THEN
+        UPDATE public.change_log_state SET pruned_through = GREATEST(pruned_through, v_max_seq);
+    END IF;
+    RETURN v_removed;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.sync_changes(UUID, BIGINT, INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.sync_changes(UUID, BIGINT, INTEGER) TO service_role;
+REVOKE EXECUTE ON FUNCTION public.prune_change_log(INTERVAL) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.prune_change_log(INTERVAL) TO service_role;
+
+-- The app prunes on a schedule (SYNC_PRUNE_INTERVAL_SECONDS). With pg_cron:
+-- SELECT cron.schedule('prune-change-log', '0 * * * *', $$SELECT public.prune_change_log(INTERVAL '30 days')$$);
@@ -0,0 +1,130 @@
+-- Migration 007: full-text search over a user's trips (GET /api/v1/trips/search)
+-- Run after 006_sync_change_log.sql, in the Supabase SQL Editor.
+-- Verify with migrations/checks/007_explain_trip_search.sql
+--
+-- Trips are searched by name and description, stops by name and notes, and
+-- activities by name and description. Names weigh more than the rest. The
+-- tsvector expression is wrapped in an IMMUTABLE function so the index and
+-- the query use exactly the same expression. No stored column is added, so
+-- `SELECT *`, exports and sync payloads keep their shape.
+--
+-- Every search is for one user's rows, so each table gets a composite GIN
+-- index on (user_id, document) via btree_gin. One index scan then applies
+-- both the owner and the words. A platform-wide index on the document alone
+-- would return every user's rows for common words like "day" or "trip", only
+-- for most of them to be thrown away by the user_id filter.
+--
+-- search_user_trips() matches any of the query's words and ranks rows that
+-- match more of them, and closer together, first. A stop or activity also
+-- gains from its trip or stop matching, so "ramen osaka" ranks a ramen place
+-- in an Osaka stop above one in Tokyo. Every match comes with its parent trip.
+
+-- =====================================================
+-- DOCUMENTS
+-- =====================================================
+
+CREATE OR REPLACE FUNCTION public.search_document(p_title TEXT, p_body TEXT)
+RETURNS tsvector
+LANGUAGE sql
+IMMUTABLE
+PARALLEL SAFE
+AS $$
+    SELECT setweight(to_tsvector('english'::regconfig, COALESCE(p_title, '')), 'A')
+        || setweight(to_tsvector('english'::regconfig, COALESCE(p_body, '')), 'B');
+$$;
+
+-- Any of the words, e.g. 'ramen' | 'place' | 'osaka'; stop words are dropped
+CREATE OR REPLACE FUNCTION public.search_query(p_text TEXT)
+RETURNS tsquery
+LANGUAGE sql
+IMMUTABLE
+PARALLEL SAFE
+AS $$
+    SELECT replace(plainto_tsquery('english'::regconfig, p_text)::text, ' & ', ' | ')::tsquery;
+$$;
+
+-- GIN operator classes for plain columns such as user_id
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+
+CREATE INDEX IF NOT EXISTS idx_trips_user_search
+    ON public.trips USING GIN (user_id, public.search_document(name, description));
+CREATE INDEX IF NOT EXISTS idx_stops_user_search
+    ON public.stops USING GIN (user_id, public.search_document(name, notes));
+CREATE INDEX IF NOT EXISTS idx_activities_user_search
+    ON public.activities USING GIN (user_id, public.search_document(name, description));
+
+-- =====================================================
+-- SEARCH
+-- =====================================================
+
+-- The caller's best matches across trips, stops and activities. The API
+-- checks the user and calls it with the service key.
+CREATE OR REPLACE FUNCTION public.search_user_trips(p_user_id UUID, p_query TEXT, p_limit INTEGER DEFAULT 20)
+RETURNS TABLE (
+    kind TEXT,
+    id UUID,
+    name TEXT,
+    headline TEXT,
+    rank REAL,
+    stop_id UUID,
+    stop_name TEXT,
+    trip JSONB
+)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    WITH q AS (
+        SELECT public.search_query(p_query) AS query
+    ),
+    hits AS (
+        SELECT 'trip' AS kind, t.id, t.name, t.description AS body, t.id AS trip_id,
+               NULL::uuid AS stop_id, NULL::text AS stop_name,
+               ts_rank_cd(public.search_document(t.name, t.description), q.query) AS rank
+        FROM public.trips t, q
+        WHERE public.search_document(t.name, t.description) @@ q.query
+          AND t.user_id = p_user_id
+
+        UNION ALL
+
+        SELECT 'stop', s.id, s.name, s.notes, s.trip_id, NULL::uuid, NULL::text,
+               ts_rank_cd(public.search_document(s.name, s.notes), q.query)
+               + 0.5 * ts_rank_cd(public.search_document(t.name, t.description), q.query)
+        FROM public.stops s
+        JOIN public.trips t ON t.id = s.trip_id, q
+        WHERE public.search_document(s.name, s.notes) @@ q.query
+          AND s.user_id = p_user_id
+
+        UNION ALL
+
+        SELECT 'activity', a.id, a.name, a.description, a.trip_id, s.id, s.name,
+               ts_rank_cd(public.search_document(a.name, a.description), q.query)
+               + 0.5 * ts_rank_cd(public.search_document(s.name, s.notes), q.query)
+        FROM public.activities a
+        JOIN public.stops s ON s.id = a.stop_id, q
+        WHERE public.search_document(a.name, a.description) @@ q.query
+          AND a.user_id = p_user_id
+    ),
+    top AS (
+        SELECT * FROM hits ORDER BY rank DESC, kind, id LIMIT p_limit
+    )
+    -- Headlines are the expensive part, so only the returned rows get one
+    SELECT
+        top.kind, top.id, top.name,
+        CASE WHEN top.body IS NOT NULL THEN
+            ts_headline('english'::regconfig, top.body, q.query, 'MaxWords=20, MinWords=8, MaxFragments=1')
+        END,
+        top.rank::real, top.stop_id, top.stop_name,
+        jsonb_build_object(
+            'id', t.id, 'name', t.name, 'start_date', t.start_date,
+            'end_date', t.end_date, 'photo_url', t.photo_url
+        )
+    FROM top
+    JOIN public.trips t ON t.id = top.trip_id
+    CROSS JOIN q
+    ORDER BY top.rank DESC, top.kind, top.id;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.search_user_trips(UUID, TEXT, INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.search_user_trips(UUID, TEXT, INTEGER) TO service_role;
@@ -0,0 +1,93 @@
+-- Check for migration 001: the planner uses the new indexes and RLS helpers.
+-- Run in the Supabase SQL Editor. Raises an exception on the first failure,
+-- prints a NOTICE per passing check. Makes no changes (rolled back).
+--
+-- Sequential scans are disabled so small development tables still show
+-- whether an index *can* serve each query.
+
+BEGIN;
+
+SET LOCAL enable_seqscan = off;
+
+CREATE FUNCTION pg_temp.assert_plan_contains(p_query TEXT, p_expected TEXT[])
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_plan TEXT;
+    v_name TEXT;
+BEGIN
+    EXECUTE 'EXPLAIN (FORMAT JSON) ' || p_query INTO v_plan;
+    FOREACH v_name IN ARRAY p_expected LOOP
+        IF position(v_name IN v_plan) > 0 THEN
+            RAISE NOTICE 'OK: % -> %', p_query, v_name;
+            RETURN;
+        END IF;
+    END LOOP;
+    RAISE EXCEPTION 'Expected one of % in plan for: %\n%', p_expected, p_query, v_plan;
+END;
+$$;
+
+SELECT pg_temp.assert_plan_contains(
+    $q$SELECT * FROM public.trips
+       WHERE user_id = '00000000-0000-0000-0000-000000000000'
+       ORDER BY created_at DESC LIMIT 100$q$,
+    ARRAY['idx_trips_user_created']
+);
+
+SELECT pg_temp.assert_plan_contains(
+    $q$SELECT * FROM public.trips WHERE share_token = 'token' AND is_public = TRUE$q$,
+    ARRAY['idx_trips_public_share_token', 'trips_share_token_key']
+);
+
+SELECT pg_temp.assert_plan_contains(
+    $q$SELECT * FROM public.stops
+       WHERE trip_id = '00000000-0000-0000-0000-000000000000'
+       ORDER BY "order"$q$,
+    ARRAY['idx_stops_trip_order']
+);
+
+SELECT pg_temp.assert_plan_contains(
+    $q$SELECT "order" FROM public.stops
+       WHERE trip_id = '00000000-0000-0000-0000-000000000000'
+       ORDER BY "order" DESC LIMIT 1$q$,
+    ARRAY['idx_stops_trip_order']
+);
+
+SELECT pg_temp.assert_plan_contains(
+    $q$SELECT * FROM public.activities
+       WHERE stop_id = '00000000-0000-0000-0000-000000000000'
+       ORDER BY "order"$q$,
+    ARRAY['idx_activities_stop_order']
+);
+
+DO $$
+BEGIN
+    IF to_regclass('public.scheduled_activities') IS NOT NULL THEN
+        PERFORM pg_temp.assert_plan_contains(
+            $q$SELECT * FROM public.scheduled_activities
+               WHERE trip_id = '00000000-0000-0000-0000-000000000000'
+               ORDER BY day$q$,
+            ARRAY['idx_scheduled_activities_trip_day']
+        );
+    END IF;
+END $$;
+
+-- RLS: as an authenticated user, the owner policy probes the cached ID set
+-- (only until migration 002, which replaces user_stop_ids with owner columns)
+SET LOCAL role authenticated;
+SET LOCAL request.jwt.claims = '{"sub": "00000000-0000-0000-0000-000000000000", "role": "authenticated"}';
+
+SELECT pg_temp.assert_plan_contains(
+    $q$SELECT * FROM public.activities
+       WHERE stop_id = '00000000-0000-0000-0000-000000000000'$q$,
+    ARRAY['user_stop_ids']
+);
+
+SELECT pg_temp.assert_plan_contains(
+    $q$SELECT * FROM public.stops
+       WHERE trip_id = '00000000-0000-0000-0000-000000000000'$q$,
+    ARRAY['user_trip_ids']
+);
+
+ROLLBACK;
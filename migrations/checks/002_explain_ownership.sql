@@ -0,0 +1,67 @@
+-- Check for migration 002: ownership is resolved on the row itself.
+-- Run in the Supabase SQL Editor. Raises an exception on the first failure,
+-- prints a NOTICE per passing check. Makes no changes (rolled back).
+
+BEGIN;
+
+SET LOCAL enable_seqscan = off;
+
+CREATE FUNCTION pg_temp.assert_plan(p_query TEXT, p_expected TEXT, p_present BOOLEAN)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_plan TEXT;
+BEGIN
+    EXECUTE 'EXPLAIN (FORMAT JSON) ' || p_query INTO v_plan;
+    IF (position(p_expected IN v_plan) > 0) <> p_present THEN
+        RAISE EXCEPTION 'Expected % to be %in plan for: %\n%',
+            p_expected, CASE WHEN p_present THEN '' ELSE 'absent ' END, p_query, v_plan;
+    END IF;
+    RAISE NOTICE 'OK: % (% %)', p_query, CASE WHEN p_present THEN 'uses' ELSE 'avoids' END, p_expected;
+END;
+$$;
+
+-- Route ownership check: one primary key lookup, no join
+SELECT pg_temp.assert_plan(
+    $q$SELECT id FROM public.stops
+       WHERE id = '00000000-0000-0000-0000-000000000000'
+         AND user_id = '00000000-0000-0000-0000-000000000000'$q$,
+    'stops_pkey', TRUE
+);
+
+-- Backfill complete: no child rows without an owner
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM public.stops WHERE user_id IS NULL)
+        OR EXISTS (SELECT 1 FROM public.activities WHERE user_id IS NULL OR trip_id IS NULL)
+        OR EXISTS (SELECT 1 FROM public.accommodations WHERE user_id IS NULL OR trip_id IS NULL)
+        OR EXISTS (SELECT 1 FROM public.meals WHERE user_id IS NULL OR trip_id IS NULL) THEN
+        RAISE EXCEPTION 'Ownership columns not fully backfilled';
+    END IF;
+    RAISE NOTICE 'OK: ownership columns backfilled';
+END $$;
+
+-- RLS as an authenticated user: the policies no longer touch stops or trips
+SET LOCAL role authenticated;
+SET LOCAL request.jwt.claims = '{"sub": "00000000-0000-0000-0000-000000000000", "role": "authenticated"}';
+
+SELECT pg_temp.assert_plan(
+    $q$SELECT * FROM public.activities
+       WHERE stop_id = '00000000-0000-0000-0000-000000000000'$q$,
+    '"Relation Name": "stops"', FALSE
+);
+
+SELECT pg_temp.assert_plan(
+    $q$SELECT * FROM public.meals
+       WHERE stop_id = '00000000-0000-0000-0000-000000000000'$q$,
+    '"Relation Name": "stops"', FALSE
+);
+
+SELECT pg_temp.assert_plan(
+    $q$SELECT * FROM public.stops
+       WHERE trip_id = '00000000-0000-0000-0000-000000000000'$q$,
+    'user_trip_ids', FALSE
+);
+
+ROLLBACK;
@@ -0,0 +1,72 @@
+-- Check for migration 007: trip search uses the per-user indexes.
+-- Run in the Supabase SQL Editor. Raises an exception on the first failure,
+-- prints a NOTICE per passing check. Makes no changes (rolled back).
+--
+-- Explains the deployed body of search_user_trips() for the user with the
+-- most activities, with the planner's normal settings. A table too small for
+-- an index to beat a sequential scan is reported as skipped.
+
+BEGIN;
+
+CREATE FUNCTION pg_temp.assert_indexed(p_plan JSONB, p_table TEXT, p_expected TEXT[])
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_vars JSONB := jsonb_build_object('table', p_table);
+BEGIN
+    IF (SELECT reltuples FROM pg_class WHERE oid = ('public.' || p_table)::regclass) < 10000 THEN
+        RAISE NOTICE 'SKIP: % has too few rows to need an index', p_table;
+        RETURN;
+    END IF;
+    IF jsonb_path_exists(p_plan, '$.** ? (@."Node Type" == "Seq Scan" && @."Relation Name" == $table)', v_vars) THEN
+        RAISE EXCEPTION 'Sequential scan on % in search_user_trips() plan:\n%', p_table, jsonb_pretty(p_plan);
+    END IF;
+    IF NOT jsonb_path_exists(
+        p_plan, '$.** ? (@."Relation Name" == $table && @."Index Name" == $names[*])',
+        v_vars || jsonb_build_object('names', to_jsonb(p_expected))
+    ) THEN
+        RAISE EXCEPTION 'Expected one of % for % in search_user_trips() plan:\n%', p_expected, p_table, jsonb_pretty(p_plan);
+    END IF;
+    RAISE NOTICE 'OK: % is read through one of %', p_table, p_expected;
+END;
+$$;
+
+DO $$
+DECLARE
+    v_body TEXT;
+    v_user_id UUID;
+    v_plan JSON;
+BEGIN
+    SELECT user_id INTO v_user_id
+    FROM public.activities GROUP BY user_id ORDER BY count(*) DESC LIMIT 1;
+    IF v_user_id IS NULL THEN
+        RAISE NOTICE 'SKIP: no activities to search';
+        RETURN;
+    END IF;
+
+    -- The function body with its arguments as parameters, as the function runs it
+    SELECT rtrim(btrim(prosrc, E' \n\t'), ';') INTO v_body
+    FROM pg_proc WHERE oid = 'public.search_user_trips(uuid, text, integer)'::regprocedure;
+    v_body := replace(replace(replace(v_body, 'p_user_id', '$1'), 'p_query', '$2'), 'p_limit', '$3');
+    EXECUTE 'PREPARE search_user_trips_plan(uuid, text, integer) AS ' || v_body;
+
+    EXECUTE format('EXPLAIN (FORMAT JSON) EXECUTE search_user_trips_plan(%L, %L, 20)', v_user_id, 'ramen osaka')
+        INTO v_plan;
+    DEALLOCATE search_user_trips_plan;
+
+    PERFORM pg_temp.assert_indexed(v_plan::jsonb, 'trips', ARRAY['idx_trips_user_search', 'idx_trips_user_created']);
+    PERFORM pg_temp.assert_indexed(v_plan::jsonb, 'stops', ARRAY['idx_stops_user_search', 'idx_stops_user_id']);
+    PERFORM pg_temp.assert_indexed(v_plan::jsonb, 'activities', ARRAY['idx_activities_user_search', 'idx_activities_user_id']);
+END $$;
+
+-- The query is OR-ed: a row with only one of the words still matches
+DO $$
+BEGIN
+    IF NOT (public.search_document('Ichiran Ramen', NULL) @@ public.search_query('that ramen place in Osaka')) THEN
+        RAISE EXCEPTION 'search_query() should match any of the words';
+    END IF;
+    RAISE NOTICE 'OK: search_query() matches any word';
+END $$;
+
+ROLLBACK;
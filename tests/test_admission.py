@@ -0,0 +1,145 @@
+from app.core import admission
+from app.core.admission import ConcurrencyLimit, Overloaded, TokenBuckets
+import asyncio
+import pytest
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(admission.time, "monotonic", clock)
+    return clock
+
+
+def test_token_buckets_allow_burst_then_wait(clock):
+    buckets = TokenBuckets(rate_per_second=0.5, burst=2)
+    assert buckets.take("a") == 0
+    assert buckets.take("a") == 0
+    assert buckets.take("a") == pytest.approx(2.0)
+
+
+def test_token_buckets_refill_over_time(clock):
+    buckets = TokenBuckets(rate_per_second=1, burst=1)
+    assert buckets.take("a") == 0
+    clock.now += 0.5
+    assert buckets.take("a") == pytest.approx(0.5)
+    clock.now += 1
+    assert buckets.take("a") == 0
+
+
+def test_token_buckets_are_per_key(clock):
+    buckets = TokenBuckets(rate_per_second=1, burst=1)
+    assert buckets.take("a") == 0
+    assert buckets.take("b") == 0
+    assert buckets.take("a") > 0
+
+
+def test_token_buckets_forget_least_recent_keys(clock):
+    buckets = TokenBuckets(rate_per_second=1, burst=1, max_keys=2)
+    buckets.take("a")
+    buckets.take("b")
+    buckets.take("c")
+    # "a" was dropped, so it starts again with a full bucket
+    assert buckets.take("a") == 0
+
+
+def test_token_buckets_disabled_with_zero_rate(clock):
+    buckets = TokenBuckets(rate_per_second=0, burst=0)
+    assert all(buckets.take("a") == 0 for _ in range(10))
+
+
+def test_concurrency_limit_admits_up_to_limit():
+    async def run():
+        limit = ConcurrencyLimit(limit=2, max_waiting=0, max_wait_seconds=1)
+        await limit.acquire()
+        await limit.acquire()
+        assert limit.active == 2
+        with pytest.raises(Overloaded):
+            await limit.acquire()
+        limit.release()
+        await limit.acquire()
+        assert limit.active == 2
+
+    asyncio.run(run())
+
+
+def test_concurrency_limit_hands_slots_to_waiters_in_order():
+    async def run():
+        limit = ConcurrencyLimit(limit=1, max_waiting=2, max_wait_seconds=1)
+        await limit.acquire()
+        admitted = []
+
+        async def waiter(name):
+            await limit.acquire()
+            admitted.append(name)
+
+        first = asyncio.create_task(waiter("first"))
+        second = asyncio.create_task(waiter("second"))
+        await asyncio.sleep(0)
+        assert limit.waiting == 2
+
+        limit.release()
+        await first
+        assert admitted == ["first"]
+        assert limit.active == 1  # the slot passed on, it was not freed
+
+        limit.release()
+        await second
+        assert admitted == ["first", "second"]
+        limit.release()
+        assert limit.active == 0
+
+    asyncio.run(run())
+
+
+def test_concurrency_limit_times_out_waiters():
+    async def run():
+        limit = ConcurrencyLimit(limit=1, max_waiting=1, max_wait_seconds=0.01)
+        await limit.acquire()
+        with pytest.raises(Overloaded):
+            await limit.acquire()
+        assert limit.waiting == 0
+        limit.release()
+        assert limit.active == 0
+
+    asyncio.run(run())
+
+
+def test_concurrency_limit_new_callers_queue_behind_waiters():
+    async def run():
+        limit = ConcurrencyLimit(limit=1, max_waiting=1, max_wait_seconds=1)
+        await limit.acquire()
+        waiting = asyncio.create_task(limit.acquire())
+        await asyncio.sleep(0)
+        # The queue is full, so a newcomer is refused rather than jumping it
+        with pytest.raises(Overloaded):
+            await limit.acquire()
+        limit.release()
+        await waiting
+        assert limit.active == 1
+
+    asyncio.run(run())
+
+
+def test_concurrency_limit_cancelled_waiter_leaves_queue():
+    async def run():
+        limit = ConcurrencyLimit(limit=1, max_waiting=1, max_wait_seconds=1)
+        await limit.acquire()
+        waiting = asyncio.create_task(limit.acquire())
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert limit.waiting == 0
+        limit.release()
+        assert limit.active == 0
+
+    asyncio.run(run())
@@ -0,0 +1,63 @@
+from app.core.cache import MemoryBackend, RedisBackend, SharedMemoryBackend
+import fnmatch
+import threading
+
+
+class FakeRedis:
+    """Just enough of a Redis client for delete_prefix, with SCAN MATCH glob semantics."""
+
+    def __init__(self, keys):
+        self.keys = set(keys)
+
+    def scan_iter(self, match, count):
+        # fnmatch has no backslash escapes; turn "\x" into "[x]" first
+        pattern, i = "", 0
+        while i < len(match):
+            if match[i] == "\\":
+                pattern += "[" + match[i + 1] + "]"
+                i += 2
+            else:
+                pattern += match[i]
+                i += 1
+        return [k for k in sorted(self.keys) if fnmatch.fnmatchcase(k, pattern)]
+
+    def unlink(self, *keys):
+        self.keys.difference_update(keys)
+
+
+def test_memory_backend_returns_copies():
+    backend = MemoryBackend(max_entries=10)
+    backend.set("plan", [{"name": "Louvre", "tags": ["museum"]}], 60)
+
+    first = backend.get("plan")
+    first[0]["tags"].append("changed")
+    first.append({"name": "extra"})
+
+    assert backend.get("plan") == [{"name": "Louvre", "tags": ["museum"]}]
+
+
+def test_redis_delete_prefix_matches_glob_characters_literally():
+    backend = RedisBackend("redis://localhost:6379/0", key_prefix="gt:")
+    backend._client = FakeRedis(["gt:trip:a*:1", "gt:trip:ab:1", "gt:trip:a[b]:1", "gt:trip:ab]:1"])
+
+    backend.delete_prefix("trip:a*:")
+    assert backend._client.keys == {"gt:trip:ab:1", "gt:trip:a[b]:1", "gt:trip:ab]:1"}
+
+    backend.delete_prefix("trip:a[b]:")
+    assert backend._client.keys == {"gt:trip:ab:1", "gt:trip:ab]:1"}
+
+
+def test_shared_backend_concurrent_writes(tmp_path):
+    backend = SharedMemoryBackend(str(tmp_path / "cache.db"), max_entries=1000)
+
+    def write(n):
+        for i in range(200):
+            backend.set(f"{n}:{i}", i, 60)
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert backend.size() == 800
@@ -0,0 +1,114 @@
+from app.services.clustering import PointClusterIndex, TripClusters
+import random
+
+WORLD = (-180, -85, 180, 85)
+BBOXES = [
+    WORLD,
+    (-10, 40, 20, 55),
+    (2.3, 48.8, 2.4, 48.9),
+    (170, -50, -170, 50),  # across the antimeridian
+]
+
+
+def random_points(seed, n):
+    rng = random.Random(seed)
+    points = []
+    for i in range(n):
+        if i % 10 == 0 and points:
+            # Some points share exact coordinates
+            _, lat, lng, _ = points[-1]
+        else:
+            lat, lng = rng.uniform(-85, 85), rng.uniform(-180, 180)
+        points.append((f"p{i}", lat, lng, {"name": f"Point {i}"}))
+    # Dense groups so higher zooms have multi-point clusters
+    for i in range(200):
+        points.append((f"c{i}", 48.85 + rng.uniform(-0.01, 0.01), 2.35 + rng.uniform(-0.01, 0.01), {}))
+    return points
+
+
+def built_with_add(points, **kwargs):
+    index = PointClusterIndex(**kwargs)
+    for point_id, lat, lng, properties in points:
+        index.add(point_id, lat, lng, properties)
+    return index
+
+
+def built_with_load(points, **kwargs):
+    index = PointClusterIndex(**kwargs)
+    index.load(points)
+    return index
+
+
+def snapshot(index):
+    """Every feature the index returns, for each test bbox and zoom up to past max_zoom."""
+    def key(feature):
+        return (feature["type"], feature["id"])
+
+    return {
+        (bbox, zoom): sorted(index.query(*bbox, zoom), key=key)
+        for bbox in BBOXES
+        for zoom in range(index.min_zoom, index.max_zoom + 2)
+    }
+
+
+def test_load_answers_queries_like_add():
+    points = random_points(3, 1000)
+    added, loaded = built_with_add(points), built_with_load(points)
+
+    assert len(loaded) == len(added) == len(points)
+    assert snapshot(loaded) == snapshot(added)
+
+
+def test_load_respects_min_zoom():
+    points = random_points(5, 200)
+    added = built_with_add(points, min_zoom=3, max_zoom=10)
+    loaded = built_with_load(points, min_zoom=3, max_zoom=10)
+    assert snapshot(loaded) == snapshot(added)
+
+
+def test_clusters_account_for_every_point():
+    points = random_points(7, 500)
+    index = built_with_load(points)
+    for zoom in range(index.max_zoom + 1):
+        features = index.query(*WORLD, zoom)
+        assert sum(f.get("count", 1) for f in features) == len(points)
+
+
+def test_loaded_index_supports_add_and_remove():
+    points = random_points(13, 300)
+    loaded = built_with_load(points)
+    added = built_with_add(points)
+
+    for index in (loaded, added):
+        index.remove("p1")
+        index.add("p2", 10.0, 10.0, {"moved": True})
+        index.add("new", -33.9, 151.2, {})
+
+    assert snapshot(loaded) == snapshot(added)
+    assert len(loaded) == len(points)
+
+
+def test_remove_all_points_empties_the_index():
+    points = random_points(17, 100)
+    index = built_with_load(points)
+    for point_id, *_ in points:
+        index.remove(point_id)
+    assert len(index) == 0
+    assert all(features == [] for features in snapshot(index).values())
+
+
+def test_trip_clusters_rebuild_after_drop():
+    clusters = TripClusters(max_zoom=10, size=4, rebuild_seconds=3600)
+    loads = []
+
+    def load():
+        loads.append(1)
+        return [{"id": "s1", "name": "Osaka", "latitude": 34.7, "longitude": 135.5}], []
+
+    clusters.get("t1", load)
+    clusters.get("t1", load)
+    assert len(loads) == 1
+
+    clusters.drop("t1")
+    assert len(clusters.get("t1", load)) == 1
+    assert len(loads) == 2
@@ -0,0 +1,139 @@
+from app.core import admission
+from app.core.jobs import Job, JobManager, JobQueueFull
+from app.core.security import get_current_user
+from app.main import app
+from app.routes import itinerary
+from fastapi.testclient import TestClient
+from types import SimpleNamespace
+import json
+import threading
+import time
+import pytest
+
+
+def wait_finished(manager, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = manager.get(job_id)
+        if job and job.finished:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_job_records_events_and_completes():
+    manager = JobManager("test-events", max_workers=1, max_pending=4, ttl_seconds=60)
+    job = manager.submit(lambda n: iter(range(n)), 3, meta={"user_id": "u1"})
+
+    done = wait_finished(manager, job.id)
+    assert done.status == Job.COMPLETED
+    assert done.events == [0, 1, 2]
+    assert done.meta == {"user_id": "u1"}
+    assert done.finished_at is not None
+
+
+def test_job_failure_is_recorded():
+    def failing():
+        yield "first"
+        raise ValueError("no attractions")
+
+    manager = JobManager("test-failure", max_workers=1, max_pending=4, ttl_seconds=60)
+    done = wait_finished(manager, manager.submit(failing).id)
+    assert done.status == Job.FAILED
+    assert done.error == "no attractions"
+    assert done.events == ["first"]
+
+
+def test_get_returns_a_snapshot():
+    manager = JobManager("test-snapshot", max_workers=1, max_pending=4, ttl_seconds=60)
+    job = wait_finished(manager, manager.submit(lambda: iter([1])).id)
+    job.events.append(2)
+    assert manager.get(job.id).events == [1]
+
+
+def test_submit_refuses_beyond_max_pending():
+    release = threading.Event()
+
+    def blocked():
+        release.wait(5)
+        yield "done"
+
+    manager = JobManager("test-full", max_workers=1, max_pending=2, ttl_seconds=60)
+    jobs = [manager.submit(blocked), manager.submit(blocked)]
+    with pytest.raises(JobQueueFull):
+        manager.submit(blocked)
+
+    release.set()
+    for job in jobs:
+        wait_finished(manager, job.id)
+    manager.submit(lambda: iter([]))  # room again once they finish
+
+
+def test_unknown_job_is_none():
+    manager = JobManager("test-unknown", max_workers=1, max_pending=1, ttl_seconds=60)
+    assert manager.get("missing") is None
+
+
+@pytest.fixture
+def client(monkeypatch):
+    attractions = [
+        {"fsq_place_id": str(n), "name": f"Place {n}", "categories": [{"name": "Museum"}],
+         "latitude": 34.7, "longitude": 135.5}
+        for n in range(6)
+    ]
+    monkeypatch.setattr(itinerary, "fetch_attractions", lambda city, limit: attractions)
+    # Rate limits are covered in test_admission
+    monkeypatch.setattr(admission._classes[admission.AUTO_PLAN], "buckets", admission.TokenBuckets(0, 0))
+    user = SimpleNamespace(id="owner")
+    app.dependency_overrides[get_current_user] = lambda: user
+    yield TestClient(app), user
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+def submit(client):
+    res = client.post("/api/v1/itinerary/jobs", json={
+        "city": "Osaka", "start_date": "2026-05-01", "end_date": "2026-05-02"
+    })
+    assert res.status_code == 202
+    job_id = res.json()["job_id"]
+    wait_finished(itinerary.plan_jobs, job_id)
+    return job_id
+
+
+def test_owner_can_poll_and_stream_job(client):
+    client, _ = client
+    job_id = submit(client)
+
+    res = client.get(f"/api/v1/itinerary/jobs/{job_id}")
+    assert res.status_code == 200
+    assert res.json()["status"] == Job.COMPLETED
+    assert [day["date"] for day in res.json()["itinerary"]] == ["2026-05-01", "2026-05-02"]
+
+    stream = client.get(f"/api/v1/itinerary/jobs/{job_id}/events")
+    assert stream.status_code == 200
+    assert stream.text.startswith("event: done\n")
+    assert json.loads(stream.text.split("data: ", 1)[1]) == res.json()
+
+
+def test_other_users_get_404(client):
+    client, user = client
+    job_id = submit(client)
+
+    user.id = "someone-else"
+    assert client.get(f"/api/v1/itinerary/jobs/{job_id}").status_code == 404
+    assert client.get(f"/api/v1/itinerary/jobs/{job_id}/events").status_code == 404
+
+
+def test_job_mode_refused_with_several_workers_on_memory_cache(client, monkeypatch):
+    client, _ = client
+    monkeypatch.setenv("SERVER_WORKERS", "4")
+    res = client.post("/api/v1/itinerary/jobs", json={
+        "city": "Osaka", "start_date": "2026-05-01", "end_date": "2026-05-02"
+    })
+    assert res.status_code == 503
+
+
+def test_job_mode_allowed_in_a_single_process(client, monkeypatch):
+    client, _ = client
+    monkeypatch.delenv("SERVER_WORKERS", raising=False)
+    submit(client)
@@ -0,0 +1,168 @@
+from app.core.database import get_supabase, get_supabase_admin
+from app.core.security import get_current_user
+from app.main import app
+from fastapi.testclient import TestClient
+from types import SimpleNamespace
+import pytest
+
+
+class FakeQuery:
+    """Just the PostgREST builder calls the batch routes make."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.filters = []
+        self.changes = None
+        self.deleting = False
+        self.inserted = None
+        self.max_rows = None
+
+    def select(self, columns):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def limit(self, count):
+        self.max_rows = count
+        return self
+
+    def insert(self, rows):
+        self.inserted = [dict(row, id=f"new-{n}") for n, row in enumerate(rows)]
+        return self
+
+    def update(self, changes):
+        self.changes = changes
+        return self
+
+    def delete(self):
+        self.deleting = True
+        return self
+
+    def execute(self):
+        if self.inserted is not None:
+            self.rows.extend(self.inserted)
+            return SimpleNamespace(data=[dict(row) for row in self.inserted])
+        matched = [row for row in self.rows if all(f(row) for f in self.filters)]
+        if self.changes is not None:
+            for row in matched:
+                row.update(self.changes)
+        elif self.deleting:
+            self.rows[:] = [row for row in self.rows if row not in matched]
+        return SimpleNamespace(data=[dict(row) for row in matched[:self.max_rows]])
+
+
+class FakeClient:
+    def __init__(self, tables):
+        self.tables = tables
+
+    def table(self, name):
+        return FakeQuery(self.tables.setdefault(name, []))
+
+
+@pytest.fixture
+def db():
+    db = FakeClient({
+        "trips": [{"id": "t1", "user_id": "owner"}, {"id": "t2", "user_id": "someone-else"}],
+        "scheduled_activities": [
+            {"id": "a1", "trip_id": "t1", "day": 1},
+            {"id": "a2", "trip_id": "t1", "day": 1},
+            {"id": "b1", "trip_id": "t2", "day": 1},
+        ]
+    })
+    app.dependency_overrides[get_supabase] = lambda: db
+    app.dependency_overrides[get_supabase_admin] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id="owner")
+    yield db
+    for dependency in (get_supabase, get_supabase_admin, get_current_user):
+        app.dependency_overrides.pop(dependency, None)
+
+
+def days(db):
+    return {row["id"]: row["day"] for row in db.tables["scheduled_activities"]}
+
+
+def test_batch_update_only_touches_the_given_trip(db):
+    res = TestClient(app).patch("/api/v1/schedule/activities/batch", json={
+        "trip_id": "t1", "ids": ["a1", "b1"], "changes": {"day": 2}
+    })
+    assert res.status_code == 200
+    assert res.json()["count"] == 1
+    assert days(db) == {"a1": 2, "a2": 1, "b1": 1}
+
+
+def test_batch_update_of_another_users_trip_is_404(db):
+    res = TestClient(app).patch("/api/v1/schedule/activities/batch", json={
+        "trip_id": "t2", "ids": ["b1"], "changes": {"day": 2}
+    })
+    assert res.status_code == 404
+    assert days(db)["b1"] == 1
+
+
+def test_batch_update_needs_changes(db):
+    res = TestClient(app).patch("/api/v1/schedule/activities/batch", json={
+        "trip_id": "t1", "ids": ["a1"], "changes": {}
+    })
+    assert res.status_code == 400
+
+
+def test_batch_delete_only_touches_the_given_trip(db):
+    res = TestClient(app).post("/api/v1/schedule/activities/batch/delete", json={
+        "trip_id": "t1", "ids": ["a1", "b1"]
+    })
+    assert res.status_code == 200
+    assert res.json()["count"] == 1
+    assert set(days(db)) == {"a2", "b1"}
+
+
+def test_batch_delete_of_another_users_trip_is_404(db):
+    res = TestClient(app).post("/api/v1/schedule/activities/batch/delete", json={
+        "trip_id": "t2", "ids": ["b1"]
+    })
+    assert res.status_code == 404
+    assert set(days(db)) == {"a1", "a2", "b1"}
+
+
+ITINERARY = [{"day": 1, "city": "Osaka", "activities": [{"fsq_place_id": "f1", "name": "Castle"}]}]
+
+
+def test_batch_insert_into_own_trip(db):
+    res = TestClient(app).post("/api/v1/schedule/activities/batch", json={
+        "trip_id": "t1", "itinerary": ITINERARY
+    })
+    assert res.status_code == 201
+    assert res.json()["count"] == 1
+    assert db.tables["scheduled_activities"][-1]["trip_id"] == "t1"
+
+
+def test_batch_insert_into_another_users_trip_is_404(db):
+    res = TestClient(app).post("/api/v1/schedule/activities/batch", json={
+        "trip_id": "t2", "itinerary": ITINERARY
+    })
+    assert res.status_code == 404
+    assert set(days(db)) == {"a1", "a2", "b1"}
+
+
+def test_single_activity_writes_check_the_trip_owner(db, monkeypatch):
+    from app.routes import itinerary
+    published = []
+    monkeypatch.setattr(itinerary, "publish_trip_event", lambda *args: published.append(args))
+    client = TestClient(app)
+
+    assert client.patch("/api/v1/schedule/activities/b1", json={"day": 3}).status_code == 404
+    assert client.delete("/api/v1/schedule/activities/b1").status_code == 404
+    assert client.post("/api/v1/schedule/activities", json={
+        "trip_id": "t2", "city": "Osaka", "day": 1, "fsq_place_id": "f1", "name": "Castle"
+    }).status_code == 404
+    assert days(db) == {"a1": 1, "a2": 1, "b1": 1}
+    assert published == []
+
+    assert client.patch("/api/v1/schedule/activities/a1", json={"day": 3}).status_code == 200
+    assert client.delete("/api/v1/schedule/activities/a2").status_code == 200
+    assert days(db) == {"a1": 3, "b1": 1}
+    assert [event[:2] for event in published] == [("t1", "schedule.updated"), ("t1", "schedule.deleted")]
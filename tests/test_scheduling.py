@@ -0,0 +1,122 @@
+from app.services.scheduling import DayIndex, Interval, find_conflicts, free_slots, pack, to_interval, to_minutes
+import random
+
+
+def interval(start, end, item_id):
+    return Interval(start, end, {"id": item_id})
+
+
+def ids(pairs):
+    return [(first["id"], second["id"]) for first, second in pairs]
+
+
+def test_to_interval_uses_default_duration():
+    row = {"id": "a", "scheduled_date": "2026-05-01", "scheduled_time": "09:30:00"}
+    assert to_interval(row, 60)[:2] == (570, 630)
+    assert to_interval({**row, "duration_minutes": 15}, 60)[:2] == (570, 585)
+    assert to_interval({"id": "b", "scheduled_date": "2026-05-01"}, 60) is None
+
+
+def test_find_conflicts_reports_each_overlapping_item_once():
+    intervals = [
+        interval(540, 720, "long"),
+        interval(600, 660, "inside"),
+        interval(690, 750, "tail"),
+        interval(750, 780, "adjacent"),  # starts when "tail" ends
+    ]
+    assert ids(find_conflicts(intervals)) == [("long", "inside"), ("long", "tail")]
+
+
+def test_find_conflicts_pairs_with_furthest_reaching_item():
+    intervals = [interval(540, 600, "a"), interval(550, 700, "b"), interval(650, 680, "c")]
+    assert ids(find_conflicts(intervals)) == [("a", "b"), ("b", "c")]
+
+
+def test_find_conflicts_empty_and_disjoint():
+    assert find_conflicts([]) == []
+    assert find_conflicts([interval(0, 10, "a"), interval(10, 20, "b")]) == []
+
+
+def test_day_index_overlapping_matches_brute_force():
+    rng = random.Random(7)
+    for _ in range(200):
+        intervals = []
+        for n in range(rng.randint(0, 12)):
+            start = rng.randint(0, 1400)
+            intervals.append(interval(start, start + rng.randint(1, 180), str(n)))
+        index = DayIndex(intervals)
+
+        start = rng.randint(0, 1400)
+        end = start + rng.randint(1, 120)
+        found = index.overlapping(start, end)
+        expected = [i.item for i in intervals if i.start < end and start < i.end]
+        if expected:
+            assert found in expected
+        else:
+            assert found is None
+
+
+def test_free_slots_keeps_gap_around_busy_items():
+    busy = [interval(600, 660, "a"), interval(780, 840, "b")]
+    assert free_slots(busy, 540, 1080, 15) == [[540, 585], [675, 765], [855, 1080]]
+
+
+def test_free_slots_when_day_is_full():
+    assert free_slots([interval(500, 1100, "a")], 540, 1080, 0) == []
+
+
+def test_pack_places_in_order_around_busy_time():
+    items = [({"id": "a"}, 60, ["d1"]), ({"id": "b"}, 60, ["d1"]), ({"id": "c"}, 60, ["d1"])]
+    busy = {"d1": [interval(600, 660, "lunch")]}
+    placements, unplaced = pack(items, busy, 540, 1080, 0)
+
+    assert [(p["id"], p["scheduled_time"]) for p in placements] == [
+        ("a", "09:00:00"), ("b", "11:00:00"), ("c", "12:00:00")
+    ]
+    assert unplaced == []
+
+
+def test_pack_moves_on_to_next_allowed_day():
+    items = [({"id": "a"}, 300, ["d1", "d2"]), ({"id": "b"}, 300, ["d1", "d2"])]
+    placements, _ = pack(items, {}, 540, 900, 0)
+    assert [(p["id"], p["scheduled_date"]) for p in placements] == [("a", "d1"), ("b", "d2")]
+
+
+def test_pack_keeps_order_within_a_group():
+    # "b" would fit in the early gap, but it must come after "a"
+    items = [({"id": "a"}, 120, ["d1"]), ({"id": "b"}, 30, ["d1"])]
+    busy = {"d1": [interval(600, 700, "museum")]}
+    placements, _ = pack(items, busy, 540, 1080, 0)
+    assert [(p["id"], p["scheduled_time"]) for p in placements] == [("a", "11:40:00"), ("b", "13:40:00")]
+
+
+def test_pack_reports_items_too_long_for_any_slot():
+    items = [({"id": "a"}, 600, ["d1"]), ({"id": "b"}, 60, ["d1"])]
+    placements, unplaced = pack(items, {}, 540, 1080, 0)
+    assert [p["id"] for p in placements] == ["b"]
+    assert unplaced == [{"id": "a"}]
+
+
+def test_pack_never_overlaps_busy_or_placed_items():
+    rng = random.Random(11)
+    days = ["d1", "d2", "d3"]
+    busy = {day: [] for day in days}
+    for day in days:
+        for n in range(4):
+            start = rng.randint(480, 1200)
+            busy[day].append(interval(start, start + rng.randint(15, 90), f"{day}-{n}"))
+    items = [({"id": str(n)}, rng.choice([30, 60, 90]), days) for n in range(20)]
+
+    placements, unplaced = pack(items, busy, 540, 1080, 10)
+
+    assert len(placements) + len(unplaced) == len(items)
+    for day in days:
+        placed = []
+        for p in placements:
+            if p["scheduled_date"] == day:
+                start = to_minutes(p["scheduled_time"])
+                placed.append(interval(start, start + p["duration_minutes"], p["id"]))
+        assert all(540 <= i.start and i.end <= 1080 for i in placed)
+        for n, item in enumerate(placed):
+            others = DayIndex(busy[day] + placed[:n] + placed[n + 1:])
+            assert others.overlapping(item.start, item.end) is None
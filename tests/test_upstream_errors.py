@@ -0,0 +1,35 @@
+from app.core.admission import SEARCH, TokenBuckets, _classes
+from app.core.resilience import Upstream, UpstreamError
+from app.main import app
+from app.services import foursquare
+from fastapi.testclient import TestClient
+from types import SimpleNamespace
+import pytest
+
+
+def response(status_code, body=None):
+    def json():
+        if body is None:
+            raise ValueError("Expecting value")
+        return body
+    return SimpleNamespace(status_code=status_code, json=json)
+
+
+@pytest.mark.parametrize("reply, message", [
+    (response(404, {"message": "not found"}), "HTTP 404"),
+    (response(200), "not JSON"),
+])
+def test_client_errors_raise_upstream_error(monkeypatch, reply, message):
+    upstream = Upstream("test-errors")
+    monkeypatch.setattr(upstream._session, "get", lambda *args, **kwargs: reply)
+    with pytest.raises(UpstreamError, match=message):
+        upstream.get_json("https://api.example.com/search", {"q": "x"})
+    assert upstream.breaker.state == upstream.breaker.CLOSED
+
+
+def test_search_route_maps_upstream_error_to_502(monkeypatch):
+    monkeypatch.setattr(_classes[SEARCH], "buckets", TokenBuckets(0, 0))
+    monkeypatch.setattr(foursquare.upstream._session, "get", lambda *args, **kwargs: response(400, {}))
+    res = TestClient(app).get("/api/v1/search/activities", params={"city": "Nowhere at all"})
+    assert res.status_code == 502
+    assert "HTTP 400" in res.json()["detail"]